@@ -80,6 +80,14 @@ try:
 except:
     amgp.ThrowError("AMGP", "startup", 0, "AMGP cannot function without the Menu module. Please visit the AMGP GitHub for a replacement.", runtime, False, True, True)
 
+try:
+    from ModulesCore import AMGP_SERVER as amgpserver
+    if len(sys.argv) == 1:
+        print("(AMGP) <startup> AMGP_SERVER.py imported as amgpserver")
+except:
+    amgpserver = None
+    amgp.ThrowError("AMGP", "startup", 1, "The Server module could not be imported, so AMGP cannot be run with --serve. Please visit the AMGP GitHub for a replacement.", runtime, False, False, True)
+
 # Initialize the dictionaries of module objects and the priority:name dictionary
 util_modules = {100:import_module("ModulesCore.AMGP_MAP"), 200:import_module("ModulesCore.AMGP_UTIL")}
 data_modules = {}
@@ -87,12 +95,16 @@ menu_modules = {0:import_module("ModulesCore.AMGP_MENU")}
 module_names = {0:"AMGP_MENU",100:"AMGP_MAP",200:"AMGP_UTIL"}
 styles = {}
 
+# Modules and styles are found through their metadata alone, and only imported once something other than
+# their Info(), Factors(), or StyleInfo() is needed from them, so startup doesn't wait on every module's dependencies
+module_index = amgp.ModuleIndex()
+
 # Search the Official Modules directory for modules to import
 for module in os.listdir(f"{os.path.dirname(os.path.realpath(__file__))}{amgp.PathSep()}ModulesOfficial"):
     if module.startswith("AMGP_") and module.replace(".py", "") not in module_names.values():
         strp = module.replace(".py", "")
         var_name = strp.replace("_", "").lower()
-        globals()[f"{var_name}"] = import_module(f"ModulesOfficial.{strp}")
+        globals()[f"{var_name}"] = module_index.Load(f"{os.path.dirname(os.path.realpath(__file__))}{amgp.PathSep()}ModulesOfficial", "ModulesOfficial", strp)
         if len(sys.argv) == 1:
             print(f"(AMGP) <startup> {strp} imported as {var_name}")
         module_id = globals()[f"{var_name}"].Info()["uid"]
@@ -117,7 +129,7 @@ for module in os.listdir(f"{os.path.dirname(os.path.realpath(__file__))}{amgp.Pa
     if module.startswith("AMGP_") and module.replace(".py", "") not in module_names.values():
         strp = module.replace(".py", "")
         var_name = strp.replace("_", "").lower()
-        globals()[f"{var_name}"] = import_module(f"ModulesUser.{strp}")
+        globals()[f"{var_name}"] = module_index.Load(f"{os.path.dirname(os.path.realpath(__file__))}{amgp.PathSep()}ModulesUser", "ModulesUser", strp)
         if len(sys.argv) == 1:
             print(f"(AMGP_Main) <startup> {strp} imported as {var_name}")
         module_id = globals()[f"{var_name}"].Info()["uid"]
@@ -137,9 +149,11 @@ for module in os.listdir(f"{os.path.dirname(os.path.realpath(__file__))}{amgp.Pa
 for style_module in os.listdir(f"{os.path.dirname(os.path.realpath(__file__))}{amgp.PathSep()}Styles"):
     if style_module.endswith(".py"):
         strp = style_module.replace(".py", "")
-        globals()[f"{strp}"] = import_module(f"Styles.{strp}")
+        globals()[f"{strp}"] = module_index.Load(f"{os.path.dirname(os.path.realpath(__file__))}{amgp.PathSep()}Styles", "Styles", strp)
         styles[strp] = globals()[f"{strp}"]
 
+module_index.Save()
+
 try:
     with open(f'.{amgp.PathSep()}Resources{amgp.PathSep()}{[f for f in os.listdir(f".{amgp.PathSep()}Resources") if f.endswith(".amgp")][0]}', "rb") as K:
         key = amgp.keytest(K)
@@ -147,20 +161,10 @@ try:
 except:
     key = None
 
-if len(sys.argv) == 1:
-    amgpmenu.InitWithInterface({
-        "version":version,
-        "util_modules":util_modules, # Type 0
-        "data_modules":data_modules, # Type 1
-        "menu_modules":menu_modules, # Type 2
-        "module_names":module_names,
-        "styles":styles,
-        "runtime":runtime,
-        "key":key
-    })
-else:
-    if sys.argv[1].endswith(".json"):
-        amgpmenu.InitWithoutInterface({
+# Rendering processes re-import this file when they start, so only the original process may dispatch work
+if __name__ == "__main__":
+    if len(sys.argv) == 1:
+        amgpmenu.InitWithInterface({
             "version":version,
             "util_modules":util_modules, # Type 0
             "data_modules":data_modules, # Type 1
@@ -169,39 +173,93 @@ else:
             "styles":styles,
             "runtime":runtime,
             "key":key
-        },
-        amgp.LoadPreset(sys.argv[1], None))
-    elif sys.argv[1].endswith(".txt"):
-        with open(sys.argv[1]) as f:
-            for line in f.readlines():
-                amgpmenu.InitWithoutInterface({
-                    "version":version,
-                    "util_modules":util_modules, # Type 0
-                    "data_modules":data_modules, # Type 1
-                    "menu_modules":menu_modules, # Type 2
-                    "module_names":module_names,
-                    "styles":styles,
-                    "runtime":runtime,
-                    "key":key
-                },
-                amgp.LoadPreset(line, None))
-            f.close()
-    elif sys.argv[1] == "--no-ui":
-        flag = True
-        print(f"AMGP v{version} Copyright (C) 2022-2025 Samuel Nelson Bailey\nThis program comes with ABSOLUTELY NO WARRANTY; for details see 'LICENSE.txt'.\nThis is free software, and you are welcome to redistribute it\nunder certain conditions; for details see 'LICENSE.txt'.")
-        while flag:
-            user_input = input("(AMGP) <run_w/o_interface> Type the absolute path to a preset.json file you'd like to run, or type 'exit' to quit: ")
-            if user_input.lower().strip() == "exit":
-                sys.exit()
+        })
+    else:
+        if sys.argv[1].endswith(".json"):
+            amgpmenu.InitWithoutInterface({
+                "version":version,
+                "util_modules":util_modules, # Type 0
+                "data_modules":data_modules, # Type 1
+                "menu_modules":menu_modules, # Type 2
+                "module_names":module_names,
+                "styles":styles,
+                "runtime":runtime,
+                "key":key
+            },
+            amgp.LoadPreset(sys.argv[1], None))
+        elif sys.argv[1].endswith(".txt"):
+            # Every preset is read before any are run, so the data they share is only fetched once
+            presets = []
+            with open(sys.argv[1]) as f:
+                for line in f.readlines():
+                    line = line.strip()
+                    if (line == "") or line.startswith("#"):
+                        continue
+                    try:
+                        presets.append(amgp.LoadPreset(line, None))
+                    except Exception as e:
+                        amgp.ThrowError("AMGP", "batch", 1, f"The preset {line} could not be read and will be skipped: {type(e).__name__}: {e}", runtime, True, False, True)
+                f.close()
+            amgpmenu.InitBatch({
+                "version":version,
+                "util_modules":util_modules, # Type 0
+                "data_modules":data_modules, # Type 1
+                "menu_modules":menu_modules, # Type 2
+                "module_names":module_names,
+                "styles":styles,
+                "runtime":runtime,
+                "key":key
+            },
+            presets)
+        elif sys.argv[1] == "--cache-info":
+            for cache in amgp.ListCaches():
+                entries = cache.Inspect()
+                print(f"(AMGP) <cache> {cache.name}: {len(entries)} entries, {sum([entry['size'] for entry in entries]) / (1024 * 1024):.1f} MB of {cache.max_bytes / (1024 * 1024):.0f} MB")
+                for entry in entries:
+                    expiry = "never expires" if entry["expires"] == None else f"expires {datetime.fromtimestamp(entry['expires'], timezone.utc):%Y-%m-%d %H:%M:%SZ}"
+                    print(f"    {entry['key'][:12]}  {entry['size'] / 1024:>10.1f} KB  {expiry}  {entry['source']}")
+        elif sys.argv[1] == "--clear-cache":
+            for cache in amgp.ListCaches():
+                if (len(sys.argv) == 2) or (cache.name in sys.argv[2:]):
+                    cache.Clear()
+                    print(f"(AMGP) <cache> {cache.name} cleared")
+        elif sys.argv[1] == "--archive":
+            # Fills the local store of a data module ahead of time, as in "--archive AMGP_OBS 2015060100 2015060223"
+            archive_modules = [module for module in data_modules.values() if module.Info()["name"] == sys.argv[2]]
+            if (archive_modules == []) or (not hasattr(archive_modules[0], "Archive")):
+                print(f"(AMGP) <archive> {sys.argv[2]} is not a data module with a local store")
             else:
-                amgpmenu.InitWithoutInterface({
-                    "version":version,
-                    "util_modules":util_modules, # Type 0
-                    "data_modules":data_modules, # Type 1
-                    "menu_modules":menu_modules, # Type 2
-                    "module_names":module_names,
-                    "styles":styles,
-                    "runtime":runtime,
-                    "key":key
-                },
-                amgp.LoadPreset(user_input, None))
\ No newline at end of file
+                start = datetime.strptime(sys.argv[3], "%Y%m%d%H")
+                end = datetime.strptime(sys.argv[4], "%Y%m%d%H") if len(sys.argv) > 4 else start
+                archive_modules[0].Archive(start, end)
+        elif (sys.argv[1] == "--serve") and (amgpserver != None):
+            amgpserver.Serve({
+                "version":version,
+                "util_modules":util_modules, # Type 0
+                "data_modules":data_modules, # Type 1
+                "menu_modules":menu_modules, # Type 2
+                "module_names":module_names,
+                "styles":styles,
+                "runtime":runtime,
+                "key":key
+            },
+            int(sys.argv[2]) if len(sys.argv) > 2 else None)
+        elif sys.argv[1] == "--no-ui":
+            flag = True
+            print(f"AMGP v{version} Copyright (C) 2022-2025 Samuel Nelson Bailey\nThis program comes with ABSOLUTELY NO WARRANTY; for details see 'LICENSE.txt'.\nThis is free software, and you are welcome to redistribute it\nunder certain conditions; for details see 'LICENSE.txt'.")
+            while flag:
+                user_input = input("(AMGP) <run_w/o_interface> Type the absolute path to a preset.json file you'd like to run, or type 'exit' to quit: ")
+                if user_input.lower().strip() == "exit":
+                    sys.exit()
+                else:
+                    amgpmenu.InitWithoutInterface({
+                        "version":version,
+                        "util_modules":util_modules, # Type 0
+                        "data_modules":data_modules, # Type 1
+                        "menu_modules":menu_modules, # Type 2
+                        "module_names":module_names,
+                        "styles":styles,
+                        "runtime":runtime,
+                        "key":key
+                    },
+                    amgp.LoadPreset(user_input, None))
\ No newline at end of file
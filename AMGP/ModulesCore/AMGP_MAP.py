@@ -18,14 +18,25 @@ The core of the map production processes of AMGP.
 
 from cartopy import crs as ccrs
 import cartopy.feature as cfeat
+from cartopy.mpl.path import shapely_to_path
+from shapely.geometry import box
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
 import matplotlib.pyplot as plt
 import numpy as np
-from metpy.plots import plot_areas
-from collections import Counter
 import os
+import io
+import json
+import hashlib
 from datetime import datetime, timezone
 from PIL import Image
 import uuid
+from importlib import import_module
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import pickle as pkl
+from collections import deque
+from itertools import islice
+from multiprocessing import get_context
 
 #----------------- AMGP IMPORTS -------------------#
 from ModulesCore import AMGP_UTIL as amgp
@@ -64,22 +75,37 @@ def Run(packed_data : dict, plotables : list, map_settings : dict, proj_settings
     
     overrides : dict, optional, defaults to {}
         Any additional parameters, typically only used by internal functions.
+            all_paths : bool
+                Whether every image path of the run should be returned in frame order, rather than only the last one.
+            progress : callable
+                Called as progress(figure_num, max_times, full_path) each time a frame has been saved, in frame order.
+            cancel : threading.Event or multiprocessing.Event
+                Once set, no further frames are started, and the run returns with the frames finished so far.
+            in_memory : bool
+                Whether frames should be kept as PIL RGBA images instead of being saved, for previews that would only be read back and deleted.
+                The images take the place of paths in whatever is returned or passed to progress.
+            rerender : bool
+                Whether every frame should be drawn again, even those the render manifest shows are unchanged.
+            shared_data : dict
+                Pickled datasets already fetched elsewhere, keyed by (module uid, DataRequest() key), which the run's broker uses instead of fetching them itself.
+
+    Frames saved as PNGs are recorded in a render manifest within the directory they're saved to, along with a hash of the preset,
+    their valid times, and a fingerprint of their data from each module's DataFingerprint(). A frame whose hash matches one already
+    recorded there, and whose image still exists, isn't drawn again; the path of the existing image stands in for it instead.
+    Setting "render_manifest" to false within config.json turns this off.
+
+    A save location ending in one of amgp.animation_formats (.gif, .apng, or .mp4) saves the whole run as a single animation instead,
+    named from the wildcards of its first frame. Each frame is added to it as soon as it's drawn, and passed to progress as an image,
+    so that no frame is ever written out on its own. The path of the animation is what's returned.
     '''
 
     #print(plotables)
     #print(map_settings)
     #print(proj_settings)
-    version = packed_data["version"]
-    data_modules = packed_data["data_modules"]
     runtime = packed_data["runtime"]
 
-    times = []
-    for axis in range(0, int(packed_data["styles"][f"{style_info['name']}"].StyleInfo()["axes"])):
-        mode = map_settings[axis]["time mode"]['selection'][0]
-        timestring = map_settings[axis]["time"]['selection']
-        times.append(amgp.Time(runtime, mode, timestring = timestring).AddFormatting(plotables[axis]))
-    
-    max_times = np.max(np.array([len(x.timelist) for x in times]))
+    # The times of each axis are only worked out once per run, then handed to every frame
+    time_plans, max_times = PlanTimes(packed_data, plotables, map_settings, style_info)
     
     #for k, v in overrides.items():
         #if k == "temp":
@@ -92,152 +118,741 @@ def Run(packed_data : dict, plotables : list, map_settings : dict, proj_settings
 
     #print(data_modules)
 
+    # Every frame of the run draws its data through the one broker (one per process, when rendering in parallel),
+    # so a dataset shared by several plotables, axes, or frames is only downloaded and parsed once
+    # When rendering serially, the data of up to the next "prefetch_frames" frames is fetched in the background while each frame draws
+    prefetch_frames = max(0, int(amgp.Config("prefetch_frames", 2)))
+    broker = amgp.DataBroker(prefetch_threads = prefetch_frames, shared = overrides.get("shared_data"))
+    previous_broker = amgp.SetBroker(broker)
+
+    full_path = None
+    full_paths = []
+    progress = overrides.get("progress", None)
+    cancel = overrides.get("cancel", None)
+    in_memory = overrides.get("in_memory", False)
+    frame_args = (plotables, map_settings, proj_settings, style_info, save_loc)
+
+    animation = None
+    if (not in_memory) and (not save_loc.startswith("./Temp/")) and (os.path.splitext(save_loc)[1].lower() in amgp.animation_formats):
+        try:
+            animation = amgp.AnimationWriter(AnimationPath(save_loc, time_plans, runtime))
+        except FileNotFoundError as e:
+            amgp.ThrowError("AMGP_MAP", "Run()", 0, f"{e}", runtime, True, True, True)
+
+    # Frames are checked against their render manifests before anything is drawn, so that skipped frames aren't prefetched or sent to a process
+    manifests = {}
+    frame_hashes = {}
+    unchanged = {}
+    use_manifest = (not in_memory) and (animation == None) and (not save_loc.startswith("./Temp/")) and amgp.Config("render_manifest", True)
+    if use_manifest:
+        for figure_num in range(1, max_times + 1):
+            directory = FrameDirectory(map_settings, time_plans, save_loc, runtime, figure_num)
+            if directory not in manifests.keys():
+                manifests[directory] = RenderManifest(directory)
+            frame_hashes[figure_num] = FrameHash(packed_data, time_plans, *frame_args, figure_num)
+            if (frame_hashes[figure_num] != None) and (not overrides.get("rerender", False)):
+                existing = manifests[directory].Find(frame_hashes[figure_num])
+                if existing != None:
+                    unchanged[figure_num] = existing
+        if unchanged != {}:
+            print(f"(AMGP_MAP) <Run()> {len(unchanged)} of {max_times} frames are unchanged since they were last rendered, and won't be drawn again")
+
+    def RecordFrame(figure_num, full_path):
+        if use_manifest:
+            # Taken again now that the frame's data has been fetched, since only then is it known which source it came from;
+            # a frame whose data changed or fell back to another source while it was drawn isn't recorded at all
+            frame_hash = FrameHash(packed_data, time_plans, *frame_args, figure_num)
+            if (frame_hash != None) and (frame_hashes[figure_num] in [None, frame_hash]):
+                manifests[FrameDirectory(map_settings, time_plans, save_loc, runtime, figure_num)].Record(frame_hash, full_path, time_plans[-1].timelist[figure_num - 1])
+
+    pending = [figure_num for figure_num in range(1, max_times + 1) if figure_num not in unchanged.keys()]
+    parallel = map_settings[0].get("parallel rendering", {"selection":["No"]})["selection"]
+
+    try:
+        if (parallel != []) and (parallel[0] == "Yes") and (len(pending) > 1):
+            # Each frame is independent of the others, so the whole range is farmed out to a pool of processes;
+            # results are taken back in frame order, the same order the serial loop below produces them in.
+            workers = min(os.cpu_count() or 1, max_times)
+            # Frames headed for an animation come back as whole images, so only a couple per process are ever submitted
+            # ahead of the one being encoded, rather than piling up whenever encoding is slower than rendering
+            window = 2 * workers if animation != None else len(pending)
+            with ProcessPoolExecutor(max_workers = workers, mp_context = get_context("spawn"), initializer = InitWorker, initargs = (PortablePackedData(packed_data), time_plans)) as pool:
+                queued = iter(pending)
+                submitted = deque([pool.submit(RenderFrameInWorker, frame_args + (figure_num, in_memory or (animation != None))) for figure_num in islice(queued, window)])
+                for figure_num in range(1, max_times + 1):
+                    if figure_num in unchanged.keys():
+                        full_path = unchanged[figure_num]
+                    else:
+                        full_path = submitted.popleft().result()
+                        next_frame = next(queued, None)
+                        if next_frame != None:
+                            submitted.append(pool.submit(RenderFrameInWorker, frame_args + (next_frame, in_memory or (animation != None))))
+                        RecordFrame(figure_num, full_path)
+                    if animation != None:
+                        animation.Add(full_path)
+                    else:
+                        full_paths.append(full_path)
+                    if progress != None:
+                        progress(figure_num, max_times, full_path)
+                    if (cancel != None) and cancel.is_set():
+                        pool.shutdown(wait = True, cancel_futures = True)
+                        break
+        else:
+            prefetched = 1
+            for figure_num in range(1, max_times + 1):
+                if (cancel != None) and cancel.is_set():
+                    break
+                # Only ever a fixed number of frames ahead, so that what's been fetched but not yet drawn stays bounded
+                while prefetched < min(figure_num + prefetch_frames, max_times):
+                    prefetched += 1
+                    if prefetched not in unchanged.keys():
+                        PrefetchFrame(packed_data, time_plans, plotables, proj_settings, prefetched)
+                if figure_num in unchanged.keys():
+                    full_path = unchanged[figure_num]
+                else:
+                    full_path = RenderFrame(packed_data, time_plans, *frame_args, figure_num, in_memory or (animation != None))
+                    RecordFrame(figure_num, full_path)
+                if animation != None:
+                    animation.Add(full_path)
+                else:
+                    full_paths.append(full_path)
+                if progress != None:
+                    progress(figure_num, max_times, full_path)
+    finally:
+        broker.Close()
+        amgp.SetBroker(previous_broker)
+        ReleaseBasemap()
+        if animation != None:
+            # Whatever frames were made before a cancellation or an error are still kept as an animation
+            full_path = animation.Close()
+            full_paths = [full_path]
+
+    
+    if overrides.get("all_paths", False):
+        return full_paths
+
+    if return_image:
+        # This is used to display the most recently-made map inside of the AMGP application window.
+        return full_path
+
+def PrefetchFrame(packed_data : dict, time_plans : list, plotables : list, proj_settings : dict, figure_num : int):
+    '''
+    Starts the data of a later frame being fetched through the active broker, for every plotable whose module names its datasets with DataRequest().
+    '''
+    for uid, key, data_function, args in FrameRequests(packed_data, time_plans, plotables, proj_settings, figure_num):
+        amgp.active_broker.Prefetch(uid, key, data_function, args)
+
+def FrameRequests(packed_data : dict, time_plans : list, plotables : list, proj_settings : dict, figure_num : int):
+    '''
+    Lists the (uid, key, data_function, args) of every dataset a frame needs, for every plotable whose module names its datasets with DataRequest().
+    '''
+    requests = []
+    for axis_num in range(0, len(time_plans)):
+        for plotable in plotables[axis_num]:
+            for _, module in packed_data["data_modules"].items():
+                if (plotable["source_module"] == module.Info()["uid"]) and hasattr(module, "DataRequest"):
+                    try:
+                        key, args = module.DataRequest(plotable, proj_settings[axis_num], time_plans[axis_num].Time(figure_num - 1))
+                    except Exception:
+                        # Left for the frame itself to run into, and report, once it's drawn
+                        continue
+                    requests.append((module.Info()["uid"], key, module.Data, args))
+    return requests
+
+def PlanTimes(packed_data : dict, plotables : list, map_settings : dict, style_info : dict):
+    '''
+    Works out the amgp.TimePlan of each axis of a run, returning them along with the number of frames in the run.
+    '''
+    time_plans = []
+    for axis in range(0, int(packed_data["styles"][f"{style_info['name']}"].StyleInfo()["axes"])):
+        mode = map_settings[axis]["time mode"]['selection'][0]
+        timestring = map_settings[axis]["time"]['selection']
+        time_plans.append(amgp.TimePlan(packed_data["runtime"], mode, timestring, plotables[axis]))
+
+    max_times = np.max(np.array([x.entries for x in time_plans]))
+    return time_plans, max_times
+
+def FrameHash(packed_data : dict, time_plans : list, plotables : list, map_settings : dict, proj_settings : dict, style_info : dict, save_loc : str, figure_num : int):
+    '''
+    Hashes everything that decides what a frame looks like: the preset, the valid times of the frame, and a fingerprint of the data of each of its plotables.
+
+    Returns None if any plotable's module has no DataFingerprint(), or can't tell whether its data has changed, since the frame then has to be drawn to be sure.
+    '''
+    fingerprints = []
+    for axis_num in range(0, len(time_plans)):
+        for plotable in plotables[axis_num]:
+            module = amgp.ModuleFromUID(plotable["source_module"], packed_data["data_modules"])
+            if (module == None) or (not hasattr(module, "DataFingerprint")):
+                return None
+            try:
+                fingerprint = module.DataFingerprint(plotable, proj_settings[axis_num], time_plans[axis_num].Time(figure_num - 1))
+            except Exception:
+                return None
+            if fingerprint == None:
+                return None
+            fingerprints.append(fingerprint)
+
+    # Whether frames are rendered in parallel doesn't change how they look
+    settings = [{k:v for k, v in map_settings[axis_num].items() if k != "parallel rendering"} for axis_num in range(0, len(time_plans))]
+    frame = {
+        "version":packed_data["version"],
+        "watermarked":packed_data["key"] != None,
+        "plotables":[plotables[axis_num] for axis_num in range(0, len(time_plans))],
+        "map_settings":settings,
+        "projections":[proj_settings[axis_num] for axis_num in range(0, len(time_plans))],
+        "style":style_info,
+        "save":save_loc,
+        "times":[time_plans[axis_num].timelist[figure_num - 1] for axis_num in range(0, len(time_plans))],
+        "data":fingerprints
+    }
+    return hashlib.sha256(json.dumps(frame, sort_keys = True, default = str).encode("utf-8")).hexdigest()
+
+def FrameDirectory(map_settings : dict, time_plans : list, save_loc : str, runtime : datetime, figure_num : int):
+    '''
+    The directory a frame saved as a PNG goes in, the same as RenderFrame() picks it.
+    '''
+    dr = os.path.dirname(os.path.realpath(__file__)).replace("ModulesCore", "Maps")
+    plot_time = time_plans[-1].timelist[figure_num - 1]
+    if save_loc == "":
+        if "Yes" in [map_settings[axis_num]["append date to title"]["selection"][0] for axis_num in range(0, len(time_plans))]:
+            return f'{dr}{amgp.PathSep()}{plot_time.year}{amgp.PathSep()}{plot_time.month}{amgp.PathSep()}{plot_time.day}'
+        return f"{dr}{amgp.PathSep()}Dateless"
+    if save_loc.endswith("/"):
+        return f"{dr}{ExpandSaveLoc(save_loc, plot_time, runtime, figure_num)}".rstrip(amgp.PathSep())
+    return os.path.dirname(f"{dr}{ExpandSaveLoc(save_loc, plot_time, runtime, figure_num)}")
+
+class RenderManifest(object):
+    """
+    The record of which images within a directory were rendered from which frame hashes, kept in the directory as render_manifest.json.
+
+    Parameters
+    ----------
+    directory : string
+
+    Methods
+    -------
+    Find()
+
+    Record()
+    """
+    def __init__(self, directory : str):
+        self.directory = os.path.normpath(directory)
+        self.path = f"{self.directory}{amgp.PathSep()}render_manifest.json"
+        self.entries = self.Load()
+
+    def Load(self):
+        try:
+            with open(self.path, "r") as M:
+                return json.load(M)
+        except (OSError, ValueError):
+            return {}
+
+    def Find(self, frame_hash : str):
+        """
+        Returns the path of an existing image rendered from frame_hash, or None.
+        """
+        for name, entry in self.entries.items():
+            if (entry["hash"] == frame_hash) and os.path.isfile(f"{self.directory}{amgp.PathSep()}{name}"):
+                return f"{self.directory}{amgp.PathSep()}{name}"
+        return None
+
+    def Record(self, frame_hash : str, full_path : str, valid_time : datetime):
+        """
+        Records that the image at full_path was rendered from frame_hash, and saves the manifest straight away.
+        """
+        if os.path.normpath(os.path.dirname(full_path)) != self.directory:
+            return
+        entry = {"hash":frame_hash, "valid_time":f"{valid_time}", "rendered":datetime.now(timezone.utc).isoformat()}
+        # Re-read first, so that entries recorded by another run since this one started aren't lost
+        self.entries = self.Load()
+        self.entries[os.path.basename(full_path)] = entry
+        self.entries = {name:entry for name, entry in self.entries.items() if os.path.isfile(f"{self.directory}{amgp.PathSep()}{name}")}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as M:
+            json.dump(self.entries, M, indent = 1)
+        os.replace(tmp, self.path)
+
+def RenderFrame(packed_data : dict, time_plans : list, plotables : list, map_settings : dict, proj_settings : dict, style_info : dict, save_loc : str, figure_num : int, in_memory : bool = False):
+    '''
+    Draws, saves, and watermarks a single figure of a run.
+
+    Parameters
+    ----------
+    packed_data : dict
+        Data passed on from AMGP.py, including the imported modules, AMGP version, and program runtime.
+
+    time_plans : list
+        The amgp.TimePlan of each axis of the run.
+
+    plotables, map_settings, proj_settings, style_info, save_loc
+        As passed to Run().
+
+    figure_num : int
+        The number of the figure within the run, starting with 1.
+
+    in_memory : bool, optional, defaults to False
+        Whether the figure should be returned as an image rather than saved.
+
+    Returns
+    -------
+    full_path : string or PIL.Image.Image
+        The path the figure was saved to, or the figure itself when in_memory is set.
+    '''
+    version = packed_data["version"]
+    data_modules = packed_data["data_modules"]
+    runtime = packed_data["runtime"]
+
     Style = packed_data["styles"][f"{style_info['name']}"]
     projs = []
     for axis_num in range(0, Style.StyleInfo()["axes"]):
         projs.append(amgp.ParseProjection(proj_settings[axis_num]))
 
-    figname = ""
-    for figure_num in range(1, max_times + 1):
-        fig_fill = False
+    fig_fill = False
 
-        StyleFig = Style.StyleTemplate().Prepare(projs)
+    StyleFig = PrepareBasemap(Style, projs, map_settings, proj_settings, style_info)
 
-        fig_hasdate = False
+    fig_hasdate = False
 
-        for axis_num in range(0, StyleFig.axes):
-            
-            if proj_settings[axis_num]['area']["selection"] != "":
-                areaName = proj_settings[axis_num]['area']["selection"].lower()
-                strpArea = areaName.replace("+", "")
-                strpArea = strpArea.replace("-", "")
-                area = amgp.CustomAreas(areaName)
-                if area == None:
-                    for narea in plot_areas.named_areas:
-                        if narea == strpArea:
-                            area = plot_areas.named_areas[f"{narea}"].bounds
-                splitArea = Counter(areaName)
-                factor = (splitArea['+']) - (splitArea['-'])
-                scaleFactor = (1 - 2**-factor)/2
-                west, east, south, north = area
-                newWest = west - (west - east) * scaleFactor
-                newEast = east + (west - east) * scaleFactor
-                newSouth = south - (south - north) * scaleFactor
-                newNorth = north + (south - north) * scaleFactor
-                extent = newWest, newEast, newSouth, newNorth
-
-                StyleFig.axis[axis_num].set_extent(extent, crs=ccrs.PlateCarree())
-
-            if projs[axis_num] != None:
-                for layer in map_settings[axis_num]['layers']["selection"]:
-                    if layer == "states":
-                        StyleFig.axis[axis_num].add_feature(cfeat.STATES)
-                    if layer == "coastlines":
-                        StyleFig.axis[axis_num].add_feature(cfeat.COASTLINE)
-                    if layer == "lakes":
-                        StyleFig.axis[axis_num].add_feature(cfeat.LAKES)
-                    if layer == "oceans":
-                        StyleFig.axis[axis_num].add_feature(cfeat.OCEAN)
-                    if layer == "country borders":
-                        StyleFig.axis[axis_num].add_feature(cfeat.BORDERS)
-                    if layer == "rivers":
-                        StyleFig.axis[axis_num].add_feature(cfeat.RIVERS)
-
-            for plotable in plotables[axis_num]:
-                if plotable["is_fill"]:
-                    fig_fill = True
-                flag = True
-                for _, module in data_modules.items():
-                    if (plotable["source_module"] == module.Info()["uid"]) and (plotable["name"] in module.Factors().keys()):
-                        StyleFig.axis[axis_num] = module.Plot(StyleFig.axis[axis_num], plotable, map_settings[axis_num], proj_settings[axis_num], amgp.Time(runtime, map_settings[axis_num]["time mode"]['selection'][0], timestring = map_settings[axis_num]["time"]['selection']).AddFormatting(plotables[axis_num]).Index(figure_num - 1))
-                        flag = False
-                    elif (plotable["source_module"] == module.Info()["uid"]) and (plotable["name"] not in module.Factors().keys()):
-                        amgp.ThrowError(f"{module.Info()['name']}", "Plot()", 1, f"The plotable {plotable['name']} was requested, but not found within the identified module {module.Info()['name']}. This shouldn't be able to happen, please investigate further and submit a report.", runtime, True)
-                if flag:
-                    amgp.ThrowError("AMGP_MAP", "Run()", 0, f"The requested module for plotable {plotable['name']} could not be found.", runtime, True, True, True)
-            
-            left_title = f"AMGP v{version}"
-            if map_settings[axis_num]["append date to title"]["selection"][0] == "Yes":
-                center_title = f"{amgp.Time(runtime, map_settings[axis_num]['time mode']['selection'][0], timestring = map_settings[axis_num]['time']['selection']).AddFormatting(plotables[axis_num]).FormatTimes(plotables[axis_num][0]['time_format']).Index(figure_num - 1).timelist[0].strftime('%Y%m%d %H%MZ')} - {map_settings[axis_num]['figure title']['selection']}"
-                fig_hasdate = True
-            else:
-                center_title = f"{map_settings[axis_num]['figure title']['selection']}"
-            right_title = f"{map_settings[axis_num]['username']['selection']}"
-
-            StyleFig.axis[axis_num].set_title(left_title, loc = "left")
-            StyleFig.axis[axis_num].set_title(center_title, loc = "center")
-            StyleFig.axis[axis_num].set_title(right_title, loc = "right")
-
-        # Save and destroy the figure
-        production_time = datetime.now(timezone.utc)
-        figname = f"{center_title} - Runtime {production_time.strftime('%Y%m%d %H%M%SZ')}.png"
-
-        plot_time = amgp.Time(runtime, map_settings[axis_num]['time mode']['selection'][0], timestring = map_settings[axis_num]['time']['selection']).AddFormatting(plotables[axis_num]).Index(figure_num - 1).timelist[0]
-
-        dr = os.path.dirname(os.path.realpath(__file__)).replace("ModulesCore", "Maps")
-        if not os.path.isdir(dr):
-            os.mkdir(dr)
-        if save_loc == "":
-            if fig_hasdate:
-                OldDirY = os.path.isdir(f'{dr}{amgp.PathSep()}{plot_time.year}')
-                OldDirM = os.path.isdir(f'{dr}{amgp.PathSep()}{plot_time.year}{amgp.PathSep()}{plot_time.month}')
-                OldDirD = os.path.isdir(f'{dr}{amgp.PathSep()}{plot_time.year}{amgp.PathSep()}{plot_time.month}{amgp.PathSep()}{plot_time.day}')
-
-                if not OldDirY:
-                    os.mkdir(f'{dr}{amgp.PathSep()}{plot_time.year}')
-                if not OldDirM:
-                    os.mkdir(f'{dr}{amgp.PathSep()}{plot_time.year}{amgp.PathSep()}{plot_time.month}')
-                if not OldDirD:
-                    os.mkdir(f'{dr}{amgp.PathSep()}{plot_time.year}{amgp.PathSep()}{plot_time.month}{amgp.PathSep()}{plot_time.day}')
-
-                full_path = f'{dr}{amgp.PathSep()}{plot_time.year}{amgp.PathSep()}{plot_time.month}{amgp.PathSep()}{plot_time.day}{amgp.PathSep()}' + figname
-                
-                StyleFig.figure.savefig(full_path, dpi = int(map_settings[0]["image dpi"]["selection"][0]), bbox_inches = "tight", format = "PNG")
-            else:
-                full_path = f"{dr}{amgp.PathSep()}Dateless{amgp.PathSep()}{figname}"
-                StyleFig.figure.savefig(full_path, dpi = int(map_settings[0]["image dpi"]["selection"][0]), bbox_inches = "tight", format = "PNG")
+    for axis_num in range(0, StyleFig.axes):
+        for plotable in plotables[axis_num]:
+            if plotable["is_fill"]:
+                fig_fill = True
+            flag = True
+            for _, module in data_modules.items():
+                if (plotable["source_module"] == module.Info()["uid"]) and (plotable["name"] in module.Factors().keys()):
+                    StyleFig.axis[axis_num] = module.Plot(StyleFig.axis[axis_num], plotable, map_settings[axis_num], proj_settings[axis_num], time_plans[axis_num].Time(figure_num - 1))
+                    flag = False
+                elif (plotable["source_module"] == module.Info()["uid"]) and (plotable["name"] not in module.Factors().keys()):
+                    amgp.ThrowError(f"{module.Info()['name']}", "Plot()", 1, f"The plotable {plotable['name']} was requested, but not found within the identified module {module.Info()['name']}. This shouldn't be able to happen, please investigate further and submit a report.", runtime, True)
+            if flag:
+                amgp.ThrowError("AMGP_MAP", "Run()", 0, f"The requested module for plotable {plotable['name']} could not be found.", runtime, True, True, True)
+        
+        left_title = f"AMGP v{version}"
+        if map_settings[axis_num]["append date to title"]["selection"][0] == "Yes":
+            center_title = f"{time_plans[axis_num].Formatted(plotables[axis_num][0]['time_format'], figure_num - 1).strftime('%Y%m%d %H%MZ')} - {map_settings[axis_num]['figure title']['selection']}"
+            fig_hasdate = True
         else:
-            # Ensure the directories exist that the images are to be saved to
-            split_save_loc = save_loc.split("/")
-            path_flag = 0
-            if not save_loc.endswith("/"):
-                path_flag += 1
-            for i in range(0, len(split_save_loc) - path_flag):
-                ppath = ""
-                if save_loc.startswith("/"):
-                    ppath += "/"
-                for piece in split_save_loc[:i+1]:
-                    ppath += f"{piece}{amgp.PathSep()}"
-                if save_loc.startswith("."):
-                    ppath = ppath.replace(".", dr)
-                if not os.path.exists(ppath):
-                    os.mkdir(ppath)
+            center_title = f"{map_settings[axis_num]['figure title']['selection']}"
+        right_title = f"{map_settings[axis_num]['username']['selection']}"
+
+        StyleFig.axis[axis_num].set_title(left_title, loc = "left")
+        StyleFig.axis[axis_num].set_title(center_title, loc = "center")
+        StyleFig.axis[axis_num].set_title(right_title, loc = "right")
+
+    if packed_data["key"] == None:
+        watermark = None
+    elif fig_fill:
+        watermark = "sw"
+    else:
+        watermark = "c"
+
+    if in_memory:
+        image = FigureImage(StyleFig.figure, int(map_settings[0]["image dpi"]["selection"][0]))
+        if watermark != None:
+            image = amgp.Water(image, watermark)
+        return image
+
+    # Save and destroy the figure
+    production_time = datetime.now(timezone.utc)
+    figname = f"{center_title} - Runtime {production_time.strftime('%Y%m%d %H%M%SZ')}.png"
+
+    plot_time = time_plans[axis_num].timelist[figure_num - 1]
+
+    dr = os.path.dirname(os.path.realpath(__file__)).replace("ModulesCore", "Maps")
+    os.makedirs(dr, exist_ok = True)
+    if save_loc == "":
+        if fig_hasdate:
+            # exist_ok, since frames rendered in parallel may race each other to create the same directories
+            os.makedirs(f'{dr}{amgp.PathSep()}{plot_time.year}{amgp.PathSep()}{plot_time.month}{amgp.PathSep()}{plot_time.day}', exist_ok = True)
+
+            full_path = f'{dr}{amgp.PathSep()}{plot_time.year}{amgp.PathSep()}{plot_time.month}{amgp.PathSep()}{plot_time.day}{amgp.PathSep()}' + figname
             
-            if save_loc.startswith("."): # Within the AMGP map directories
-                if save_loc.startswith("./Temp/"):
-                    full_path = f"{dr}{save_loc.replace('.', '').replace('/', amgp.PathSep())}{uuid.uuid4()}.png"
-                else:
-                    if save_loc.endswith("/"):
-                        full_path = f"{dr}{save_loc.replace('.', '').replace('/', amgp.PathSep()).replace('$Y', plot_time.strftime('%Y')).replace('$m', plot_time.strftime('%m')).replace('$d', plot_time.strftime('%d')).replace('$D', plot_time.strftime('%Y-%m-%d')).replace('$t', plot_time.strftime('%H%M%SZ')).replace('$r', runtime.strftime('%Y-%m-%d_%H%M%SZ')).replace('$i', f'{figure_num - 1}').replace('$n', f'{figure_num}')}{amgp.PathSep()}{figname}"
-                    else:
-                        full_path = f"{dr}{save_loc.replace('.', '').replace('/', amgp.PathSep()).replace('$Y', plot_time.strftime('%Y')).replace('$m', plot_time.strftime('%m')).replace('$d', plot_time.strftime('%d')).replace('$D', plot_time.strftime('%Y-%m-%d')).replace('$t', plot_time.strftime('%H%M%SZ')).replace('$r', runtime.strftime('%Y-%m-%d_%H%M%SZ')).replace('$i', f'{figure_num - 1}').replace('$n', f'{figure_num}')}.png"
-                StyleFig.figure.savefig(full_path, dpi = int(map_settings[0]["image dpi"]["selection"][0]), bbox_inches = "tight", format = "PNG")
-            else: # Absolute paths elsewhere
+            SaveFigure(StyleFig.figure, full_path, int(map_settings[0]["image dpi"]["selection"][0]), watermark)
+        else:
+            full_path = f"{dr}{amgp.PathSep()}Dateless{amgp.PathSep()}{figname}"
+            SaveFigure(StyleFig.figure, full_path, int(map_settings[0]["image dpi"]["selection"][0]), watermark)
+    else:
+        # Ensure the directories exist that the images are to be saved to
+        split_save_loc = save_loc.split("/")
+        path_flag = 0
+        if not save_loc.endswith("/"):
+            path_flag += 1
+        for i in range(0, len(split_save_loc) - path_flag):
+            ppath = ""
+            if save_loc.startswith("/"):
+                ppath += "/"
+            for piece in split_save_loc[:i+1]:
+                ppath += f"{piece}{amgp.PathSep()}"
+            if save_loc.startswith("."):
+                ppath = ppath.replace(".", dr)
+            os.makedirs(ppath, exist_ok = True)
+        
+        if save_loc.startswith("."): # Within the AMGP map directories
+            if save_loc.startswith("./Temp/"):
+                full_path = f"{dr}{save_loc.replace('.', '').replace('/', amgp.PathSep())}{uuid.uuid4()}.png"
+            else:
                 if save_loc.endswith("/"):
-                    full_path = f"{dr}{save_loc.replace('.', '').replace('/', amgp.PathSep()).replace('$Y', plot_time.strftime('%Y')).replace('$m', plot_time.strftime('%m')).replace('$d', plot_time.strftime('%d')).replace('$D', plot_time.strftime('%Y-%m-%d')).replace('$t', plot_time.strftime('%H%M%SZ')).replace('$r', runtime.strftime('%Y-%m-%d_%H%M%SZ')).replace('$i', f'{figure_num - 1}').replace('$n', f'{figure_num}')}{amgp.PathSep()}{figname}"
+                    full_path = f"{dr}{ExpandSaveLoc(save_loc, plot_time, runtime, figure_num)}{amgp.PathSep()}{figname}"
                 else:
-                    full_path = f"{dr}{save_loc.replace('.', '').replace('/', amgp.PathSep()).replace('$Y', plot_time.strftime('%Y')).replace('$m', plot_time.strftime('%m')).replace('$d', plot_time.strftime('%d')).replace('$D', plot_time.strftime('%Y-%m-%d')).replace('$t', plot_time.strftime('%H%M%SZ')).replace('$r', runtime.strftime('%Y-%m-%d_%H%M%SZ')).replace('$i', f'{figure_num - 1}').replace('$n', f'{figure_num}')}.png"
-                StyleFig.figure.savefig(full_path, dpi = int(map_settings[0]["image dpi"]["selection"][0]), bbox_inches = "tight", format = "PNG")
-        if packed_data["key"] != None:
-            if fig_fill:
-                saved_fig = amgp.Water(full_path, "sw")
-                saved_fig.save(full_path)
+                    full_path = f"{dr}{ExpandSaveLoc(save_loc, plot_time, runtime, figure_num)}.png"
+            SaveFigure(StyleFig.figure, full_path, int(map_settings[0]["image dpi"]["selection"][0]), watermark)
+        else: # Absolute paths elsewhere
+            if save_loc.endswith("/"):
+                full_path = f"{dr}{ExpandSaveLoc(save_loc, plot_time, runtime, figure_num)}{amgp.PathSep()}{figname}"
             else:
-                saved_fig = amgp.Water(full_path, "c")
-                saved_fig.save(full_path)
-        StyleFig.Destroy()
+                full_path = f"{dr}{ExpandSaveLoc(save_loc, plot_time, runtime, figure_num)}.png"
+            SaveFigure(StyleFig.figure, full_path, int(map_settings[0]["image dpi"]["selection"][0]), watermark)
+    # The figure isn't destroyed, since it's kept as the basemap of the next frame
+    return full_path
 
-    
-    if return_image:
-        # This is used to display the most recently-made map inside of the AMGP application window.
-        return full_path
\ No newline at end of file
+def ExpandSaveLoc(save_loc : str, plot_time : datetime, runtime : datetime, figure_num : int):
+    '''
+    Fills in the wildcards of a save location for a single frame, giving the path it stands for beneath the Maps directory.
+
+        $Y, $m, $d    The year, month, and day of the frame
+        $D            The date of the frame, as YYYY-mm-dd
+        $t            The time of the frame, as HHMMSSZ
+        $r            The runtime of AMGP, as YYYY-mm-dd_HHMMSSZ
+        $i, $n        The index of the frame within the run, counting from 0 and 1 respectively
+    '''
+    return save_loc.replace('.', '').replace('/', amgp.PathSep()).replace('$Y', plot_time.strftime('%Y')).replace('$m', plot_time.strftime('%m')).replace('$d', plot_time.strftime('%d')).replace('$D', plot_time.strftime('%Y-%m-%d')).replace('$t', plot_time.strftime('%H%M%SZ')).replace('$r', runtime.strftime('%Y-%m-%d_%H%M%SZ')).replace('$i', f'{figure_num - 1}').replace('$n', f'{figure_num}')
+
+def AnimationPath(save_loc : str, time_plans : list, runtime : datetime):
+    '''
+    The path an animated run is saved to, with the wildcards of its save location filled in from its first frame.
+    '''
+    save_loc, extension = os.path.splitext(save_loc)
+    dr = os.path.dirname(os.path.realpath(__file__)).replace("ModulesCore", "Maps")
+    full_path = f"{dr}{ExpandSaveLoc(save_loc, time_plans[-1].timelist[0], runtime, 1)}{extension.lower()}"
+    os.makedirs(os.path.dirname(full_path), exist_ok = True)
+    return full_path
+
+def SaveFigure(figure, full_path : str, dpi : int, watermark : str = None):
+    '''
+    Saves a figure as a PNG. Watermarked figures are watermarked in memory first, so that they're still only encoded once.
+    '''
+    if watermark == None:
+        figure.savefig(full_path, dpi = dpi, bbox_inches = "tight", format = "PNG")
+    else:
+        amgp.Water(FigureImage(figure, dpi), watermark).save(full_path, format = "PNG")
+
+def FigureImage(figure, dpi : int):
+    '''
+    Renders a figure to an RGBA image, cropped the same as savefig(bbox_inches = "tight") would crop it, without encoding it to a PNG.
+    '''
+    # The crop is worked out here, the same way savefig() works it out, so that the size of the raw image is known;
+    # the figure is laid out at the dpi it will be saved at first, since text is measured at that dpi
+    figure_dpi = figure.dpi
+    figure.dpi = dpi
+    try:
+        figure.draw_without_rendering()
+        bbox = figure.get_tightbbox().padded(plt.rcParams["savefig.pad_inches"])
+    finally:
+        figure.dpi = figure_dpi
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, dpi = dpi, bbox_inches = bbox, format = "raw")
+    width, height = int(bbox.width * dpi), int(bbox.height * dpi)
+    if len(buffer.getbuffer()) != width * height * 4:
+        # Rounded differently than expected, so it's encoded and decoded instead, rather than read as a garbled image
+        buffer = io.BytesIO()
+        figure.savefig(buffer, dpi = dpi, bbox_inches = bbox, format = "png")
+        return Image.open(buffer).convert("RGBA")
+    return Image.frombuffer("RGBA", (width, height), buffer.getbuffer(), "raw", "RGBA", 0, 1)
+
+# The figure of the most recent frame, kept so that the next frame with the same background only has to redraw its data.
+# Only one can be kept at a time, since every style draws onto figure 1.
+basemap_template = {"key":None, "figure":None, "state":None}
+
+def PrepareBasemap(Style, projs : list, map_settings : dict, proj_settings : dict, style_info : dict):
+    '''
+    Provides the styled figure of a frame, with each axis's extent and layers already drawn.
+
+    If the previous frame used the same style, projections, extents, layers, and dpi, its figure is reused with its data removed,
+    so that Cartopy doesn't have to build and project the background's Natural Earth geometries all over again.
+
+    Returns
+    -------
+    StyleFig : FigStyle
+        The prepared figure of the style.
+    '''
+    axes = Style.StyleInfo()["axes"]
+    key = repr((style_info["name"], [proj_settings[axis_num] for axis_num in range(0, axes)], [map_settings[axis_num]["layers"]["selection"] for axis_num in range(0, axes)], map_settings[0]["image dpi"]["selection"]))
+
+    if basemap_template["key"] == key:
+        ResetBasemap(basemap_template["figure"], basemap_template["state"])
+        return basemap_template["figure"]
+
+    ReleaseBasemap()
+
+    StyleFig = Style.StyleTemplate().Prepare(projs)
+
+    for axis_num in range(0, StyleFig.axes):
+        
+        if proj_settings[axis_num]['area']["selection"] != "":
+            extent = amgp.AreaExtent(proj_settings[axis_num]['area']["selection"])
+
+            StyleFig.axis[axis_num].set_extent(extent, crs=ccrs.PlateCarree())
+
+        if projs[axis_num] != None:
+            for layer in map_settings[axis_num]['layers']["selection"]:
+                if layer in map_layers.keys():
+                    AddLayer(StyleFig.axis[axis_num], map_layers[layer])
+
+    basemap_template["key"] = key
+    basemap_template["figure"] = StyleFig
+    basemap_template["state"] = {
+        "figure_children":set(StyleFig.figure.get_children()),
+        "axes":[{
+            "children":set(axis.get_children()),
+            "xlim":axis.get_xlim(),
+            "ylim":axis.get_ylim(),
+            "autoscale":(axis.get_autoscalex_on(), axis.get_autoscaley_on()),
+            "data_lim":(axis.dataLim.frozen(), axis.ignore_existing_data_limits),
+            "subplotspec":axis.get_subplotspec(),
+            "position":(axis.get_position(original = True).frozen(), axis.get_position(original = False).frozen()),
+            "anchor":axis.get_anchor()
+        } for axis in StyleFig.axis]
+    }
+
+    return StyleFig
+
+def ResetBasemap(StyleFig, state : dict):
+    '''
+    Removes everything that was drawn onto a basemap after it was prepared, including any axes (such as colorbars) added to the figure.
+    '''
+    for child in StyleFig.figure.get_children():
+        if child not in state["figure_children"]:
+            if child in StyleFig.figure.axes:
+                StyleFig.figure.delaxes(child)
+            else:
+                child.remove()
+
+    for axis, axis_state in zip(StyleFig.axis, state["axes"]):
+        for child in axis.get_children():
+            if child not in axis_state["children"]:
+                child.remove()
+        axis.dataLim.set(axis_state["data_lim"][0])
+        axis.ignore_existing_data_limits = axis_state["data_lim"][1]
+        axis.set_xlim(axis_state["xlim"])
+        axis.set_ylim(axis_state["ylim"])
+        axis.set_autoscalex_on(axis_state["autoscale"][0])
+        axis.set_autoscaley_on(axis_state["autoscale"][1])
+        # Colorbars shrink the axis they belong to, by moving it into a smaller subplot specification
+        if axis_state["subplotspec"] != None:
+            axis.set_subplotspec(axis_state["subplotspec"])
+        axis.set_position(axis_state["position"][0], which = "original")
+        axis.set_position(axis_state["position"][1], which = "active")
+        axis.set_anchor(axis_state["anchor"])
+
+# The Natural Earth features of each layer option
+map_layers = {
+    "states":cfeat.STATES,
+    "coastlines":cfeat.COASTLINE,
+    "lakes":cfeat.LAKES,
+    "oceans":cfeat.OCEAN,
+    "country borders":cfeat.BORDERS,
+    "rivers":cfeat.RIVERS
+}
+
+def AddLayer(axis, feature):
+    '''
+    Draws a Natural Earth feature onto an axis from paths that have already been projected, clipped, and simplified for it.
+
+    The paths are kept in the "Layers" cache, keyed by the feature, its scale, the projection, and the axis's extent,
+    so that maps of the same area never repeat the Shapely and PROJ work. Drawn the same way cartopy.feature would draw them.
+    '''
+    try:
+        extent = axis.get_extent()
+        feature_extent = axis.get_extent(feature.crs)
+    except ValueError:
+        axis.add_feature(feature)
+        return
+
+    cache = amgp.DataCache("Layers")
+    # The scale of an adaptive feature depends on the extent it's drawn at
+    scale = feature.scaler.scale_from_extent(feature_extent) if hasattr(feature, "scaler") else getattr(feature, "scale", None)
+    key = cache.Key(getattr(feature, "category", None), getattr(feature, "name", None), scale, axis.projection.proj4_init, [round(x, 3) for x in extent])
+
+    paths = cache.GetObject(key)
+    if paths == None:
+        x0, x1, y0, y1 = extent
+        # Padded slightly, so that the edges clipping creates are never within the map, and simplified to well under a pixel
+        pad = max(x1 - x0, y1 - y0) * 0.02
+        bounds = box(x0 - pad, y0 - pad, x1 + pad, y1 + pad)
+        tolerance = max(x1 - x0, y1 - y0) / 5000
+
+        paths = []
+        for geometry in feature.intersecting_geometries(feature_extent):
+            projected = axis.projection.project_geometry(geometry, feature.crs)
+            try:
+                projected = projected.intersection(bounds)
+            except Exception:
+                pass
+            if projected.is_empty:
+                continue
+            path = shapely_to_path(projected.simplify(tolerance, preserve_topology = True))
+            paths.append((path.vertices, path.codes))
+
+        cache.PutObject(key, paths, None, f"{getattr(feature, 'name', 'feature')} ({scale}) for {axis.projection.proj4_init}")
+
+    style = {k: ("none" if (isinstance(v, str) and v == "never") else v) for k, v in feature.kwargs.items()}
+    collection = PathCollection([Path(vertices, codes) for vertices, codes in paths], zorder = 1.5)
+    collection.set(**style)
+    collection.set_clip_path(axis.patch)
+    axis.add_collection(collection, autolim = False)
+
+def ReleaseBasemap():
+    '''
+    Destroys the kept basemap, if there is one.
+    '''
+    if basemap_template["figure"] != None:
+        basemap_template["figure"].Destroy()
+    basemap_template["key"] = None
+    basemap_template["figure"] = None
+    basemap_template["state"] = None
+
+def PortablePackedData(packed_data : dict):
+    '''
+    Swaps the module objects within packed_data for their import paths, so that it can be handed to another process.
+
+    Parameters
+    ----------
+    packed_data : dict
+        Data passed on from AMGP.py, including the imported modules, AMGP version, and program runtime.
+
+    Returns
+    -------
+    portable_data : dict
+        packed_data, with every module replaced by its name.
+    '''
+    portable_data = {}
+    for k, v in packed_data.items():
+        if k in ["util_modules", "data_modules", "menu_modules", "styles"]:
+            portable_data[k] = {x: y.__name__ for x, y in v.items()}
+        else:
+            portable_data[k] = v
+    return portable_data
+
+def UnpackPortableData(portable_data : dict):
+    '''
+    The inverse of PortablePackedData(), importing each module named within portable_data.
+    '''
+    packed_data = {}
+    for k, v in portable_data.items():
+        if k in ["util_modules", "data_modules", "menu_modules", "styles"]:
+            packed_data[k] = {x: import_module(y) for x, y in v.items()}
+        else:
+            packed_data[k] = v
+    return packed_data
+
+def InitWorker(portable_data : dict, time_plans : list):
+    '''
+    Prepares a rendering process; run once by each process of the pool created in Run().
+    '''
+    global worker_data, worker_time_plans
+    plt.switch_backend("Agg")
+    worker_data = UnpackPortableData(portable_data)
+    worker_time_plans = time_plans
+    amgp.SetBroker(amgp.DataBroker())
+
+def RenderFrameInWorker(frame_args : tuple):
+    return RenderFrame(worker_data, worker_time_plans, *frame_args)
+
+def RunBatch(packed_data : dict, presets : list, workers : int = None):
+    '''
+    Runs a list of presets together, fetching each dataset that more than one of them needs only once.
+
+    Every preset is planned first, and the DataRequest() keys of all of their frames gathered up. The datasets shared between presets
+    are then fetched once, several at a time, and handed to each preset that needs them as it's rendered. The presets themselves are
+    rendered in parallel, one per process, with each drawing its own frames serially.
+
+    Parameters
+    ----------
+    packed_data : dict
+        Data passed on from AMGP.py, including the imported modules, AMGP version, and program runtime.
+
+    presets : list
+        The parsed contents of each preset.json file, as returned by amgp.LoadPreset().
+
+    workers : int, optional, defaults to None
+        How many presets may be rendered at once. Defaults to the "batch_workers" setting of config.json, or one per CPU.
+
+    Returns
+    -------
+    paths : list
+        The paths of every image produced by each preset, in the order the presets were given, or None for any that failed.
+    '''
+    runtime = packed_data["runtime"]
+    if presets == []:
+        return []
+
+    requests = {}
+    preset_requests = []
+    for preset in presets:
+        needed = set()
+        try:
+            time_plans, max_times = PlanTimes(packed_data, preset["plotables"], preset["map_settings"], preset["style"])
+            for figure_num in range(1, max_times + 1):
+                for uid, key, data_function, args in FrameRequests(packed_data, time_plans, preset["plotables"], preset["projections"], figure_num):
+                    requests.setdefault((uid, key), (data_function, args))
+                    needed.add((uid, key))
+        except Exception:
+            # Left for the preset itself to run into, and report, once it's rendered
+            pass
+        preset_requests.append(needed)
+
+    shared = [request for request in requests.keys() if sum([request in needed for needed in preset_requests]) > 1]
+    print(f"(AMGP_MAP) <RunBatch()> {len(presets)} presets need {len(requests)} datasets, {len(shared)} of them shared between presets")
+
+    # Held pickled, since that's how they'll be sent to each process anyways
+    shared_data = {}
+    with ThreadPoolExecutor(max_workers = max(1, int(amgp.Config("batch_fetch_threads", 4))), thread_name_prefix = "AMGP_batch") as pool:
+        fetches = {pool.submit(requests[request][0], *requests[request][1]):request for request in shared}
+        for fetch in as_completed(fetches):
+            # Let go of as soon as it's pickled, so that only the pickled copy of each dataset is ever held onto
+            request = fetches.pop(fetch)
+            try:
+                shared_data[request] = pkl.dumps(fetch.result())
+            except BaseException:
+                # Left for each preset that needs it to fetch, and report on, itself
+                continue
+
+    if workers == None:
+        workers = int(amgp.Config("batch_workers", os.cpu_count() or 1))
+    workers = max(1, min(workers, len(presets)))
+
+    paths = [None] * len(presets)
+    with ProcessPoolExecutor(max_workers = workers, mp_context = get_context("spawn"), initializer = InitBatchWorker, initargs = (PortablePackedData(packed_data),)) as pool:
+        jobs = {}
+        for preset_num, preset in enumerate(presets):
+            jobs[pool.submit(RenderBatchPreset, preset, {request:shared_data[request] for request in preset_requests[preset_num] if request in shared_data.keys()})] = preset_num
+        for job in as_completed(jobs):
+            preset_num = jobs[job]
+            try:
+                paths[preset_num] = job.result()
+                print(f"(AMGP_MAP) <RunBatch()> Preset {preset_num + 1} of {len(presets)} finished with {len(paths[preset_num])} images")
+            except Exception as e:
+                amgp.ThrowError("AMGP_MAP", "RunBatch()", 0, f"Preset {preset_num + 1} of {len(presets)} failed: {type(e).__name__}: {e}", runtime, True, False, True)
+    return paths
+
+def InitBatchWorker(portable_data : dict):
+    '''
+    Prepares a process of the pool created in RunBatch().
+    '''
+    global batch_data
+    plt.switch_backend("Agg")
+    batch_data = UnpackPortableData(portable_data)
+
+def RenderBatchPreset(preset : dict, shared_data : dict):
+    '''
+    Renders a single preset of a batch, handing its broker the pickled datasets it shares with other presets.
+    '''
+    # Presets already have a process each, so their frames are drawn serially rather than from yet more processes
+    map_settings = {axis:dict(settings) for axis, settings in preset["map_settings"].items()}
+    map_settings[0]["parallel rendering"] = {"selection":["No"]}
+    try:
+        return Run(batch_data, preset["plotables"], map_settings, preset["projections"], preset["style"], preset["save"], overrides = {"all_paths":True, "shared_data":shared_data})
+    except SystemExit as e:
+        # ThrowError() exits on fatal errors, which would otherwise take the whole process down with the preset
+        raise RuntimeError(f"The preset could not be run: {e}")
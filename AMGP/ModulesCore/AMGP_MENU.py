@@ -22,7 +22,13 @@ import glob
 
 import webbrowser
 
+import queue
+
 from ast import literal_eval
+from multiprocessing import get_context
+from datetime import datetime, timezone
+
+import matplotlib.pyplot as plt
 
 #----------------- AMGP IMPORTS -------------------#
 from ModulesCore import AMGP_UTIL as amgp
@@ -57,6 +63,7 @@ def InitWithInterface(packed_data):
     
 
     amgp.GetPing(data_modules)
+    print(f"(AMGP_MENU) <startup> Started in {(datetime.now(timezone.utc) - runtime).total_seconds():.2f} seconds")
     Start()
 
 def InitWithoutInterface(packed_data, preset_dict):
@@ -68,27 +75,122 @@ def Version():
     return version
 
 def RunFromInterface(selected_plotables, selected_map, selected_projections, selected_style, save_loc):
-    global StatusBox
-    global window
+    global pending_jobs
     #print(literal_eval(selected_plotables.get()))
     #print(literal_eval(selected_map.get()))
-    UpdateStatusBox("Running...")
     if (literal_eval(selected_plotables.get()) != []) and (literal_eval(selected_map.get()) != {}):
         amgp.SavePreset("Previous", "AMGP_MENU", literal_eval(selected_plotables.get()), literal_eval(selected_map.get()), literal_eval(selected_projections.get()), literal_eval(selected_style.get()), save_loc.get())
-        image = amgp.TKIMG(amgpmap.Run(comp_data, literal_eval(selected_plotables.get()), literal_eval(selected_map.get()), literal_eval(selected_projections.get()), literal_eval(selected_style.get()), save_loc.get(), True), (900, 638))
-        for im in glob.glob(f'{os.path.dirname(os.path.realpath(__file__).replace("ModulesCore", "Maps"))}{amgp.PathSep()}Temp{amgp.PathSep()}*'):
-            os.remove(im) # Clean out the temp folder after running, since we've already produced a TKIMG and no longer need to keep the original in the temp folder
-        UpdateStatusBox("Running complete!")
-        UpdatePreviewImage(image)
+        StartRenderProcess()
+        # Runs saved to ./Temp/ are only ever shown in the preview, so their frames are passed back in memory rather than written out
+        render_jobs.put(((literal_eval(selected_plotables.get()), literal_eval(selected_map.get()), literal_eval(selected_projections.get()), literal_eval(selected_style.get()), save_loc.get()), save_loc.get().startswith("./Temp/")))
+        pending_jobs += 1
+        if pending_jobs == 1:
+            UpdateStatusBox("Running...")
+        else:
+            UpdateStatusBox(f"Run queued, {pending_jobs - 1} ahead of it.")
         
     else:
         UpdateStatusBox("Select a style, factors, and map settings before running.")
+
+def CancelFromInterface():
+    if pending_jobs > 0:
+        render_cancel.set()
+        UpdateStatusBox("Cancelling after the current frame...")
+
+# Runs started from the interface are rendered by a separate process, so the window stays responsive while they do
+render_process = None
+render_jobs = None
+render_events = None
+render_cancel = None
+pending_jobs = 0
+
+def StartRenderProcess():
+    """
+    Starts the process runs from the interface are rendered on, if it isn't already running.
+    """
+    global render_process
+    global render_jobs
+    global render_events
+    global render_cancel
+    global pending_jobs
+    if (render_process != None) and render_process.is_alive():
+        return
+    context = get_context("spawn")
+    render_jobs = context.Queue()
+    render_events = context.Queue()
+    render_cancel = context.Event()
+    pending_jobs = 0
+    # Not a daemon, since the parallel rendering option starts processes of its own
+    render_process = context.Process(target = RenderWorker, args = (amgpmap.PortablePackedData(comp_data), render_jobs, render_events, render_cancel))
+    render_process.start()
+    window.after(100, PollRenderEvents)
+
+def StopRenderProcess():
+    if (render_process != None) and render_process.is_alive():
+        render_cancel.set()
+        render_jobs.put(None)
+        render_process.join(10)
+        if render_process.is_alive():
+            render_process.terminate()
+
+def RenderWorker(portable_data : dict, jobs, events, cancel):
+    '''
+    The loop of the rendering process, which runs each queued job in turn and reports back on the events queue as
+    ("frame", figure_num, max_times, path) after every frame, then ("done", None), ("cancelled", None), or ("failed", error).
+    For jobs run in memory, the image of each frame is passed back in place of its path.
+    '''
+    plt.switch_backend("Agg")
+    packed_data = amgpmap.UnpackPortableData(portable_data)
+    while True:
+        job = jobs.get()
+        if job == None:
+            break
+        job, in_memory = job
+        cancel.clear()
+        try:
+            path = amgpmap.Run(packed_data, *job, True, {"progress":lambda figure_num, max_times, path : events.put(("frame", figure_num, max_times, path)), "cancel":cancel, "in_memory":in_memory})
+            events.put(("cancelled" if cancel.is_set() else "done", None))
+        except BaseException as e:
+            # ThrowError() exits on fatal errors, which would otherwise leave the interface waiting on a job that never finishes
+            events.put(("failed", f"{type(e).__name__}: {e}"))
+
+def PollRenderEvents():
+    """
+    Passes the progress of the rendering process on to the interface, rescheduling itself for as long as that process is running.
+    """
+    global pending_jobs
+    while True:
+        try:
+            event = render_events.get_nowait()
+        except queue.Empty:
+            break
+        if event[0] == "frame":
+            UpdateStatusBox(f"Rendered frame {event[1]} of {event[2]}..." + (f"\n{pending_jobs - 1} more runs queued." if pending_jobs > 1 else ""))
+            UpdatePreviewImage(amgp.TKIMG(event[3], (900, 638)))
+            continue
+        pending_jobs -= 1
+        if event[0] == "done":
+            UpdateStatusBox("Running complete!" + (f"\n{pending_jobs} more runs queued." if pending_jobs > 0 else ""))
+        elif event[0] == "cancelled":
+            UpdateStatusBox("Run cancelled." + (f"\n{pending_jobs} more runs queued." if pending_jobs > 0 else ""))
+        else:
+            UpdateStatusBox(f"Run failed: {event[1]}")
+    if render_process.is_alive():
+        window.after(100, PollRenderEvents)
+    elif pending_jobs > 0:
+        pending_jobs = 0
+        UpdateStatusBox("The rendering process stopped unexpectedly.")
         
 def RunWithoutInterface(packed_data, selected_plotables, selected_map, selected_projections, selected_style, save_loc):
     amgpmap.Run(packed_data, selected_plotables, selected_map, selected_projections, selected_style, save_loc)
     for im in glob.glob(f'{os.path.dirname(os.path.realpath(__file__).replace("ModulesCore", "Maps"))}{amgp.PathSep()}Temp{amgp.PathSep()}*'):
         os.remove(im)
 
+def InitBatch(packed_data, presets):
+    amgpmap.RunBatch(packed_data, presets)
+    for im in glob.glob(f'{os.path.dirname(os.path.realpath(__file__).replace("ModulesCore", "Maps"))}{amgp.PathSep()}Temp{amgp.PathSep()}*'):
+        os.remove(im)
+
 def InitPreset(preset_name):
     global selected_plotables
     global selected_map
@@ -330,6 +432,13 @@ def ConfigureMap(master_window, selected_map, selected_style):
             "multiselect": False,
             "selection": None
         },
+        "parallel rendering": {
+            "options": ["No", "Yes"],
+            "description": "Yes tells AMGP to render the figures of a time range side-by-side, one per processor core, rather than one after another.",
+            "default": ["No"],
+            "multiselect": False,
+            "selection": None
+        },
         "figure title": {
             "options": None,
             "description": "The central title of the figure; should be something descriptive, but brief.",
@@ -724,7 +833,7 @@ def ConfigureProjections(master_window, selected_projections, selected_style):
             "default": "",
             "selection": ""
         }
-    }}, {new_axis:current_selection_dict()}, literal_eval(selected_style.get()), "./Temp/", True), (800, 600))))
+    }}, {new_axis:current_selection_dict()}, literal_eval(selected_style.get()), "./Temp/", True, {"in_memory":True}), (800, 600))))
         TestButton.grid(row = (rows*len([k for (k, _) in proj_options.items()])) + 4, column = 0, padx = 5, pady = 5)
 
         ConfirmButton = ttk.Button(proj_config_window_frame2, text = "Submit", command = lambda : confirm())
@@ -760,9 +869,6 @@ def ConfigureProjections(master_window, selected_projections, selected_style):
             image_container = tk.Label(proj_image_frame, image = image, anchor = tk.CENTER)
             image_container.image = image
             image_container.place(relx = 0.5, rely = 0.5, anchor = tk.CENTER)
-
-            for im in glob.glob(f'{os.path.dirname(os.path.realpath(__file__).replace("ModulesCore", "Maps"))}{amgp.PathSep()}Temp{amgp.PathSep()}*'):
-                os.remove(im) # Clean out the temp folder after running, since we've already produced a TKIMG and no longer need to keep the original in the temp folder
     
         def confirm():
             save_current_selection(globals()[f"ProjAxisDropbox"].get(globals()[f"ProjAxisDropbox"].curselection()))
@@ -872,6 +978,7 @@ def UpdatePreviewImage(image):
 
 def quit_program():
     global window
+    StopRenderProcess()
     window.destroy()
     sys.exit()
 
@@ -995,6 +1102,9 @@ def Start():
     StartButton = ttk.Button(window, text = "Run", command = lambda : RunFromInterface(selected_plotables, selected_map, selected_projections, selected_style, save_loc))
     StartButton.grid(row=18, column=1)
 
+    CancelButton = ttk.Button(window, text = "Cancel Run", command = CancelFromInterface)
+    CancelButton.grid(row=19, column=1)
+
     window.grid_rowconfigure([1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20], minsize = 36)
     window.grid_columnconfigure(0, minsize = 900)
     window.grid_columnconfigure(1, minsize = 180)
@@ -0,0 +1,296 @@
+###############################################################
+#                                                             #
+#        The Automated Map Generation Program ( AMGP )        #
+#              © 2022-2025 Samuel Nelson Bailey               #
+#           Distributed under the GPL-3.0 License             #
+#                  Created on Mar 09, 2022                    #
+#                                                             #
+#                 Core Module: AMGP_SERVER.py                 #
+#                     Author: Sam Bailey                      #
+#                 Last Revised: Jun 10, 2025                  #
+#                        Version: 1.0.0                       #
+#                                                             #
+###############################################################
+"""
+AMGP_SERVER
+
+A long-running, headless AMGP that takes preset jobs over a local HTTP endpoint.
+Modules and styles are loaded once, by the server and by each of its rendering
+processes, rather than once per preset.
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from queue import PriorityQueue
+from datetime import datetime, timedelta, timezone
+from itertools import count
+
+import os
+import json
+import signal
+import threading
+import uuid
+
+import matplotlib.pyplot as plt
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesCore import AMGP_UTIL as amgp
+from ModulesCore import AMGP_MAP as amgpmap
+#-----------------  Definitions -------------------#
+
+def Info():
+    return {
+        "name": "AMGP_SERVER",
+        "uid": "00300300"
+    }
+
+class JobServer(object):
+    """
+    Queues preset jobs by priority and renders them on a pool of processes.
+
+    Parameters
+    ----------
+    packed_data : dict
+        Data passed on from AMGP.py, including the imported modules, AMGP version, and program runtime.
+
+    workers : int
+        The number of presets that may be rendered at once.
+
+    retention_minutes : float, optional, defaults to 60
+        How long a finished or failed job's status is kept after it ends.
+
+    max_jobs : int, optional, defaults to 1000
+        The most finished or failed jobs kept at once, past which the oldest are dropped first.
+
+    Methods
+    -------
+    Submit()
+
+    Status()
+
+    Dispatch()
+
+    Prune()
+
+    Shutdown()
+    """
+    def __init__(self, packed_data : dict, workers : int, retention_minutes : float = 60, max_jobs : int = 1000):
+        self.workers = workers
+        self.retention = timedelta(minutes = retention_minutes)
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.queue = PriorityQueue()
+        self.order = count()
+        self.lock = threading.Lock()
+        # Jobs are only handed to the pool once a process is free for them, so a later, more urgent job can still overtake the queue
+        self.slots = threading.Semaphore(workers)
+        self.pool = ProcessPoolExecutor(max_workers = workers, mp_context = get_context("spawn"), initializer = InitServerWorker, initargs = (amgpmap.PortablePackedData(packed_data),))
+        self.dispatcher = threading.Thread(target = self.Dispatch, daemon = True)
+        self.dispatcher.start()
+
+    def Submit(self, preset : dict, priority : int = 10):
+        """
+        Queues a preset to be rendered, where jobs with a lower priority number are rendered first.
+
+        Returns
+        -------
+        job : dict
+            The status of the new job.
+        """
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.Prune()
+            self.jobs[job_id] = {
+                "id":job_id,
+                "status":"queued",
+                "priority":priority,
+                "submitted":datetime.now(timezone.utc).isoformat(),
+                "started":None,
+                "finished":None,
+                "paths":[],
+                "error":None
+            }
+            job = dict(self.jobs[job_id])
+        self.queue.put((priority, next(self.order), job_id, preset))
+        return job
+
+    def Status(self, job_id : str = None):
+        """
+        Returns the status of a single job, None if it doesn't exist, or a list of every job if no job_id is given.
+        """
+        with self.lock:
+            self.Prune()
+            if job_id == None:
+                return [dict(job) for job in self.jobs.values()]
+            if job_id in self.jobs.keys():
+                return dict(self.jobs[job_id])
+        return None
+
+    def Dispatch(self):
+        while True:
+            self.slots.acquire()
+            _, _, job_id, preset = self.queue.get()
+            if job_id == None:
+                break
+            with self.lock:
+                self.jobs[job_id]["status"] = "running"
+                self.jobs[job_id]["started"] = datetime.now(timezone.utc).isoformat()
+            try:
+                future = self.pool.submit(RenderJob, preset)
+            except Exception as e:
+                self.Finish(job_id, None, e)
+                continue
+            future.add_done_callback(lambda future, job_id = job_id: self.Finish(job_id, future))
+
+    def Finish(self, job_id : str, future, error : Exception = None):
+        if (error == None) and future.cancelled():
+            error = RuntimeError("The server shut down before the job could run.")
+        elif (error == None) and (future.exception() != None):
+            error = future.exception()
+        with self.lock:
+            self.jobs[job_id]["finished"] = datetime.now(timezone.utc).isoformat()
+            if error == None:
+                self.jobs[job_id]["status"] = "finished"
+                self.jobs[job_id]["paths"] = future.result()
+            else:
+                self.jobs[job_id]["status"] = "failed"
+                self.jobs[job_id]["error"] = f"{type(error).__name__}: {error}"
+            self.Prune()
+        self.slots.release()
+
+    def Prune(self):
+        """
+        Drops finished and failed jobs once they've been kept longer than the retention period, or once more than max_jobs of them are kept.
+        Queued and running jobs are always kept. Must be called while holding the lock.
+        """
+        now = datetime.now(timezone.utc)
+        ended = sorted([job for job in self.jobs.values() if job["status"] in ["finished", "failed"]], key = lambda job: job["finished"])
+        for num, job in enumerate(ended):
+            if (num < len(ended) - self.max_jobs) or (now - datetime.fromisoformat(job["finished"]) > self.retention):
+                del self.jobs[job["id"]]
+
+    def Shutdown(self):
+        # Sorted after every real job, so the dispatcher stops once it reaches it
+        self.slots.release()
+        self.queue.put((float("inf"), next(self.order), None, None))
+        self.pool.shutdown(wait = True, cancel_futures = True)
+
+def InitServerWorker(portable_data : dict):
+    '''
+    Prepares a rendering process of the server; run once by each process of its pool.
+    '''
+    global server_data
+    # Interrupts are left to the server, which lets running jobs finish before it shuts its processes down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    plt.switch_backend("Agg")
+    server_data = amgpmap.UnpackPortableData(portable_data)
+
+def RenderJob(preset : dict):
+    '''
+    Renders a single preset within a server process, returning the path of every image it produced.
+    '''
+    # Jobs may arrive long after the server started, so each is given its own runtime
+    packed_data = dict(server_data)
+    packed_data["runtime"] = datetime.now(timezone.utc)
+    # Jobs already have a process each, so their frames are drawn serially rather than from yet more processes
+    map_settings = {axis:dict(settings) for axis, settings in preset["map_settings"].items()}
+    map_settings[0]["parallel rendering"] = {"selection":["No"]}
+    try:
+        return amgpmap.Run(packed_data, preset["plotables"], map_settings, preset["projections"], preset["style"], preset["save"], overrides = {"all_paths":True})
+    except SystemExit as e:
+        # ThrowError() exits on fatal errors, which would otherwise take the whole process down with the job
+        raise RuntimeError(f"The preset could not be run: {e}")
+
+class JobHandler(BaseHTTPRequestHandler):
+    '''
+    The HTTP endpoints of the server:
+
+        POST /jobs           Queues a job. The body is a JSON object holding either "preset", the contents of a preset.json file,
+                             or "path", the absolute path to one, along with an optional integer "priority" (lower runs first, defaults to 10).
+        GET  /jobs           Lists every job and its status.
+        GET  /jobs/<id>      The status of a single job, including the paths of its images once it has finished.
+    '''
+    server_version = "AMGP_SERVER"
+
+    def Respond(self, code : int, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        path = self.path.rstrip("/").split("/")
+        if path == ["", "jobs"]:
+            self.Respond(200, self.server.jobs.Status())
+        elif (len(path) == 3) and (path[1] == "jobs"):
+            job = self.server.jobs.Status(path[2])
+            if job == None:
+                self.Respond(404, {"error":f"No job with the id {path[2]} exists."})
+            else:
+                self.Respond(200, job)
+        else:
+            self.Respond(404, {"error":f"{self.path} is not an AMGP_SERVER endpoint."})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            self.Respond(404, {"error":f"{self.path} is not an AMGP_SERVER endpoint."})
+            return
+
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if "preset" in request.keys():
+                preset = amgp.ParsePreset(request["preset"])
+            else:
+                preset = amgp.LoadPreset(request["path"], None)
+            for k in ["plotables", "map_settings", "projections", "style", "save"]:
+                if k not in preset.keys():
+                    raise KeyError(k)
+            priority = int(request.get("priority", 10))
+        except Exception as e:
+            self.Respond(400, {"error":f"The job could not be read: {type(e).__name__}: {e}"})
+            return
+
+        self.Respond(202, self.server.jobs.Submit(preset, priority))
+
+    def log_message(self, format, *args):
+        print(f"(AMGP_SERVER) <request> {self.address_string()} {format % args}")
+
+def Serve(packed_data : dict, port : int = None):
+    '''
+    Runs AMGP as a headless server until it is interrupted.
+
+    The host, port, and number of rendering processes are read from the "server_host", "server_port",
+    and "server_workers" settings of config.json, defaulting to 127.0.0.1, 8460, and one per CPU.
+    How long and how many ended jobs are kept are read from "server_job_retention_minutes" and "server_max_jobs",
+    defaulting to 60 and 1000.
+
+    Parameters
+    ----------
+    packed_data : dict
+        Data passed on from AMGP.py, including the imported modules, AMGP version, and program runtime.
+
+    port : int, optional, defaults to None
+        Overrides the port set within config.json.
+    '''
+    host = amgp.Config("server_host", "127.0.0.1")
+    if port == None:
+        port = int(amgp.Config("server_port", 8460))
+    workers = int(amgp.Config("server_workers", os.cpu_count() or 1))
+
+    jobs = JobServer(packed_data, workers, float(amgp.Config("server_job_retention_minutes", 60)), int(amgp.Config("server_max_jobs", 1000)))
+    server = ThreadingHTTPServer((host, port), JobHandler)
+    server.jobs = jobs
+    # Stopped the same way whether it's interrupted from a terminal or terminated by a service manager
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target = server.shutdown).start())
+    print(f"(AMGP_SERVER) <serve> Listening on http://{host}:{port} with {workers} rendering processes")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("(AMGP_SERVER) <serve> Shutting down, waiting for running jobs to finish")
+        server.server_close()
+        jobs.Shutdown()
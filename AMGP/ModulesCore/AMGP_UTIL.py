@@ -28,7 +28,6 @@ from ModulesCore import AMGP_MENU as amgpmenu
 
 import sys
 import os
-import math
 
 import json
 
@@ -36,72 +35,517 @@ from cartopy import crs as ccrs
 
 from datetime import datetime, timedelta, timezone
 
-from PIL import Image, ImageTk
+from PIL import Image, ImageTk, GifImagePlugin
 
 import pickle as pkl
 
+import ast
+
+from copy import deepcopy
+
+from importlib import import_module
+
+import hashlib
+
+import threading
+
+import sqlite3
+
+from contextlib import closing
+
+from collections import OrderedDict, Counter
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from urllib.parse import urlsplit, urljoin
+from urllib.error import HTTPError
+
+import http.client
+import ssl
+import gzip
+import zlib
+import random
+import time as systime
+import io
+import struct
+import shutil
+import subprocess
+
 import numpy as np
 
 def GetPing(data_modules):
+    # Every module is pinged at once, so that startup only waits as long as the slowest of them. The sources of modules
+    # that list them in Sources() are known from their metadata, so those modules aren't imported just to be pinged
+    sources = {}
+    pings = []
     for module in data_modules.values():
-        module.Ping()
+        if isinstance(module, LazyModule):
+            listed = module.metadata.get("Sources")
+        else:
+            listed = module.Sources() if hasattr(module, "Sources") else None
+        if listed != None:
+            sources[module.Info()["name"]] = listed
+        else:
+            pings.append(module.Ping)
+
+    with ThreadPoolExecutor(max_workers = max(1, len(sources) + len(pings))) as pool:
+        for ping in [pool.submit(PingModule, name, listed) for name, listed in sources.items()] + [pool.submit(ping) for ping in pings]:
+            ping.result()
+
+def PingModule(name : str, sources : dict):
+    """
+    Checks each of a module's sources, as returned by its Sources(), and prints whether it can be reached.
+    """
+    for label, online in zip(sources.keys(), PingSources(list(sources.values()))):
+        print(f"({name}) <ping> {label}: {'online' if online else 'offline'}")
+
+def PingSources(sources : list, timeout : float = 3):
+    """
+    Checks whether each of a module's remote sources can be reached, all at once, recording the results in the source health map.
+
+    Parameters
+    ----------
+    sources : list
+        The URL to check each source with.
+
+    timeout : float, optional, defaults to 3
+        Seconds to wait for each source.
+
+    Returns
+    -------
+    online : list
+        Whether each source could be reached, in the order they're given.
+    """
+    with ThreadPoolExecutor(max_workers = max(1, len(sources))) as pool:
+        return list(pool.map(lambda url: CheckSource(url, timeout), sources))
+
+def CheckSource(url : str, timeout : float = 3):
+    """
+    Requests url once, recording in the source health map whether it answered.
+    """
+    try:
+        HTTPGet(url, timeout, 0)
+        online = True
+    except HTTPError:
+        # The host answered, just not with a page for url itself, so the files within it can still be reached;
+        # only an unreachable host marks a source as offline, the same as when its files are downloaded
+        online = True
+    except Exception:
+        online = False
+    RecordSourceHealth(url, online)
+    return online
+
+# Whether each source was last found online, and when; shared between processes through a file in the cache
+source_health = {"mtime":None, "sources":{}}
+source_health_lock = threading.Lock()
+
+def SourceHealthPath():
+    return f"{CacheRoot()}{PathSep()}source_health.json"
+
+def LoadSourceHealth():
+    # Only read again when another process has written to it since
+    try:
+        mtime = os.path.getmtime(SourceHealthPath())
+    except OSError:
+        return
+    if mtime != source_health["mtime"]:
+        try:
+            with open(SourceHealthPath(), "r") as H:
+                source_health["sources"] = json.load(H)
+            source_health["mtime"] = mtime
+        except (OSError, ValueError):
+            pass
+
+def RecordSourceHealth(url : str, online : bool):
+    """
+    Records whether a source could just be reached, for SourceOnline() to answer from.
+    """
+    with source_health_lock:
+        LoadSourceHealth()
+        source_health["sources"][url] = {"online":online, "checked":datetime.now(timezone.utc).timestamp()}
+        os.makedirs(CacheRoot(), exist_ok = True)
+        tmp = f"{SourceHealthPath()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w") as H:
+                json.dump(source_health["sources"], H)
+            os.replace(tmp, SourceHealthPath())
+            source_health["mtime"] = os.path.getmtime(SourceHealthPath())
+        except OSError:
+            pass
+
+def SourceOnline(url : str):
+    """
+    Whether a source was online when it was last checked, or None if it hasn't been checked within the
+    "source_health_minutes" setting (5 minutes by default), in which case it's worth trying.
+    """
+    with source_health_lock:
+        LoadSourceHealth()
+        entry = source_health["sources"].get(url)
+    if (entry == None) or (datetime.now(timezone.utc).timestamp() - entry["checked"] > float(Config("source_health_minutes", 5)) * 60):
+        return None
+    return entry["online"]
+
+def LocalDirectories():
+    """
+    The root directories of local data listed within AMGP/LDS_Directories.txt, one per line, with lines starting with # ignored.
+    """
+    lds_path = f"{os.path.dirname(os.path.realpath(__file__))}{PathSep()}..{PathSep()}LDS_Directories.txt"
+    if not os.path.isfile(lds_path):
+        return []
+    with open(lds_path) as LDSes:
+        return [line.strip() for line in LDSes if (line.strip() != "") and (not line.startswith("#"))]
 
 def LocalData():
-    #dr = os.path.dirname(os.path.realpath(__file__)).replace("Modules", "LocalData")
-    with open(f"{os.path.dirname(os.path.realpath(__file__))}{PathSep()}..{PathSep()}LDS_Directories.txt") as LDSes:
-        LDF = {}
-        n = 1
-        for line in LDSes:
-            if not line.startswith("#"):
-                dr = line.replace("\n", "")
-                LDFa, n = SearchDir(dr, n)
-                LDF = {**LDF, **LDFa}
-    return LDF
-
-def SearchDir(dir, cur_n=1, cur_LDF={}):
-    LDF = {}
-    n = cur_n
-    for res in os.scandir(dir):
-        if res.is_file():
-            if "%" in res.path:
-                sfile = res.path.split("%")
-                s2file = sfile[1].split(".")[0]
-                LDF[n] = [res.path, s2file.split("+")]
-                n += 1
-        else:
-            if "%" in res.path.split(f"{PathSep()}")[len(res.path.split(f"{PathSep()}"))-1]:
-                check = res.path.split(f"{PathSep()}")[len(res.path.split(f"{PathSep()}"))-1].split("%")
-                checks = check[1].split("+")
-                for afile in os.scandir(res.path):
-                    LDF[n] = [afile.path, checks]
-                    n += 1
+    """
+    Lists every tagged file within the local data directories, updating the local data index first.
+
+    A file is tagged by whatever follows a % in its name, up to its extension, split on +, such as "GFS%gfs+2024010100.nc".
+    Every entry directly within a directory named the same way takes on that directory's tags instead, and isn't searched any further.
+
+    Returns
+    -------
+    LDF : dict
+        [path, tags] lists, numbered from 1 in order of their paths.
+    """
+    index = LocalDataIndex()
+    index.Update(LocalDirectories())
+    return {n:entry for n, entry in enumerate(index.Find(), 1)}
+
+def FindLocalData(tags : list = None, start : datetime = None, end : datetime = None):
+    """
+    Finds the tagged files within the local data directories that carry every one of the given tags, and whose valid time
+    falls between start and end, inclusive, updating the local data index first. See LocalDataIndex.Find().
+    """
+    index = LocalDataIndex()
+    index.Update(LocalDirectories())
+    return index.Find(tags, start, end)
+
+def TagTime(tags : list):
+    """
+    Returns the valid time given by the first tag written as one, or None.
+    Times are written as YYYYmmdd, optionally followed by HH, HHMM, or HHMMSS, which may be separated from the date by an underscore.
+    """
+    for tag in tags:
+        digits = tag[:8] + tag[9:] if (len(tag) > 8) and (tag[8] == "_") else tag
+        if (len(digits) not in [8, 10, 12, 14]) or (not digits.isdigit()):
+            continue
+        try:
+            return datetime(int(digits[0:4]), int(digits[4:6]), int(digits[6:8]), int(digits[8:10] or 0), int(digits[10:12] or 0), int(digits[12:14] or 0))
+        except ValueError:
+            continue
+    return None
+
+def LocalTime(time : datetime):
+    # Valid times are indexed as naive UTC, in ISO format so that they sort the same as text as they do as times
+    if time.tzinfo != None:
+        time = time.astimezone(timezone.utc).replace(tzinfo = None)
+    return time.isoformat()
+
+class LocalDataIndex(object):
+    """
+    A persistent index of the tagged files within the local data directories, kept in an SQLite database at AMGP/Cache/local_data.sqlite.
+
+    The modification time of every directory is kept alongside the files found directly within it. A directory's modification time
+    changes whenever an entry is added to, removed from, or renamed within it, so Update() only has to list the directories whose
+    modification times have changed, rather than walking through every file each time.
+
+    Parameters
+    ----------
+    path : string, optional, defaults to AMGP/Cache/local_data.sqlite
+
+    Methods
+    -------
+    Update()
+
+    Find()
+    """
+    def __init__(self, path : str = None):
+        self.path = f"{CacheRoot()}{PathSep()}local_data.sqlite" if path == None else path
+        os.makedirs(os.path.dirname(self.path), exist_ok = True)
+        with closing(self.Connect()) as db, db:
+            db.execute("CREATE TABLE IF NOT EXISTS directories (path TEXT PRIMARY KEY, parent TEXT, mtime INTEGER, tagged INTEGER)")
+            db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, directory TEXT, tags TEXT, valid_time TEXT)")
+            db.execute("CREATE TABLE IF NOT EXISTS file_tags (path TEXT, tag TEXT)")
+            db.execute("CREATE INDEX IF NOT EXISTS files_directory ON files (directory)")
+            db.execute("CREATE INDEX IF NOT EXISTS files_valid_time ON files (valid_time)")
+            db.execute("CREATE INDEX IF NOT EXISTS file_tags_tag ON file_tags (tag, path)")
+            db.execute("CREATE INDEX IF NOT EXISTS file_tags_path ON file_tags (path)")
+
+    def Connect(self):
+        # Several processes may update the index at once, in which case they wait on each other's writes
+        return sqlite3.connect(self.path, timeout = 60)
+
+    def Update(self, roots : list):
+        """
+        Brings the index up to date with the given root directories, dropping anything indexed from directories that no longer exist or are no longer listed.
+
+        Returns
+        -------
+        scanned : int
+            How many directories had changed, and so had to be listed.
+        """
+        with closing(self.Connect()) as db, db:
+            known = {path:(parent, mtime, tagged) for path, parent, mtime, tagged in db.execute("SELECT path, parent, mtime, tagged FROM directories")}
+            children = {}
+            for path, (parent, _, _) in known.items():
+                children.setdefault(parent, []).append(path)
+
+            seen = set()
+            scanned = 0
+            stack = [(root, None, False) for root in roots]
+            while stack != []:
+                directory, parent, tagged = stack.pop()
+                if directory in seen:
+                    continue
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    if parent == None:
+                        print(f"(AMGP_UTIL) <LocalData()> The local data directory {directory} could not be found, and is skipped")
+                    continue
+                seen.add(directory)
+                if (directory in known.keys()) and (known[directory][1] == mtime) and (bool(known[directory][2]) == tagged):
+                    if not tagged:
+                        stack.extend([(child, directory, known[child][2] == 1) for child in children.get(directory, [])])
+                    continue
+
+                scanned += 1
+                files, subdirectories = self.Scan(directory, tagged)
+                db.execute("DELETE FROM file_tags WHERE path IN (SELECT path FROM files WHERE directory = ?)", (directory,))
+                db.execute("DELETE FROM files WHERE directory = ?", (directory,))
+                db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", [(path, directory, "+".join(tags), LocalTime(valid_time) if (valid_time := TagTime(tags)) != None else None) for path, tags in files])
+                db.executemany("INSERT INTO file_tags VALUES (?, ?)", [(path, tag) for path, tags in files for tag in tags])
+                # A directory changed within the last couple of seconds may change again within the same tick of its clock, so it's left to be listed again next time
+                recent = (systime.time_ns() - mtime) < 2e9
+                db.execute("INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?)", (directory, parent, -1 if recent else mtime, int(tagged)))
+                stack.extend([(subdirectory, directory, "%" in os.path.basename(subdirectory)) for subdirectory in subdirectories])
+
+            gone = [path for path in known.keys() if path not in seen]
+            db.executemany("DELETE FROM file_tags WHERE path IN (SELECT path FROM files WHERE directory = ?)", [(path,) for path in gone])
+            db.executemany("DELETE FROM files WHERE directory = ?", [(path,) for path in gone])
+            db.executemany("DELETE FROM directories WHERE path = ?", [(path,) for path in gone])
+        return scanned
+
+    def Scan(self, directory : str, tagged : bool):
+        """
+        Lists the tagged files directly within a directory, along with the subdirectories to search next.
+        """
+        files = []
+        subdirectories = []
+        if tagged:
+            tags = os.path.basename(directory).split("%")[1].split("+")
+            for res in os.scandir(directory):
+                files.append((res.path, tags))
+            return files, subdirectories
+        for res in os.scandir(directory):
+            if res.is_file():
+                if "%" in res.path:
+                    files.append((res.path, res.path.split("%")[1].split(".")[0].split("+")))
             else:
-                LDFa, non = SearchDir(res.path, n, cur_LDF | LDF)
-                LDF | LDFa
-    return cur_LDF | LDF, n
+                subdirectories.append(res.path)
+        return files, subdirectories
+
+    def Find(self, tags : list = None, start : datetime = None, end : datetime = None):
+        """
+        Looks up indexed files, without updating the index.
+
+        Parameters
+        ----------
+        tags : list, optional, defaults to None
+            Only files carrying every one of these tags are returned.
+
+        start, end : datetime.datetime, optional, default to None
+            Only files whose valid time (see TagTime()) falls within these times, inclusive, are returned.
+            Files without a valid time are left out whenever either is given.
+
+        Returns
+        -------
+        files : list
+            [path, tags] lists, in order of their paths.
+        """
+        query = "SELECT path, tags FROM files"
+        conditions = []
+        parameters = []
+        if (tags != None) and (tags != []):
+            for tag in set(tags):
+                if (start == None) and (end == None):
+                    conditions.append("path IN (SELECT path FROM file_tags WHERE tag = ?)")
+                else:
+                    # Within a range of times, checking the few files within it for each tag beats listing every file with the tag
+                    conditions.append("EXISTS (SELECT 1 FROM file_tags WHERE file_tags.tag = ? AND file_tags.path = files.path)")
+                parameters.append(tag)
+        if start != None:
+            conditions.append("valid_time >= ?")
+            parameters.append(LocalTime(start))
+        if end != None:
+            conditions.append("valid_time <= ?")
+            parameters.append(LocalTime(end))
+        if conditions != []:
+            query += " WHERE " + " AND ".join(conditions)
+        with closing(self.Connect()) as db:
+            return [[path, tags.split("+")] for path, tags in db.execute(query + " ORDER BY path", parameters)]
+
+class AreaRegistry(object):
+    """
+    Every named area AMGP knows of, merged from Resources/amgp_area_definitions.json, Resources/user_area_definitions.json,
+    and MetPy's named areas, in that order of precedence.
+
+    The definition files are only read again once their modification times change, which is checked at most once a second,
+    and the extent of each area selection, zoom suffixes included, is only worked out once; so that resolving the area of
+    every axis of every frame involves neither the filesystem nor any json.
+
+    Methods
+    -------
+    Custom()
+
+    Extent()
+    """
+    def __init__(self):
+        self.files = None
+        self.lock = threading.Lock()
+        self.mtimes = None
+        self.checked = 0
+        self.custom = {}
+        self.metpy = None
+        self.extents = {}
+
+    def Refresh(self):
+        # Called with the lock held
+        now = systime.monotonic()
+        if (self.mtimes != None) and (now - self.checked < 1):
+            return
+        self.checked = now
+        if self.files == None:
+            directory = os.path.dirname(os.path.realpath(__file__)).replace("ModulesCore", "Resources")
+            self.files = [f"{directory}{PathSep()}amgp_area_definitions.json", f"{directory}{PathSep()}user_area_definitions.json"]
+        if not os.path.isfile(self.files[1]):
+            with open(self.files[1], "w+") as F:
+                json.dump({}, F)
+        mtimes = [os.stat(path).st_mtime_ns for path in self.files]
+        if mtimes == self.mtimes:
+            return
+
+        custom = {}
+        # Read in reverse, so that the built-in definitions take precedence over the user's
+        for path in reversed(self.files):
+            with open(path, "r") as J:
+                for code, area in json.load(J).items():
+                    area = area.replace(" ", "").split(",")
+                    custom[code.lower()] = (float(area[0]), float(area[1]), float(area[2]), float(area[3]))
+        self.custom = custom
+        self.extents = {}
+        self.mtimes = mtimes
+
+    def Custom(self, code : str):
+        """
+        Returns the (west, east, south, north) bounds of a custom-defined area, or None if there isn't one by that name.
+        """
+        with self.lock:
+            self.Refresh()
+            return self.custom.get(code.lower())
+
+    def Extent(self, area_name : str):
+        """
+        Returns the extent of an area selection, see AreaExtent().
+        """
+        with self.lock:
+            self.Refresh()
+            area_name = area_name.lower()
+            if area_name in self.extents.keys():
+                return self.extents[area_name]
+
+            code = area_name.replace("+", "").replace("-", "")
+            area = self.custom.get(code)
+            if area == None:
+                if self.metpy == None:
+                    # MetPy's plotting package is slow to import, so it's left until an area actually needs it
+                    from metpy.plots import plot_areas
+                    self.metpy = {name:tuple(narea.bounds) for name, narea in plot_areas.named_areas.items()}
+                area = self.metpy.get(code)
+            if area == None:
+                raise ValueError(f"The area {area_name} is neither a custom-defined area nor one of MetPy's named areas.")
+
+            splitArea = Counter(area_name)
+            factor = (splitArea['+']) - (splitArea['-'])
+            scaleFactor = (1 - 2**-factor)/2
+            west, east, south, north = area
+            newWest = west - (west - east) * scaleFactor
+            newEast = east + (west - east) * scaleFactor
+            newSouth = south - (south - north) * scaleFactor
+            newNorth = north + (south - north) * scaleFactor
+            self.extents[area_name] = (newWest, newEast, newSouth, newNorth)
+            return self.extents[area_name]
+
+area_registry = AreaRegistry()
 
 def CustomAreas(code : str):
-    dr = os.path.dirname(os.path.realpath(__file__)).replace("ModulesCore", "Resources")
-    with open(f"{dr}{PathSep()}amgp_area_definitions.json", "r") as J:
-        file_data = json.load(J)
-        if code in file_data.keys():
-            area = file_data[code].replace(" ", "").split(",")
-            unpacked = (float(area[0]), float(area[1]), float(area[2]), float(area[3]))
-            return unpacked
-        J.close()
-    
-    if not os.path.isfile(f"{dr}{PathSep()}user_area_definitions.json"):
-        with open(f"{dr}{PathSep()}user_area_definitions.json", "w+") as F:
-            json.dump({}, F)
-
-    with open(f"{dr}{PathSep()}user_area_definitions.json", "r") as J:
-        file_data = json.load(J)
-        if code in file_data.keys():
-            area = file_data[code].replace(" ", "").split(",")
-            unpacked = (float(area[0]), float(area[1]), float(area[2]), float(area[3]))
-            return unpacked
-        J.close()
-    return None
+    return area_registry.Custom(code)
+
+def AreaExtent(area_name : str):
+    """
+    Resolves an area selection, including any '+' or '-' zoom suffixes, into the extent it covers.
+
+    Parameters
+    ----------
+    area_name : string
+        The area selection of a projection, such as 'usc' or 'mw++'.
+
+    Returns
+    -------
+    extent : tuple
+        The (west, east, south, north) bounds of the area in degrees, or None if no area is selected.
+    """
+    if area_name == "":
+        return None
+    return area_registry.Extent(area_name)
+
+def DomainBounds(proj_dict):
+    """
+    Finds the latitude/longitude bounding box of everything visible within a projection's area.
+
+    Unlike the area extent itself, this includes the parts of the map that a non-cylindrical
+    projection shows beyond the corners of the extent, so that data subset to it fills the map.
+
+    Parameters
+    ----------
+    proj_dict : dict
+        The settings of a single projection.
+
+    Returns
+    -------
+    bounds : tuple
+        The (west, east, south, north) bounds in degrees, or None if the whole globe may be visible.
+    """
+    extent = AreaExtent(proj_dict["area"]["selection"])
+    proj = ParseProjection(proj_dict)
+    if (extent == None) or (proj == None):
+        return extent
+
+    # Matches how Cartopy sets an extent: the edges of the box are projected, and the map shows their bounding rectangle
+    west, east, south, north = extent
+    edge = np.linspace(0, 1, 64)
+    box_lons = np.concatenate([west + (east - west) * edge, np.full(64, east), east - (east - west) * edge, np.full(64, west)])
+    box_lats = np.concatenate([np.full(64, south), south + (north - south) * edge, np.full(64, north), north - (north - south) * edge])
+    projected = proj.transform_points(ccrs.PlateCarree(), box_lons, box_lats)
+    x0, x1 = np.nanmin(projected[:, 0]), np.nanmax(projected[:, 0])
+    y0, y1 = np.nanmin(projected[:, 1]), np.nanmax(projected[:, 1])
+
+    rect_x = np.concatenate([x0 + (x1 - x0) * edge, np.full(64, x1), x1 - (x1 - x0) * edge, np.full(64, x0)])
+    rect_y = np.concatenate([np.full(64, y0), y0 + (y1 - y0) * edge, np.full(64, y1), y1 - (y1 - y0) * edge])
+    unprojected = ccrs.PlateCarree().transform_points(proj, rect_x, rect_y)
+    if not np.all(np.isfinite(unprojected[:, :2])):
+        return None
+
+    lons, lats = unprojected[:, 0], unprojected[:, 1]
+    bounds = [lons.min(), lons.max(), lats.min(), lats.max()]
+
+    # A pole within the map is never on its edge, but every longitude around it is visible
+    for pole in [90, -90]:
+        px, py = proj.transform_point(0, pole, ccrs.PlateCarree())
+        if np.isfinite(px) and (x0 <= px <= x1) and (y0 <= py <= y1):
+            bounds = [-180.0, 180.0, min(bounds[2], pole), max(bounds[3], pole)]
+
+    return tuple(float(bound) for bound in bounds)
 
 def SavePreset(preset_name, source_module_name, plotables, map_settings, projections, associated_style, save_location):
     dr = os.path.dirname(os.path.realpath(__file__)).replace("ModulesCore", "Presets")
@@ -144,6 +588,12 @@ def LoadPreset(preset_name, source_module_name):
         with open(f"{dr}{PathSep()}{source_module_name}{PathSep()}{preset_name}.json", "r") as J:
             preset_data = json.load(J)
 
+    return ParsePreset(preset_data)
+
+def ParsePreset(preset_data : dict):
+    """
+    Converts the contents of a preset.json file into the form AMGP runs, where each axis is keyed by an integer.
+    """
     return_preset_data = {}
 
     for k, v in preset_data.items():
@@ -178,6 +628,119 @@ def ModuleFromUID(uid, module_list):
         if uid == module.Info()["uid"]:
             return module
 
+class LazyModule(object):
+    """
+    Stands in for an AMGP module or style whose Info(), Factors(), StyleInfo(), and Sources() are known without importing it.
+
+    Those functions answer from the stored metadata, while anything else the module is asked for
+    imports the real module first, so heavy modules are only loaded once a preset actually uses them.
+
+    Parameters
+    ----------
+    import_path : string
+        The module's full import path, such as 'ModulesOfficial.AMGP_OBS'.
+
+    metadata : dict
+        The return values of the module's metadata functions, keyed by function name.
+    """
+    def __init__(self, import_path : str, metadata : dict):
+        self.__name__ = import_path
+        self.metadata = metadata
+        self.module = None
+
+    def __getattr__(self, name):
+        if name in ["__name__", "metadata", "module"]:
+            raise AttributeError(name)
+        if name in self.metadata.keys():
+            return lambda: deepcopy(self.metadata[name])
+        if self.module == None:
+            self.module = import_module(self.__name__)
+        return getattr(self.module, name)
+
+class ModuleIndex(object):
+    """
+    Finds AMGP modules and styles, reading their metadata out of their source code rather than importing them.
+
+    The metadata of each file is kept in a manifest within the cache directory, and only read again once the file changes.
+    Files whose metadata functions don't simply return a literal are imported as they always were.
+
+    Methods
+    -------
+    Load()
+
+    Save()
+    """
+    metadata_functions = ["Info", "Factors", "StyleInfo", "Sources"]
+
+    def __init__(self):
+        self.path = f"{CacheRoot()}{PathSep()}module_manifest.json"
+        self.changed = False
+        try:
+            with open(self.path, "r") as J:
+                self.manifest = json.load(J)
+        except:
+            self.manifest = {}
+
+    def Metadata(self, file_path : str):
+        stat = os.stat(file_path)
+        entry = self.manifest.get(file_path)
+        if (entry != None) and (entry["mtime"] == stat.st_mtime) and (entry["size"] == stat.st_size):
+            return ast.literal_eval(entry["metadata"])
+
+        with open(file_path, "r", encoding = "utf-8") as F:
+            tree = ast.parse(F.read())
+        metadata = {}
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef) and (node.name in self.metadata_functions):
+                try:
+                    if (len(node.body) != 1) or (not isinstance(node.body[0], ast.Return)):
+                        raise ValueError(node.name)
+                    metadata[node.name] = ast.literal_eval(node.body[0].value)
+                except ValueError:
+                    metadata = None
+                    break
+
+        # Stored as its Python literal, since JSON can't hold every literal (tuples, non-string keys) a module may return
+        self.manifest[file_path] = {"mtime":stat.st_mtime, "size":stat.st_size, "metadata":repr(metadata)}
+        self.changed = True
+        return metadata
+
+    def Load(self, directory : str, package : str, name : str):
+        """
+        Parameters
+        ----------
+        directory : string
+            The directory the module is found in.
+
+        package : string
+            The package the module is imported from, such as 'ModulesOfficial'.
+
+        name : string
+            The module's name, without '.py'.
+
+        Returns
+        -------
+        module : amgp.LazyModule or module
+            The module, which is only imported now if its metadata couldn't be read from its source.
+        """
+        try:
+            metadata = self.Metadata(f"{directory}{PathSep()}{name}.py")
+        except (OSError, SyntaxError, ValueError):
+            metadata = None
+        if metadata == None:
+            return import_module(f"{package}.{name}")
+        return LazyModule(f"{package}.{name}", metadata)
+
+    def Save(self):
+        if not self.changed:
+            return
+        os.makedirs(CacheRoot(), exist_ok = True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as J:
+            json.dump(self.manifest, J)
+        os.replace(tmp, self.path)
+        self.changed = False
+
 def AreaDictionary(ret = True):
     if os.path.isfile(f"{os.path.dirname(os.path.realpath(__file__))}{PathSep()}..{PathSep()}config.json"):
         with open(f"{os.path.dirname(os.path.realpath(__file__))}{PathSep()}..{PathSep()}config.json", "r") as cfg:
@@ -189,8 +752,41 @@ def AreaDictionary(ret = True):
         if ret:
             return area_dictionary
         
-def ImgResize(image_path : str, target_dim : tuple):
-    preview_image = Image.open(image_path).convert("RGBA")
+# config.json as it was last read, and the modification time and size it had then
+config_cache = {"stamp":None, "config":{}}
+config_lock = threading.Lock()
+
+def Config(setting : str, default = None):
+    """
+    Reads a single setting from AMGP's optional config.json, falling back to the given default.
+
+    Parameters
+    ----------
+    setting : string
+        The top-level key within config.json.
+
+    default : any, optional, defaults to None
+        Returned when config.json or the setting doesn't exist.
+    """
+    cfg_path = f"{os.path.dirname(os.path.realpath(__file__))}{PathSep()}..{PathSep()}config.json"
+    # Settings are read often, even per frame, so the file is only parsed again once it has been edited
+    try:
+        stat = os.stat(cfg_path)
+    except OSError:
+        return default
+    with config_lock:
+        if (stat.st_mtime_ns, stat.st_size) != config_cache["stamp"]:
+            with open(cfg_path, "r") as cfg:
+                config_cache["config"] = json.load(cfg)
+            config_cache["stamp"] = (stat.st_mtime_ns, stat.st_size)
+        config = config_cache["config"]
+    if setting in config.keys():
+        return config[setting]
+    return default
+
+def ImgResize(image_path, target_dim : tuple):
+    # Either the path to an image, or an image already in memory
+    preview_image = (image_path if isinstance(image_path, Image.Image) else Image.open(image_path)).convert("RGBA")
 
     w, h = preview_image.size
     i_ratio = w / h
@@ -217,48 +813,787 @@ def ImgResize(image_path : str, target_dim : tuple):
 
     return preview_image
 
-def Water(fig_path : str, location : str):
+# The logo of each watermark already scaled and faded for it, by figure size and location, along with where it goes and its opacity
+watermarks = OrderedDict()
+
+def Watermark(fig_size : tuple, location : str):
+    key = (fig_size, location.lower().replace(" ", ""))
+    if key in watermarks.keys():
+        watermarks.move_to_end(key)
+        return watermarks[key]
+
     wm_str = f'{os.path.dirname(os.path.realpath(__file__)).replace("ModulesCore", "Resources")}{PathSep()}logo.png'
-    fig = Image.open(fig_path)
-    fig_width, fig_height = fig.size
-    if location.lower() in ["c", "center"]:
+    fig_width, fig_height = fig_size
+    if key[1] in ["c", "center"]:
         opacity = 0.08
         wm = ImgResize(wm_str, (fig_width * 0.8, fig_height * 0.8))
-        bands = list(wm.split())
-        if len(bands) == 4:
-            bands[3] = bands[3].point(lambda x: x*opacity)
-        wm = Image.merge(wm.mode, bands)
-        wm_width, wm_height = wm.size
-        left = int((fig_width-wm_width) / 2)
-        top = int((fig_height-wm_height) / 2)
-        fig.paste(wm, (left, top), wm)
-        bands2 = list(fig.split())
-        if len(bands2) == 4:
-            bands2[3] = bands2[3].point(lambda x: x*(1/opacity))
-        fig = Image.merge(fig.mode, bands2)
-    elif location.lower().replace(" ", "") in ["sw", "southwest", "bottomleft"]:
+    elif key[1] in ["sw", "southwest", "bottomleft"]:
         opacity = 0.8
         wm = ImgResize(wm_str, (fig_width * 0.15, fig_height * 0.15))
-        bands = list(wm.split())
-        if len(bands) == 4:
-            bands[3] = bands[3].point(lambda x: x*opacity)
-        wm = Image.merge(wm.mode, bands)
-        wm_width, wm_height = wm.size
-        left = int(fig_width/40)
-        top = int(fig_height - ((fig_height / 40) * 7))
-        fig.paste(wm, (left, top), wm)
+    else:
+        return None
+    bands = list(wm.split())
+    if len(bands) == 4:
+        bands[3] = bands[3].point(lambda x: x*opacity)
+    wm = Image.merge(wm.mode, bands)
+    wm_width, wm_height = wm.size
+    if key[1] in ["c", "center"]:
+        position = (int((fig_width-wm_width) / 2), int((fig_height-wm_height) / 2))
+    else:
+        position = (int(fig_width/40), int(fig_height - ((fig_height / 40) * 7)))
+
+    watermarks[key] = (wm, position, opacity)
+    if len(watermarks) > 8:
+        watermarks.popitem(last = False)
+    return watermarks[key]
+
+def Water(fig_path, location : str):
+    fig = fig_path if isinstance(fig_path, Image.Image) else Image.open(fig_path)
+    watermark = Watermark(fig.size, location)
+    if watermark != None:
+        wm, position, opacity = watermark
+        fig.paste(wm, position, wm)
         bands2 = list(fig.split())
         if len(bands2) == 4:
             bands2[3] = bands2[3].point(lambda x: x*(1/opacity))
         fig = Image.merge(fig.mode, bands2)
 
-
     return fig
 
-def TKIMG(image_path : str, target_dim : tuple):
+def TKIMG(image_path, target_dim : tuple):
     tkimg_file = ImageTk.PhotoImage(ImgResize(image_path, target_dim))
     return tkimg_file
 
+# The extensions of save locations that are written as a single animation rather than as a PNG per frame
+animation_formats = [".gif", ".apng", ".mp4"]
+
+class AnimationWriter(object):
+    """
+    Writes the frames of a run into a single animation as they're made, so that no frame has to be kept once it's been added.
+
+    GIFs and APNGs are encoded by Pillow a frame at a time. MP4s are piped to ffmpeg, which must be installed,
+    or set by the "ffmpeg" setting of config.json.
+
+    Parameters
+    ----------
+    path : string
+        Where the animation should be saved. The format is taken from its extension, one of animation_formats.
+
+    frame_duration : int, optional, defaults to None
+        How long each frame is shown for, in milliseconds. Defaults to the "animation_frame_duration" setting of config.json, or 500.
+
+    Methods
+    -------
+    Add()
+
+    Close()
+    """
+    def __init__(self, path : str, frame_duration : int = None):
+        self.path = path
+        self.format = os.path.splitext(path)[1].lower()
+        if self.format not in animation_formats:
+            raise ValueError(f"{path} is not one of the animation formats {', '.join(animation_formats)}.")
+        if frame_duration == None:
+            frame_duration = int(Config("animation_frame_duration", 500))
+        self.frame_duration = max(10, frame_duration)
+        self.frames = 0
+        self.size = None
+        self.file = None
+        self.process = None
+        if self.format == ".mp4":
+            self.ffmpeg = shutil.which(Config("ffmpeg", "ffmpeg"))
+            if self.ffmpeg == None:
+                raise FileNotFoundError("MP4 animations are encoded by ffmpeg, which could not be found. Install it, or set its path as \"ffmpeg\" within config.json.")
+
+    def Add(self, image):
+        """
+        Appends a frame, given as a PIL image or the path to one.
+
+        Every frame is fitted to the size of the first, centered on a white background, since the frames of an animation can't differ in size.
+        """
+        frame = (image if isinstance(image, Image.Image) else Image.open(image)).convert("RGBA")
+        if self.size == None:
+            self.size = frame.size
+        elif frame.size != self.size:
+            fitted = Image.new("RGBA", self.size, (255, 255, 255, 255))
+            fitted.paste(frame, ((self.size[0] - frame.size[0]) // 2, (self.size[1] - frame.size[1]) // 2))
+            frame = fitted
+
+        if self.format == ".gif":
+            self.AddGIF(frame)
+        elif self.format == ".apng":
+            self.AddAPNG(frame)
+        else:
+            self.AddMP4(frame)
+        self.frames += 1
+
+    def AddGIF(self, frame):
+        # Each frame carries its own palette, so a map's colors don't have to share 256 entries with every other frame's
+        frame = frame.convert("RGB").quantize(256)
+        if self.file == None:
+            self.file = open(self.path, "wb")
+            header, _ = GifImagePlugin.getheader(frame, info = {"loop":0, "duration":self.frame_duration})
+            self.file.write(b"".join(header))
+        self.file.write(b"".join(GifImagePlugin.getdata(frame, duration = self.frame_duration, include_color_table = True)))
+
+    def AddAPNG(self, frame):
+        # Each frame is encoded as a PNG of its own, whose image data is then moved into the animation as that frame
+        encoded = io.BytesIO()
+        frame.save(encoded, format = "PNG")
+        chunks = PNGChunks(encoded.getvalue())
+        if self.file == None:
+            self.file = open(self.path, "wb")
+            self.file.write(b"\x89PNG\r\n\x1a\n")
+            self.WriteChunk(b"IHDR", dict(chunks)[b"IHDR"])
+            # The frame count is written once the animation is closed and it's known
+            self.actl_offset = self.file.tell()
+            self.WriteChunk(b"acTL", struct.pack(">II", 0, 0))
+            self.sequence = 0
+        self.WriteChunk(b"fcTL", struct.pack(">IIIIIHHBB", self.sequence, self.size[0], self.size[1], 0, 0, self.frame_duration, 1000, 0, 0))
+        self.sequence += 1
+        for name, data in chunks:
+            if name == b"IDAT":
+                if self.frames == 0:
+                    self.WriteChunk(b"IDAT", data)
+                else:
+                    self.WriteChunk(b"fdAT", struct.pack(">I", self.sequence) + data)
+                    self.sequence += 1
+
+    def AddMP4(self, frame):
+        if self.process == None:
+            # H.264 can only encode even dimensions, so a row or column of white is added where needed
+            self.process = subprocess.Popen([self.ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{self.size[0]}x{self.size[1]}",
+                "-framerate", f"{1000 / self.frame_duration}", "-i", "-", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2:color=white",
+                "-c:v", "libx264", "-pix_fmt", "yuv420p", "-movflags", "+faststart", self.path], stdin = subprocess.PIPE)
+        self.process.stdin.write(frame.tobytes())
+
+    def WriteChunk(self, name : bytes, data : bytes):
+        self.file.write(struct.pack(">I", len(data)) + name + data + struct.pack(">I", zlib.crc32(name + data)))
+
+    def Close(self):
+        """
+        Finishes the animation, returning its path, or None if no frames were added.
+        """
+        if self.frames == 0:
+            return None
+        if self.format == ".mp4":
+            self.process.stdin.close()
+            if self.process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to encode {self.path}.")
+        else:
+            if self.format == ".gif":
+                self.file.write(b";")
+            else:
+                self.WriteChunk(b"IEND", b"")
+                self.file.seek(self.actl_offset)
+                self.WriteChunk(b"acTL", struct.pack(">II", self.frames, 0))
+            self.file.close()
+        return self.path
+
+def PNGChunks(png : bytes):
+    """
+    Splits an encoded PNG into a list of its (name, data) chunks.
+    """
+    chunks = []
+    offset = 8
+    while offset < len(png):
+        length, = struct.unpack(">I", png[offset:offset + 4])
+        chunks.append((png[offset + 4:offset + 8], png[offset + 8:offset + 8 + length]))
+        offset += length + 12
+    return chunks
+
+# Data older than this is treated as archived and never expires from the cache;
+# anything newer may still be filling in upstream, and so is only kept for a short while.
+cache_archive_age = timedelta(days = 2)
+cache_recent_ttl = timedelta(minutes = 10)
+
+def CacheTTL(valid_time : datetime):
+    """
+    Decides how long data valid at the given time may be cached for.
+
+    Parameters
+    ----------
+    valid_time : datetime.datetime
+        The time the data is valid for. Naive datetimes are assumed to be in UTC.
+
+    Returns
+    -------
+    ttl : datetime.timedelta or None
+        None means the data is an archive, and never expires.
+    """
+    if valid_time.tzinfo == None:
+        valid_time = valid_time.replace(tzinfo = timezone.utc)
+    if datetime.now(timezone.utc) - valid_time > cache_archive_age:
+        return None
+    return cache_recent_ttl
+
+class DataCache(object):
+    """
+    A persistent, size-limited cache of raw downloads and parsed data, stored under AMGP/Cache/<name>.
+
+    Each entry is addressed by a hash of whatever identifies it (typically the source URL and valid time), and
+    is stored as a payload file next to a small json file describing it. Payload modification times double as
+    last-access times, so that the least-recently-used entries are the ones evicted once the cache grows past
+    its size limit.
+
+    Parameters
+    ----------
+    name : string
+        The subdirectory of AMGP/Cache this cache lives in.
+
+    max_megabytes : float, optional
+        The size the cache is trimmed back to; defaults to the "cache_max_megabytes" setting in config.json, or 2048.
+
+    Methods
+    -------
+    Key()
+
+    Get()
+
+    Put()
+
+    GetObject()
+
+    PutObject()
+
+    Inspect()
+
+    Clear()
+    """
+    def __init__(self, name : str, max_megabytes : float = None):
+        self.name = name
+        self.directory = f"{CacheRoot()}{PathSep()}{name}"
+        if max_megabytes == None:
+            max_megabytes = Config("cache_max_megabytes", 2048)
+        self.max_bytes = int(max_megabytes * 1024 * 1024)
+        os.makedirs(self.directory, exist_ok = True)
+
+    def Key(self, *parts):
+        """
+        Hashes any number of identifying values (URLs, datetimes, option strings) into an entry key.
+        """
+        return hashlib.sha256("|".join([str(part) for part in parts]).encode("utf-8")).hexdigest()
+
+    def Get(self, key : str):
+        """
+        Returns the payload stored under key as bytes, or None if there isn't one or it has expired.
+        """
+        payload_path = f"{self.directory}{PathSep()}{key}.bin"
+        meta_path = f"{self.directory}{PathSep()}{key}.json"
+        try:
+            with open(meta_path, "r") as M:
+                meta = json.load(M)
+            if (meta["expires"] != None) and (datetime.now(timezone.utc).timestamp() > meta["expires"]):
+                self.Remove(key)
+                return None
+            with open(payload_path, "rb") as P:
+                payload = P.read()
+            os.utime(payload_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return payload
+
+    def Put(self, key : str, payload : bytes, ttl : timedelta = None, source : str = ""):
+        """
+        Stores payload under key, replacing anything already there.
+
+        Parameters
+        ----------
+        key : string
+            The output of Key().
+
+        payload : bytes
+
+        ttl : datetime.timedelta, optional, defaults to None
+            How long the entry stays valid; None keeps it until it is evicted or cleared.
+
+        source : string, optional
+            A description of where the payload came from, shown by Inspect().
+        """
+        now = datetime.now(timezone.utc).timestamp()
+        meta = {"source":source, "created":now, "expires":None if ttl == None else now + ttl.total_seconds(), "size":len(payload)}
+        # Written under a unique name first and then swapped into place, so that other processes never read half an entry
+        tmp = f"{os.getpid()}-{id(payload)}.tmp"
+        with open(f"{self.directory}{PathSep()}{key}.bin{tmp}", "wb") as P:
+            P.write(payload)
+        with open(f"{self.directory}{PathSep()}{key}.json{tmp}", "w") as M:
+            json.dump(meta, M)
+        os.replace(f"{self.directory}{PathSep()}{key}.bin{tmp}", f"{self.directory}{PathSep()}{key}.bin")
+        os.replace(f"{self.directory}{PathSep()}{key}.json{tmp}", f"{self.directory}{PathSep()}{key}.json")
+        self.Evict()
+
+    def GetObject(self, key : str):
+        """
+        Get(), for entries stored with PutObject().
+        """
+        payload = self.Get(key)
+        if payload == None:
+            return None
+        try:
+            return pkl.loads(payload)
+        except Exception:
+            self.Remove(key)
+            return None
+
+    def PutObject(self, key : str, obj, ttl : timedelta = None, source : str = ""):
+        """
+        Put(), for any picklable object, such as a parsed DataFrame.
+        """
+        self.Put(key, pkl.dumps(obj), ttl, source)
+
+    def Remove(self, key : str):
+        for ext in [".bin", ".json"]:
+            try:
+                os.remove(f"{self.directory}{PathSep()}{key}{ext}")
+            except OSError:
+                pass
+
+    def Inspect(self):
+        """
+        Lists every entry in the cache, most recently used first.
+
+        Returns
+        -------
+        entries : list
+            A list of dicts, each holding the key, source, size in bytes, creation, expiry, and last access of an entry.
+        """
+        entries = []
+        for res in os.scandir(self.directory):
+            if res.name.endswith(".json"):
+                key = res.name[:-5]
+                try:
+                    with open(res.path, "r") as M:
+                        meta = json.load(M)
+                    meta["key"] = key
+                    meta["last_access"] = os.path.getmtime(f"{self.directory}{PathSep()}{key}.bin")
+                except (OSError, ValueError):
+                    continue
+                entries.append(meta)
+        return sorted(entries, key = lambda entry: entry["last_access"], reverse = True)
+
+    def Clear(self):
+        """
+        Removes every entry in the cache.
+        """
+        for res in os.scandir(self.directory):
+            try:
+                os.remove(res.path)
+            except OSError:
+                pass
+
+    def Evict(self):
+        """
+        Drops the least-recently-used entries until the cache fits within its size limit.
+        Expired entries are dropped as they are found by Get().
+        """
+        payloads = []
+        for res in os.scandir(self.directory):
+            if res.name.endswith(".bin"):
+                # Other threads and processes remove entries too, so any may have vanished since the directory was listed
+                try:
+                    stat = res.stat()
+                except OSError:
+                    continue
+                payloads.append((stat.st_mtime, stat.st_size, res.name[:-4]))
+        total = sum([size for _, size, _ in payloads])
+        for _, size, key in sorted(payloads):
+            if total <= self.max_bytes:
+                break
+            self.Remove(key)
+            total -= size
+
+def CacheRoot():
+    return os.path.dirname(os.path.realpath(__file__)).replace("ModulesCore", "Cache")
+
+def StoreRoot():
+    """
+    The root directory of the local data stores that modules build up from their remote sources (AMGP/Stores).
+    """
+    return os.path.dirname(os.path.realpath(__file__)).replace("ModulesCore", "Stores")
+
+def ListCaches():
+    """
+    Returns a DataCache for every cache that currently exists under AMGP/Cache.
+    """
+    if not os.path.isdir(CacheRoot()):
+        return []
+    return [DataCache(res.name) for res in os.scandir(CacheRoot()) if res.is_dir()]
+
+def CachedDownload(url : str, valid_time : datetime, cache_name : str = "Raw"):
+    """
+    Downloads the file at url, unless a still-valid copy of it is already in the cache.
+
+    Parameters
+    ----------
+    url : string
+
+    valid_time : datetime.datetime
+        The time the data within the file is valid for; only decides how long the download is cached for, since
+        a file such as a day of an archive holds many valid times, but should only ever be cached once.
+
+    cache_name : string, optional, defaults to "Raw"
+
+    Returns
+    -------
+    payload : bytes
+    """
+    cache = DataCache(cache_name)
+    key = cache.Key(url)
+    payload = cache.Get(key)
+    if payload == None:
+        payload = HTTPGet(url)
+        cache.Put(key, payload, CacheTTL(valid_time), url)
+    return payload
+
+class HTTPTransport(object):
+    """
+    Fetches over HTTP(S), keeping connections to each host open between requests, asking for compressed responses,
+    and retrying failed requests after a jittered backoff.
+
+    Parameters
+    ----------
+    timeout : float, optional, defaults to the "http_timeout" setting, or 30
+        Seconds to wait for a connection or for data before a request fails.
+
+    retries : int, optional, defaults to the "http_retries" setting, or 3
+        How many times a request is tried again after a connection error or a 429 or 5xx response.
+
+    backoff : float, optional, defaults to the "http_backoff" setting, or 0.5
+        Seconds waited before the first retry, doubling with each retry after it.
+
+    max_idle : int, optional, defaults to 4
+        How many idle connections are kept open to each host.
+
+    Methods
+    -------
+    Get()
+
+    Head()
+
+    Stats()
+    """
+    retry_statuses = [429, 500, 502, 503, 504]
+    redirect_statuses = [301, 302, 303, 307, 308]
+
+    def __init__(self, timeout : float = None, retries : int = None, backoff : float = None, max_idle : int = 4):
+        self.timeout = float(Config("http_timeout", 30)) if timeout == None else timeout
+        self.retries = int(Config("http_retries", 3)) if retries == None else retries
+        self.backoff = float(Config("http_backoff", 0.5)) if backoff == None else backoff
+        self.max_idle = max_idle
+        self.idle = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.context = ssl.create_default_context()
+
+    def Get(self, url : str, timeout : float = None, retries : int = None, max_redirects : int = 5):
+        """
+        Returns the decompressed body of url, following redirects.
+
+        Raises urllib.error.HTTPError for a response that isn't successful after any retries, and OSError or
+        http.client.HTTPException if the host couldn't be reached, the same as urllib.request.urlopen() would.
+        """
+        timeout = self.timeout if timeout == None else timeout
+        retries = self.retries if retries == None else retries
+        for _ in range(0, max_redirects + 1):
+            status, headers, body = self.Request(url, timeout, retries)
+            if (status in self.redirect_statuses) and (headers.get("Location") != None):
+                url = urljoin(url, headers.get("Location"))
+                continue
+            if status >= 400:
+                raise HTTPError(url, status, http.client.responses.get(status, ""), headers, None)
+            return body
+        raise HTTPError(url, status, "Too many redirects", headers, None)
+
+    def Head(self, url : str, timeout : float = None, retries : int = None, max_redirects : int = 5):
+        """
+        Returns the headers of url without its body, following redirects. Raises the same errors as Get().
+        """
+        timeout = self.timeout if timeout == None else timeout
+        retries = self.retries if retries == None else retries
+        for _ in range(0, max_redirects + 1):
+            status, headers, _ = self.Request(url, timeout, retries, "HEAD")
+            if (status in self.redirect_statuses) and (headers.get("Location") != None):
+                url = urljoin(url, headers.get("Location"))
+                continue
+            if status >= 400:
+                raise HTTPError(url, status, http.client.responses.get(status, ""), headers, None)
+            return headers
+        raise HTTPError(url, status, "Too many redirects", headers, None)
+
+    def Request(self, url : str, timeout : float, retries : int, method : str = "GET"):
+        parts = urlsplit(url)
+        host = (parts.scheme, parts.hostname, parts.port)
+        target = parts.path or "/"
+        if parts.query:
+            target += f"?{parts.query}"
+
+        attempt = 0
+        while True:
+            connection, reused = self.Checkout(host, timeout)
+            start = systime.perf_counter()
+            try:
+                connection.request(method, target, headers = {"Host":parts.netloc, "Accept-Encoding":"gzip, deflate", "Connection":"keep-alive", "User-Agent":"AMGP"})
+                response = connection.getresponse()
+                raw = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                # A kept-alive connection may have been closed by the host while it sat idle, which is worth one immediate retry on a fresh one
+                if reused:
+                    continue
+                self.Record(host, start, 0, False)
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                self.Wait(attempt)
+                continue
+
+            self.Record(host, start, len(raw), response.status < 400)
+            if response.will_close:
+                connection.close()
+            else:
+                self.Checkin(host, connection)
+
+            if (response.status in self.retry_statuses) and (attempt < retries):
+                attempt += 1
+                self.Wait(attempt, response.getheader("Retry-After"))
+                continue
+            return response.status, response.headers, self.Decode(raw, response.getheader("Content-Encoding", ""))
+
+    def Checkout(self, host : tuple, timeout : float):
+        with self.lock:
+            idle = self.idle.get(host, [])
+            if idle != []:
+                connection = idle.pop()
+                connection.timeout = timeout
+                if connection.sock != None:
+                    connection.sock.settimeout(timeout)
+                return connection, True
+        scheme, hostname, port = host
+        if scheme == "https":
+            return http.client.HTTPSConnection(hostname, port, timeout = timeout, context = self.context), False
+        return http.client.HTTPConnection(hostname, port, timeout = timeout), False
+
+    def Checkin(self, host : tuple, connection):
+        with self.lock:
+            idle = self.idle.setdefault(host, [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def Wait(self, attempt : int, retry_after : str = None):
+        # Jittered, so that many requests failing together don't all retry together
+        delay = self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+        if (retry_after != None) and retry_after.strip().isdigit():
+            delay = max(delay, min(float(retry_after), 60))
+        systime.sleep(delay)
+
+    def Decode(self, raw : bytes, encoding : str):
+        encoding = encoding.strip().lower()
+        if encoding == "gzip":
+            return gzip.decompress(raw)
+        if encoding == "deflate":
+            # Some hosts send a zlib stream as "deflate" as the standard says, others send it without the zlib header
+            try:
+                return zlib.decompress(raw)
+            except zlib.error:
+                return zlib.decompress(raw, -zlib.MAX_WBITS)
+        return raw
+
+    def Record(self, host : tuple, start : float, size : int, succeeded : bool):
+        with self.lock:
+            stats = self.stats.setdefault(f"{host[0]}://{host[1]}" + (f":{host[2]}" if host[2] != None else ""), {"requests":0, "failures":0, "bytes":0, "seconds":0.0})
+            stats["requests"] += 1
+            stats["failures"] += 0 if succeeded else 1
+            stats["bytes"] += size
+            stats["seconds"] += systime.perf_counter() - start
+
+    def Stats(self):
+        """
+        Returns the number of requests, failed requests, bytes received (before decompression), and seconds spent on requests, for each host.
+        """
+        with self.lock:
+            return {host:dict(stats) for host, stats in self.stats.items()}
+
+http_transport = None
+http_transport_lock = threading.Lock()
+
+def Transport():
+    """
+    The HTTPTransport shared by everything within this process.
+    """
+    global http_transport
+    with http_transport_lock:
+        if http_transport == None:
+            http_transport = HTTPTransport()
+        return http_transport
+
+def HTTPGet(url : str, timeout : float = None, retries : int = None):
+    """
+    Returns the body of url, fetched through the shared HTTPTransport. See HTTPTransport.Get().
+    """
+    return Transport().Get(url, timeout, retries)
+
+def SourceFingerprint(url : str, timeout : float = 5):
+    """
+    Identifies the current version of the file at url from its ETag or Last-Modified header, without downloading it.
+
+    Returns
+    -------
+    fingerprint : string or None
+        None if the host doesn't send either header, or couldn't be reached.
+    """
+    try:
+        headers = Transport().Head(url, timeout, 0)
+    except (OSError, http.client.HTTPException):
+        return None
+    if headers.get("ETag") != None:
+        return f"etag:{headers.get('ETag')}"
+    if headers.get("Last-Modified") != None:
+        return f"modified:{headers.get('Last-Modified')}"
+    return None
+
+class DataBroker(object):
+    """
+    Hands out the results of data module Data() calls, making each unique call only once per run.
+
+    Plotables sharing a dataset (two factors from one source on the same axis, or the same factor on several axes)
+    would otherwise each download and parse it themselves. Modules opt in by defining DataRequest(), which names
+    the dataset a plotable needs, and by fetching it through BrokeredData() from within their Plot().
+
+    Parameters
+    ----------
+    max_entries : int, optional, defaults to 32
+        How many results are held at once; the least-recently-used are let go beyond this.
+
+    prefetch_threads : int, optional, defaults to 0
+        How many datasets may be fetched in the background by Prefetch() at once. With none, Prefetch() does nothing.
+
+    shared : dict, optional, defaults to None
+        Pickled datasets already fetched elsewhere, such as by another process, keyed by (uid, key). Each is used
+        in place of calling data_function, and is only unpickled once it's asked for, so that it's held to the same
+        limits as anything fetched here.
+
+    Methods
+    -------
+    Get()
+
+    Prefetch()
+
+    Close()
+    """
+    def __init__(self, max_entries : int = 32, prefetch_threads : int = 0, shared : dict = None):
+        self.max_entries = max_entries
+        self.shared = {} if shared == None else dict(shared)
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers = prefetch_threads, thread_name_prefix = "AMGP_prefetch") if prefetch_threads > 0 else None
+
+    def Get(self, uid : str, key, data_function, args : tuple):
+        """
+        Returns data_function(*args), calling it only if no result for (uid, key) is held or being fetched already.
+
+        Parameters
+        ----------
+        uid : string
+            The uid of the module the dataset comes from.
+
+        key : hashable
+            Identifies the dataset within the module, such as its source and valid time.
+
+        data_function : function
+            Typically the module's Data() function.
+
+        args : tuple
+            The arguments for data_function.
+        """
+        with self.lock:
+            result = self.results.get((uid, key))
+            owner = result == None
+            if owner:
+                result = Future()
+                self.results[(uid, key)] = result
+                while len(self.results) > self.max_entries:
+                    self.results.popitem(last = False)
+            else:
+                self.results.move_to_end((uid, key))
+
+        if owner:
+            self.Fetch(uid, key, data_function, args, result)
+
+        return result.result()
+
+    def Prefetch(self, uid : str, key, data_function, args : tuple):
+        """
+        Starts data_function(*args) in the background if no result for (uid, key) is held or being fetched already,
+        so that the Get() that later asks for it only has to wait for whatever of it is left. Takes the same arguments as Get().
+        """
+        if self.pool == None:
+            return
+        with self.lock:
+            if (uid, key) in self.results.keys():
+                return
+            result = Future()
+            self.results[(uid, key)] = result
+            while len(self.results) > self.max_entries:
+                self.results.popitem(last = False)
+        self.pool.submit(self.Fetch, uid, key, data_function, args, result)
+
+    def Fetch(self, uid : str, key, data_function, args : tuple, result : Future):
+        try:
+            # A shared dataset is let go of once it's been unpickled, leaving only the result to hold it
+            with self.lock:
+                shared = self.shared.pop((uid, key), None)
+            result.set_result(data_function(*args) if shared == None else pkl.loads(shared))
+        except BaseException as e:
+            # Failures aren't held onto, so that a later request can try again
+            with self.lock:
+                if self.results.get((uid, key)) is result:
+                    del self.results[(uid, key)]
+            result.set_exception(e)
+
+    def Close(self):
+        """
+        Stops any prefetches that haven't started, and waits for those that have.
+        """
+        if self.pool == None:
+            return
+        self.pool.shutdown(wait = True, cancel_futures = True)
+        with self.lock:
+            for result in self.results.values():
+                # Only results whose prefetch was cancelled can still be pending
+                result.cancel()
+
+active_broker = None
+
+def SetBroker(broker : DataBroker):
+    """
+    Makes broker the one used by BrokeredData() within this process, returning the one it replaces.
+    """
+    global active_broker
+    previous_broker = active_broker
+    active_broker = broker
+    return previous_broker
+
+def BrokeredData(uid : str, data_function, key, args : tuple):
+    """
+    Fetches a dataset through the active DataBroker, or directly if no run has set one.
+
+    Parameters
+    ----------
+    uid : string
+        The uid of the calling module.
+
+    data_function : function
+        The calling module's Data() function.
+
+    key, args
+        As returned by the calling module's DataRequest().
+    """
+    if active_broker == None:
+        return data_function(*args)
+    return active_broker.Get(uid, key, data_function, args)
+
 class Factor(object):
     """
     The Factor object holds details about each plotable data source that modules return.
@@ -511,143 +1846,153 @@ class Time(object):
             ThrowError("AMGP_UTIL", "Time.FormatTimes()", 1, "The FormatTimes() function cannot be run on a Time object prior to the AddFormatting() function being run on said Time object.", self.runtime, True, False, True)
             return self
 
-        for i in range(0, len(self.timelist)):
-            self.timelist[i] = self.timelist[i].replace(microsecond = 0)
+        if self.timelist == []:
+            return self
+
+        # The whole timelist is floored at once as datetime64s of its wall-clock times, with each time's zone reattached afterwards
+        zones = [time.tzinfo for time in self.timelist]
+        epoch = datetime(1970, 1, 1)
+        times = np.fromiter(((time.replace(tzinfo = None) - epoch) // timedelta(microseconds = 1) for time in self.timelist), dtype = np.int64, count = len(self.timelist)).astype("datetime64[us]").astype("datetime64[s]")
 
         if self.time_mode != "raw":
-            for i in range(0, len(self.timelist)):
-                if self.time_mode == "sync":
-                    if "24h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = 0, minute = 0, second = 0)
-                    elif "12h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 12, minute = 0, second = 0)
-                    elif "8h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 8, minute = 0, second = 0)
-                    elif "6h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 6, minute = 0, second = 0)
-                    elif "4h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 4, minute = 0, second = 0)
-                    elif "3h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 3, minute = 0, second = 0)
-                    elif "2h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 2, minute = 0, second = 0)
-                    elif "1h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(minute = 0, second = 0)
-                    elif "45m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) % 60, second = 0)
-                    elif "40m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) % 60, second = 0)
-                    elif "30m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) % 60, second = 0)
-                    elif "20m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) % 60, second = 0)
-                    elif "15m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) % 60, second = 0)
-                    elif "10m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) % 60, second = 0)
-                    elif "5m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) % 60, second = 0)
-                    elif "1m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(second = 0)
-                
-                elif self.time_mode == "nearest":
-                    if "1m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(second = 0)
-                    elif "5m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) % 60, second = 0)
-                    elif "10m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) % 60, second = 0)
-                    elif "15m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) % 60, second = 0)
-                    elif "20m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) % 60, second = 0)
-                    elif "30m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) % 60, second = 0)
-                    elif "40m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) % 60, second = 0)
-                    elif "45m" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) % 60, second = 0)
-                    elif "1h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(minute = 0, second = 0)
-                    elif "2h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 2, minute = 0, second = 0)
-                    elif "3h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 3, minute = 0, second = 0)
-                    elif "4h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 4, minute = 0, second = 0)
-                    elif "6h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 6, minute = 0, second = 0)
-                    elif "8h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 8, minute = 0, second = 0)
-                    elif "12h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 12, minute = 0, second = 0)
-                    if "24h" in self.formats:
-                        self.timelist[i] = self.timelist[i].replace(hour = 0, minute = 0, second = 0)
-
-                elif self.time_mode == "async":
-                    if formatter == "24h":
-                        self.timelist[i] = self.timelist[i].replace(hour = 0, minute = 0, second = 0)
-                    elif formatter == "12h":
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 12, minute = 0, second = 0)
-                    elif formatter == "8h":
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 8, minute = 0, second = 0)
-                    elif formatter == "6h":
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 6, minute = 0, second = 0)
-                    elif formatter == "4h":
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 4, minute = 0, second = 0)
-                    elif formatter == "3h":
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 3, minute = 0, second = 0)
-                    elif formatter == "2h":
-                        self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 2, minute = 0, second = 0)
-                    elif formatter == "1h":
-                        self.timelist[i] = self.timelist[i].replace(minute = 0, second = 0)
-                    elif formatter == "45m":
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) % 60, second = 0)
-                    elif formatter == "40m":
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) % 60, second = 0)
-                    elif formatter == "30m":
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) % 60, second = 0)
-                    elif formatter == "20m":
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) % 60, second = 0)
-                    elif formatter == "15m":
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) % 60, second = 0)
-                    elif formatter == "10m":
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) % 60, second = 0)
-                    elif formatter == "5m":
-                        self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) % 60, second = 0)
-                    elif formatter == "1m":
-                        self.timelist[i] = self.timelist[i].replace(second = 0)
-
-                if formatter == "day1":
-                    if ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 20*60 + 0:
-                        self.timelist[i] = self.timelist[i].replace(hour = 20, minute = 0, second = 0)
-                    elif ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 16*60 + 30:
-                        self.timelist[i] = self.timelist[i].replace(hour = 16, minute = 30, second = 0)
-                    elif ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 13*60 + 0:
-                        self.timelist[i] = self.timelist[i].replace(hour = 13, minute = 0, second = 0)
-                    elif ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 6*60 + 0:
-                        self.timelist[i] = self.timelist[i].replace(hour = 6, minute = 0, second = 0)
-                    elif ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 1*60 + 0:
-                        self.timelist[i] = self.timelist[i].replace(hour = 1, minute = 0, second = 0)
-                    else:
-                        self.timelist[i] = self.timelist[i].replace(hour = 20, minute = 0, second = 0) - timedelta(days=1)
-                elif formatter == "day2":
-                    if ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 17*60 + 30:
-                        self.timelist[i] = self.timelist[i].replace(hour = 17, minute = 30, second = 0)
-                    elif ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 8*60 + 0:
-                        self.timelist[i] = self.timelist[i].replace(hour = 8, minute = 0, second = 0)
-                    else:
-                        self.timelist[i] = self.timelist[i].replace(hour = 17, minute = 30, second = 0) - timedelta(days=1)
-                elif formatter == "day3":
-                    if ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 7*60 + 30:
-                        self.timelist[i] = self.timelist[i].replace(hour = 7, minute = 30, second = 0)
-                    else:
-                        self.timelist[i] = self.timelist[i].replace(hour = 7, minute = 30, second = 0) - timedelta(days=1)
-                elif (formatter == "day4") or (formatter == "day5") or (formatter == "day6") or (formatter == "day7") or (formatter == "day8"):
-                    self.timelist[i] = self.timelist[i].replace(hour = 0, minute = 0, second = 0)
+            step = None
+            steps = [time_steps[format] for format in self.formats if (type(format) == str) and (format in time_steps.keys())]
+            if (self.time_mode == "sync") and (steps != []):
+                # Synced to the longest repetition of all of the used factors
+                step = max(steps)
+            elif (self.time_mode == "nearest") and (steps != []):
+                # The shortest repetition of all of the used factors, unless any of them are daily
+                step = time_steps["24h"] if "24h" in self.formats else min(steps)
+            elif (self.time_mode == "async") and (formatter in time_steps.keys()):
+                step = time_steps[formatter]
+
+            if step != None:
+                times = FloorTimes(times, step)
+
+            if formatter in day_anchors.keys():
+                times = AnchorTimes(times, day_anchors[formatter])
+
+        self.timelist = times.astype("datetime64[us]").tolist()
+        if zones.count(None) != len(zones):
+            self.timelist = [time.replace(tzinfo = zone) for time, zone in zip(self.timelist, zones)]
 
         return self
 
+# The length of each repeating time format in minutes; every one of them divides evenly into a day
+time_steps = {"1m":1, "5m":5, "10m":10, "15m":15, "20m":20, "30m":30, "40m":40, "45m":45, "1h":60, "2h":120, "3h":180, "4h":240, "6h":360, "8h":480, "12h":720, "24h":1440}
+
+# The minutes of the day that each daily outlook is issued at; times before the first are given the last issuance of the day before
+day_anchors = {"day1":[60, 360, 780, 990, 1200], "day2":[480, 1050], "day3":[450], "day4":[0], "day5":[0], "day6":[0], "day7":[0], "day8":[0]}
+
+def FloorTimes(times : np.ndarray, step : int):
+    """
+    Floors an array of datetime64s to the latest multiple of a number of minutes since the start of their day, dropping their seconds.
+
+    Parameters
+    ----------
+    times : numpy.ndarray
+        An array of naive datetime64 values.
+
+    step : int
+        The number of minutes to floor to.
+    """
+    days = times.astype("datetime64[D]")
+    minutes = (times - days) // np.timedelta64(1, "m")
+    return days + (minutes - minutes % step) * np.timedelta64(1, "m")
+
+def AnchorTimes(times : np.ndarray, anchors : list):
+    """
+    Moves an array of datetime64s back to the latest of a set of minutes of the day, dropping their seconds.
+
+    Parameters
+    ----------
+    times : numpy.ndarray
+        An array of naive datetime64 values.
+
+    anchors : list
+        The minutes of the day, in ascending order.
+    """
+    days = times.astype("datetime64[D]")
+    minutes = (times - days) // np.timedelta64(1, "m")
+    anchors = np.array(anchors)
+    index = np.searchsorted(anchors, minutes, side = "right") - 1
+    return np.where(index >= 0, days + anchors[index] * np.timedelta64(1, "m"), days - np.timedelta64(1, "D") + anchors[-1] * np.timedelta64(1, "m"))
+
+class TimePlan(object):
+    """
+    The times of every frame of a run, built once per axis from a Time object and never modified afterwards.
+
+    Building a Time object parses its timestring and walks its whole range, so a run draws each of its frames
+    from the one TimePlan, rather than rebuilding that range for every frame, plotable, and title.
+
+    Parameters
+    ----------
+    runtime : datetime.datetime
+
+    mode : string
+
+    timestring : string
+
+    used_factors : list
+        The plotables of the axis, as passed to Time.AddFormatting().
+
+    Methods
+    -------
+    Time()
+
+    Formatted()
+    """
+    def __init__(self, runtime : datetime, mode : str, timestring : str, used_factors : list):
+        time = Time(runtime, mode, timestring = timestring).AddFormatting(used_factors)
+        object.__setattr__(self, "runtime", runtime)
+        object.__setattr__(self, "time_mode", mode)
+        object.__setattr__(self, "timelist", tuple(time.timelist))
+        object.__setattr__(self, "entries", time.entries)
+        object.__setattr__(self, "format_sources", dict(time.format_sources))
+        object.__setattr__(self, "formats", tuple(time.formats))
+        object.__setattr__(self, "_formatted", {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TimePlan objects cannot be modified once they're built.")
+
+    def Time(self, index : int):
+        """
+        Parameters
+        ----------
+        index : int
+            The index of the frame within self.timelist
+
+        Returns
+        -------
+        time : amgp.Time
+            A new Time object holding only the selected frame, which is free to be formatted by whatever receives it
+        """
+        time = Time(self.runtime, self.time_mode, starttime = self.timelist[index])
+        time.format_sources = dict(self.format_sources)
+        time.formats = list(self.formats)
+        return time
+
+    def Formatted(self, formatter : str, index : int):
+        """
+        Parameters
+        ----------
+        formatter : string
+            The time format, as passed to Time.FormatTimes()
+
+        index : int
+            The index of the frame within self.timelist
+
+        Returns
+        -------
+        time : datetime.datetime
+            The formatted time of the frame; every frame is formatted the first time any of them is requested
+        """
+        if formatter not in self._formatted.keys():
+            time = self.Time(0)
+            time.timelist = list(self.timelist)
+            self._formatted[formatter] = tuple(time.FormatTimes(formatter).timelist)
+        return self._formatted[formatter][index]
+
 def ParseProjection(proj_dict):
 
     if proj_dict["central_longitude"]["selection"] != "":
@@ -13,7 +13,10 @@
 ###############################################################
 
 from datetime import timedelta
-from urllib.request import urlopen
+from collections import OrderedDict
+
+import os
+import threading
 
 from metpy.units import units
 
@@ -21,6 +24,7 @@ import cartopy.crs as ccrs
 
 import xarray as xr
 import numpy as np
+import pandas as pd
 
 #----------------- AMGP IMPORTS -------------------#
 from ModulesCore import AMGP_UTIL as amgp
@@ -48,23 +52,19 @@ def Factors():
         }
     }
 
+def Sources():
+    return {
+        "UCAR Thredds":'https://thredds.ucar.edu/thredds',
+        "NCEI Thredds":'https://www.ncei.noaa.gov/thredds'
+    }
+
 def Ping():
-    try:
-        with urlopen('https://thredds.ucar.edu/thredds', timeout=3) as conn:
-            print("(AMGP_MODEL) <ping> UCAR Thredds are online")
-    except:
-        print("(AMGP_MODEL) <ping> UCAR Thredds are offline")
-    
-    try:
-        with urlopen('https://www.ncei.noaa.gov/thredds', timeout=3) as conn:
-            print("(AMGP_MODEL) <ping> NCEI Thredds are online")
-    except:
-        print("(AMGP_MODEL) <ping> NCEI Thredds are offline")
+    amgp.PingModule(Info()["name"], Sources())
 
 def Plot(axis_obj, plotable, map_settings, proj_settings, time):
     map_proj = amgp.ParseProjection(proj_settings)
 
-    data, data_proj = Data(plotable, time.FormatTimes(plotable["time_format"]))
+    data, data_proj = amgp.BrokeredData(Info()["uid"], Data, *DataRequest(plotable, proj_settings, time))
 
     if plotable["name"] == "filled_gfs_contours":
         if "temperature" in plotable["options"]["components"]:
@@ -76,62 +76,265 @@ def Plot(axis_obj, plotable, map_settings, proj_settings, time):
 
     return axis_obj
 
-def Data(plotable, time):
+def DataRequest(plotable, proj_settings, time):
+    time = time.FormatTimes(plotable["time_format"])
+    bounds = amgp.DomainBounds(proj_settings)
+    return (plotable["name"], plotable["options"]["resolution"][0], plotable["options"]["level"][0], plotable["options"]["forecast_hour"][0], time.timelist[0], bounds), (plotable, time, bounds)
 
-    return_data = {}
+def DataFingerprint(plotable, proj_settings, time):
+    # A run's fields never change once they've been stored, so the stored field Data() would read identifies its data;
+    # None whenever the requested run's field isn't stored, since Data() would try that run again before any older one
+    time = time.FormatTimes(plotable["time_format"])
+    resolution = plotable["options"]["resolution"][0]
+    level = plotable["options"]["level"][0]
+    valid_time = time.timelist[0] + timedelta(hours = int(plotable["options"]["forecast_hour"][0]))
+    if not os.path.isfile(f"{GridPath(resolution)}{amgp.PathSep()}lon.npy"):
+        return None
+    window = PlanWindow(resolution, time.timelist[0], amgp.DomainBounds(proj_settings))
+    field_path = StoredFieldPath(resolution, time.timelist[0], level, valid_time, window)
+    if field_path == None:
+        return None
+    return os.path.basename(StorePath(resolution, time.timelist[0])) + "/" + os.path.basename(field_path)
 
-    if plotable["name"] == "filled_gfs_contours":
-        
-        try:
-            if plotable["options"]["resolution"][0] == "one_deg":
-                data = xr.open_dataset(f"https://thredds.ucar.edu/thredds/dodsC/grib/NCEP/GFS/Global_onedeg/GFS_Global_onedeg_{time.timelist[0].strftime('%Y%m%d_%H%M')}.grib2")
-            elif plotable["options"]["resolution"][0] == "half_deg":
-                data = xr.open_dataset(f"https://thredds.ucar.edu/thredds/dodsC/grib/NCEP/GFS/Global_0p5deg/GFS_Global_0p5deg_{time.timelist[0].strftime('%Y%m%d_%H%M')}.grib2")
-            elif plotable["options"]["resolution"][0] == "quarter_deg":
-                data = xr.open_dataset(f"https://thredds.ucar.edu/thredds/dodsC/grib/NCEP/GFS/Global_0p25deg/GFS_Global_0p25deg_{time.timelist[0].strftime('%Y%m%d_%H%M')}.grib2")
-        except:
-            if plotable["options"]["resolution"][0] == "one_deg":
-                data = xr.open_dataset(f"https://thredds.ucar.edu/thredds/dodsC/grib/NCEP/GFS/Global_onedeg/GFS_Global_onedeg_{(time.timelist[0] - timedelta(hours = 6)).strftime('%Y%m%d_%H%M')}.grib2")
-            elif plotable["options"]["resolution"][0] == "half_deg":
-                data = xr.open_dataset(f"https://thredds.ucar.edu/thredds/dodsC/grib/NCEP/GFS/Global_0p5deg/GFS_Global_0p5deg_{(time.timelist[0] - timedelta(hours = 6)).strftime('%Y%m%d_%H%M')}.grib2")
-            elif plotable["options"]["resolution"][0] == "quarter_deg":
-                data = xr.open_dataset(f"https://thredds.ucar.edu/thredds/dodsC/grib/NCEP/GFS/Global_0p25deg/GFS_Global_0p25deg_{(time.timelist[0] - timedelta(hours = 6)).strftime('%Y%m%d_%H%M')}.grib2")
-        
-        fhour = int(plotable["options"]["forecast_hour"][0])
-        #if plotable["options"]["limit_to_closest_forecast"][0]:
+# The THREDDS catalogue paths of each resolution, with both spellings that have been used for their option names
+gfs_catalogs = {
+    "one_deg":"Global_onedeg/GFS_Global_onedeg",
+    "half_deg":"Global_0p5deg/GFS_Global_0p5deg",
+    "half-deg":"Global_0p5deg/GFS_Global_0p5deg",
+    "quarter_deg":"Global_0p25deg/GFS_Global_0p25deg",
+    "quarter-deg":"Global_0p25deg/GFS_Global_0p25deg"
+}
+
+# The GFS variable, vertical coordinate, and coordinate value each level option is read from
+gfs_levels = {
+    "surface":("Temperature_height_above_ground", "height_above_ground", 2),
+    "1000 hPa":("Temperature_isobaric", "isobaric", 100000),
+    "925 hPa":("Temperature_isobaric", "isobaric", 92500),
+    "850 hPa":("Temperature_isobaric", "isobaric", 85000),
+    "700 hPa":("Temperature_isobaric", "isobaric", 70000),
+    "500 hPa":("Temperature_isobaric", "isobaric", 50000),
+    "300 hPa":("Temperature_isobaric", "isobaric", 30000),
+    "200 hPa":("Temperature_isobaric", "isobaric", 20000)
+}
+
+# The last forecast hour of every GFS run
+gfs_final_hour = 384
+
+# Remote datasets and memory-mapped fields that have already been opened by this process, the most recently used last;
+# only a few of each are kept open, since a long-running process moves on through many runs and domains
+remote_datasets = OrderedDict()
+store_fields = OrderedDict()
+open_lock = threading.Lock()
+
+def GridPath(resolution):
+    return f"{amgp.StoreRoot()}{amgp.PathSep()}GFS{amgp.PathSep()}{gfs_catalogs[resolution].split('/')[0]}"
+
+def StorePath(resolution, run_time):
+    return f"{GridPath(resolution)}{amgp.PathSep()}{run_time:%Y%m%d_%H%M}"
+
+def WindowName(window):
+    (y0, y1), x_slices = window
+    return f"y{y0}-{y1}_x" + "_".join([f"{x0}-{x1}" for x0, x1 in x_slices])
+
+def FieldPath(resolution, run_time, level, valid_time, window):
+    variable, vertical, value = gfs_levels[level]
+    return f"{StorePath(resolution, run_time)}{amgp.PathSep()}{variable}-{vertical}{value}-{valid_time:%Y%m%d_%H%M}-{WindowName(window)}.npy"
+
+def TimesPath(resolution, run_time):
+    return f"{StorePath(resolution, run_time)}{amgp.PathSep()}times.npy"
+
+def NearestTime(times, valid_time):
+    return int(np.abs(times - np.datetime64(valid_time.replace(tzinfo = None))).argmin())
+
+def StoredFieldPath(resolution, run_time, level, valid_time, window):
+    """
+    Finds the stored field that Ingest() would return for a valid time, or None if it would have to be ingested first.
+
+    The nearest time is resolved against the times the run held when it was last ingested, just as Ingest() resolves it.
+    """
+    if not os.path.isfile(TimesPath(resolution, run_time)):
+        return None
+    times = np.load(TimesPath(resolution, run_time))
+    # Forecast hours are produced in order, so a time past the last one the run held may simply not have been produced yet
+    if (np.datetime64(valid_time.replace(tzinfo = None)) > times.max()) and (times.max() < np.datetime64((run_time + timedelta(hours = gfs_final_hour)).replace(tzinfo = None))):
+        return None
+    field_path = FieldPath(resolution, run_time, level, pd.Timestamp(times[NearestTime(times, valid_time)]).to_pydatetime(), window)
+    if not os.path.isfile(field_path):
+        return None
+    return field_path
+
+def OpenRemote(resolution, run_time):
+    # Opening an OPeNDAP dataset only transfers its metadata; values are only requested once they're indexed
+    url = f"https://thredds.ucar.edu/thredds/dodsC/grib/NCEP/GFS/{gfs_catalogs[resolution]}_{run_time.strftime('%Y%m%d_%H%M')}.grib2"
+    with open_lock:
+        if url not in remote_datasets.keys():
+            remote_datasets[url] = xr.open_dataset(url)
+            if len(remote_datasets) > int(amgp.Config("gfs_open_datasets", 4)):
+                _, dataset = remote_datasets.popitem(last = False)
+                dataset.close()
+        remote_datasets.move_to_end(url)
+        return remote_datasets[url]
+
+def SaveArray(path, array):
+    # Written under a temporary name first, so that no other process or thread can map a half-written file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as F:
+        np.save(F, array)
+    os.replace(tmp, path)
+
+def GridCoordinates(resolution, run_time):
+    # Every run of a resolution shares the same grid, so its coordinates are only ever read from the server once
+    if not os.path.isfile(f"{GridPath(resolution)}{amgp.PathSep()}lon.npy"):
+        data = OpenRemote(resolution, run_time)
+        os.makedirs(GridPath(resolution), exist_ok = True)
+        SaveArray(f"{GridPath(resolution)}{amgp.PathSep()}lat.npy", data["lat"].values)
+        SaveArray(f"{GridPath(resolution)}{amgp.PathSep()}lon.npy", data["lon"].values)
+    return StoredField(f"{GridPath(resolution)}{amgp.PathSep()}lat.npy"), StoredField(f"{GridPath(resolution)}{amgp.PathSep()}lon.npy")
+
+def PlanWindow(resolution, run_time, bounds):
+    """
+    Works out which rows and columns of the GFS grid cover a map domain, before any values are requested.
 
+    Parameters
+    ----------
+    resolution : string
+        One of the resolution options of filled_gfs_contours.
 
-        data = data.sel(time3 = (time.timelist[0] + timedelta(hours = fhour)).replace(tzinfo = None), method = "nearest")
-        data = data.sel(time = (time.timelist[0] + timedelta(hours = fhour)).replace(tzinfo = None), method = "nearest")
-        
-        return_data["lat"] = data.lat
-        return_data["lon"] = data.lon
+    run_time : datetime.datetime
+        The initialization time of a GFS run, only used if the grid hasn't been stored yet.
 
-        if plotable["options"]["level"][0] == "surface":
-            data = data.sel(height_above_ground3 = 2)
-            return_data["temp"] = (data["Temperature_height_above_ground"].values * units("K")).to("degC")
-        else:
-            if plotable["options"]["level"][0] == "1000 hPa":
-                level = 100000
-            elif plotable["options"]["level"][0] == "925 hPa":
-                level = 92500
-            elif plotable["options"]["level"][0] == "850 hPa":
-                level = 85000
-            elif plotable["options"]["level"][0] == "700 hPa":
-                level = 70000
-            elif plotable["options"]["level"][0] == "500 hPa":
-                level = 50000
-            elif plotable["options"]["level"][0] == "300 hPa":
-                level = 30000
-            elif plotable["options"]["level"][0] == "200 hPa":
-                level = 20000
+    bounds : tuple
+        The (west, east, south, north) bounds of the map domain, or None for the whole globe.
 
-            data = data.sel(isobaric = level)
+    Returns
+    -------
+    window : tuple
+        The (start, stop) latitude indices and a list of (start, stop) longitude indices, which holds two
+        slices whenever the domain crosses the 0 degree meridian of the 0-360 degree grid.
+    """
+    lat, lon = GridCoordinates(resolution, run_time)
+    if bounds == None:
+        return (0, len(lat)), [(0, len(lon))]
 
-            return_data["temp"] = (data["Temperature_isobaric"].values * units("K")).to("degC")
+    west, east, south, north = bounds
+    # Padded by two grid cells, so that contours run cleanly off the edges of the map
+    pad = 2 * abs(float(lat[1] - lat[0]))
 
+    rows = np.nonzero((lat >= south - pad) & (lat <= north + pad))[0]
+    y_slice = (int(rows.min()), int(rows.max()) + 1)
 
+    if (east - west) + (2 * pad) >= 360:
+        return y_slice, [(0, len(lon))]
 
+    west = (west - pad) % 360
+    east = (east + pad) % 360
+    x0 = max(int(np.searchsorted(lon, west, side = "right")) - 1, 0)
+    x1 = min(int(np.searchsorted(lon, east, side = "left")) + 1, len(lon))
+    if west <= east:
+        return y_slice, [(x0, x1)]
+    return y_slice, [(x0, len(lon)), (0, x1)]
+
+def WindowCoordinates(resolution, run_time, window):
+    lat, lon = GridCoordinates(resolution, run_time)
+    (y0, y1), x_slices = window
+    # Longitudes before the 0 degree meridian are shifted to negative values, to remain continuous
+    lons = [lon[x0:x1] - (360 if (len(x_slices) > 1) and (i == 0) else 0) for i, (x0, x1) in enumerate(x_slices)]
+    return lat[y0:y1], np.concatenate(lons)
+
+def Ingest(resolution, run_time, level, valid_times, window):
+    """
+    Copies the fields for one GFS run, level, domain, and any number of valid times from THREDDS into the local store.
+
+    The request is planned before the server is touched, so that only the selected hyperslab of each field is transferred.
+
+    Parameters
+    ----------
+    resolution : string
+        One of the resolution options of filled_gfs_contours.
+
+    run_time : datetime.datetime
+        The initialization time of the GFS run.
+
+    level : string
+        One of the level options of filled_gfs_contours.
+
+    valid_times : list
+        The datetime.datetime objects to store the nearest forecasts to.
+
+    window : tuple
+        The grid indices to transfer, as returned by PlanWindow.
+
+    Returns
+    -------
+    paths : list
+        The stored file of each valid time. Fields are stored under the time they are actually valid for, so that a
+        forecast hour the run hasn't produced yet is never mistaken for one that it has.
+    """
+    data = OpenRemote(resolution, run_time)
+    variable, vertical, value = gfs_levels[level]
+    field = data[variable]
+    time_dim = [dim for dim in field.dims if dim.startswith("time")][0]
+    vertical_dim = [dim for dim in field.dims if dim.startswith(vertical)][0]
+    (y0, y1), x_slices = window
+
+    # Index positions are resolved from the coordinate metadata alone
+    times = field[time_dim].values
+    vertical_index = int(np.abs(field[vertical_dim].values - value).argmin())
+
+    os.makedirs(StorePath(resolution, run_time), exist_ok = True)
+
+    paths = []
+    for valid_time in valid_times:
+        time_index = NearestTime(times, valid_time)
+        selection = [field.isel({time_dim:time_index, vertical_dim:vertical_index, "lat":slice(y0, y1), "lon":slice(x0, x1)}).values for x0, x1 in x_slices]
+        paths.append(FieldPath(resolution, run_time, level, pd.Timestamp(times[time_index]).to_pydatetime(), window))
+        SaveArray(paths[-1], np.concatenate(selection, axis = -1))
+
+    # Saved once the fields are, so that StoredFieldPath() never resolves a time to a field that isn't stored yet
+    SaveArray(TimesPath(resolution, run_time), times)
+
+    return paths
+
+def StoredField(path):
+    with open_lock:
+        if path not in store_fields.keys():
+            store_fields[path] = np.load(path, mmap_mode = "r")
+            if len(store_fields) > int(amgp.Config("gfs_open_fields", 32)):
+                # Only let go of rather than closed outright, since arrays sliced from it may still be in use;
+                # the file is unmapped once the last of them is
+                store_fields.popitem(last = False)
+        store_fields.move_to_end(path)
+        return store_fields[path]
+
+def Data(plotable, time, bounds = None):
+
+    return_data = {}
+
+    if plotable["name"] == "filled_gfs_contours":
+        resolution = plotable["options"]["resolution"][0]
+        level = plotable["options"]["level"][0]
+        fhour = int(plotable["options"]["forecast_hour"][0])
+        #if plotable["options"]["limit_to_closest_forecast"][0]:
+        valid_time = time.timelist[0] + timedelta(hours = fhour)
+
+        # Fields are read out of the local store wherever they've already been ingested, only
+        # turning to the run 6 hours earlier once the requested run can't be ingested itself
+        run_time = time.timelist[0]
+        try:
+            window = PlanWindow(resolution, run_time, bounds)
+        except:
+            window = PlanWindow(resolution, run_time - timedelta(hours = 6), bounds)
+        field_path = StoredFieldPath(resolution, run_time, level, valid_time, window)
+        if field_path == None:
+            try:
+                field_path = Ingest(resolution, run_time, level, [valid_time], window)[0]
+            except:
+                run_time = run_time - timedelta(hours = 6)
+                field_path = StoredFieldPath(resolution, run_time, level, valid_time, window)
+                if field_path == None:
+                    field_path = Ingest(resolution, run_time, level, [valid_time], window)[0]
 
+        return_data["lat"], return_data["lon"] = WindowCoordinates(resolution, run_time, window)
+        return_data["temp"] = (StoredField(field_path) * units("K")).to("degC")
 
-    return return_data, ccrs.PlateCarree()
\ No newline at end of file
+    return return_data, ccrs.PlateCarree()
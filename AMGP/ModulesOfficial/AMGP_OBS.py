@@ -13,10 +13,7 @@
 #                                                             #
 ###############################################################
 
-from urllib.request import urlopen
-
 from metpy.plots import StationPlot
-from metpy.calc import reduce_point_density
 from metpy.units import units
 from metpy.io import add_station_lat_lon
 from metpy.io import metar
@@ -29,8 +26,18 @@ import cartopy.crs as ccrs
 from siphon.simplewebservice.iastate import IAStateUpperAir
 
 import pandas as pd
+import numpy as np
+
+from scipy.spatial import KDTree
+
+from io import StringIO, BytesIO
+
+from collections import OrderedDict
 
-from io import StringIO
+import hashlib
+import threading
+
+import os
 
 #----------------- AMGP IMPORTS -------------------#
 from ModulesCore import AMGP_UTIL as amgp
@@ -64,24 +71,20 @@ def Factors():
         }
     }
 
+def Sources():
+    return {
+        "Valpo surface archives":'http://bergeron.valpo.edu/archive_surface_data',
+        "Valpo current surface data":'http://bergeron.valpo.edu/current_surface_data',
+        "Iowa State Mesonet":'http://mesonet.agron.iastate.edu'
+    }
+
+# The sources surface observations can come from, as checked at startup and skipped by Data() while they're known to be offline
+valpo_archive = Sources()["Valpo surface archives"]
+valpo_current = Sources()["Valpo current surface data"]
+iastate_mesonet = Sources()["Iowa State Mesonet"]
+
 def Ping():
-    try:
-        with urlopen('http://bergeron.valpo.edu/archive_surface_data', timeout=3) as conn:
-            print("(AMGP_OBS) <ping> Valpo surface archives are online")
-    except:
-        print("(AMGP_OBS) <ping> Valpo surface archives are offline")
-    
-    try:
-        with urlopen('http://bergeron.valpo.edu/current_surface_data', timeout=3) as conn:
-            print("(AMGP_OBS) <ping> Valpo current surface data is online")
-    except:
-        print("(AMGP_OBS) <ping> Valpo current surface data is offline")
-    
-    try:
-        with urlopen('http://mesonet.agron.iastate.edu', timeout=3) as conn:
-            print("(AMGP_OBS) <ping> Iowa State Mesonet is online")
-    except:
-        print("(AMGP_OBS) <ping> Iowa State Mesonet is offline")
+    amgp.PingModule(Info()["name"], Sources())
 
     
 def Plot(axis_obj, plotable, map_settings, proj_settings, time):
@@ -119,10 +122,9 @@ def Plot(axis_obj, plotable, map_settings, proj_settings, time):
     else:
         min_dist = 10000
     
-    data, data_proj = Data(plotable, time.FormatTimes(plotable["time_format"]))
+    data, data_proj = amgp.BrokeredData(Info()["uid"], Data, *DataRequest(plotable, proj_settings, time))
 
-    points = map_proj.transform_points(data_proj, data['lon'], data['lat'])
-    data = data[reduce_point_density(points, min_dist)]
+    data = data[StationDeclutter(map_proj, data_proj, min_dist).Reduce(data['lon'], data['lat'])]
 
     station_plot = StationPlot(axis_obj, data['lon'], data['lat'], clip_on = True, transform = data_proj, fontsize = 9)
 
@@ -174,39 +176,292 @@ def Plot(axis_obj, plotable, map_settings, proj_settings, time):
 
     return axis_obj
 
-def Data(plotable, time):
+class StationIndex(object):
+    """
+    Every station location seen so far for one map projection and declutter distance, projected, along with which of the others lie within that distance of each.
 
-    if plotable["name"] == "surface_station_observations":
-        if time.timelist[0].year < 2019:
-            data = pd.read_csv(f'http://bergeron.valpo.edu/archive_surface_data/{time.timelist[0]:%Y}/{time.timelist[0]:%Y%m%d}_metar.csv', parse_dates=['date_time'], na_values=[-9999], low_memory=False)
-            data = data[(data["date_time"] <= (time.timelist[0] + timedelta(minutes = 5))) & (data["date_time"] >= (time.timelist[0] - timedelta(minutes = 5)))]
-            data['wxsym'] = data.present_weather
+    Decluttering a frame then only walks its reports in order, the same way metpy's reduce_point_density does, without building or searching a KD-tree.
+
+    Parameters
+    ----------
+    map_proj : cartopy.crs.CRS
+        The projection of the map.
+
+    data_proj : cartopy.crs.CRS
+        The projection of the station coordinates.
+
+    min_dist : int
+        The minimum distance between plotted stations, in the units of the map projection.
+
+    Methods
+    -------
+    Extend()
+
+    Reduce()
+    """
+    def __init__(self, map_proj, data_proj, min_dist : int):
+        self.map_proj = map_proj
+        self.data_proj = data_proj
+        self.min_dist = min_dist
+        # Each location is held as lon + lat*j, so that a frame's reports can be matched to it with a single lookup
+        self.locations = pd.Index(np.array([], dtype = complex))
+        self.masks = OrderedDict()
+        self.Extend(np.array([], dtype = complex))
+
+    def Extend(self, locations):
+        """
+        Adds new station locations, then projects and searches the whole catalogue again, since they may neighbour stations already in it.
+        """
+        self.locations = self.locations.append(pd.Index(locations)).unique()
+        points = self.map_proj.transform_points(self.data_proj, np.real(self.locations.values), np.imag(self.locations.values))
+        # Locations that can't be projected are never plotted, just as reduce_point_density leaves them out
+        self.valid = np.isfinite(points).all(axis = 1)
+        points = np.where(np.isfinite(points), points, 0)
+        neighbours = KDTree(points).query_ball_point(points, self.min_dist) if len(points) > 0 else []
+        self.indptr = np.concatenate([[0], np.cumsum([len(n) for n in neighbours], dtype = int)])
+        self.indices = np.concatenate([np.array(n, dtype = int) for n in neighbours] + [np.array([], dtype = int)])
+        self.masks.clear()
+
+    def Reduce(self, lons, lats):
+        """
+        Returns a mask of the reports to plot, identical to that of reduce_point_density for the same reports in the same order.
+        """
+        lons = np.asarray(lons, dtype = float)
+        lats = np.asarray(lats, dtype = float)
+        digest = hashlib.sha1(lons.tobytes() + lats.tobytes()).hexdigest()
+        if digest in self.masks.keys():
+            self.masks.move_to_end(digest)
+            return self.masks[digest].copy()
+
+        finite = np.isfinite(lons) & np.isfinite(lats)
+        locations = (lons + 1j * lats)[finite]
+        entries = np.full(len(lons), -1)
+        entries[finite] = self.locations.get_indexer(locations)
+        if (entries[finite] == -1).any():
+            self.Extend(np.unique(locations[entries[finite] == -1]))
+            entries[finite] = self.locations.get_indexer(locations)
+
+        # Each report is kept unless an earlier kept report lies within the distance of it
+        keep = np.zeros(len(lons), dtype = bool)
+        blocked = ~self.valid
+        for row, entry in enumerate(entries.tolist()):
+            if (entry < 0) or blocked[entry]:
+                continue
+            keep[row] = True
+            blocked[self.indices[self.indptr[entry]:self.indptr[entry + 1]]] = True
+
+        self.masks[digest] = keep
+        if len(self.masks) > 64:
+            self.masks.popitem(last = False)
+        return keep.copy()
+
+# The station index of each projection and distance used so far, most recently used last
+station_indexes = OrderedDict()
+
+def StationDeclutter(map_proj, data_proj, min_dist : int):
+    '''
+    Provides the StationIndex for a projection and declutter distance, creating it the first time they're used together.
+    '''
+    key = (map_proj.proj4_init, data_proj.proj4_init, min_dist)
+    if key not in station_indexes.keys():
+        station_indexes[key] = StationIndex(map_proj, data_proj, min_dist)
+        if len(station_indexes) > 8:
+            station_indexes.popitem(last = False)
+    station_indexes.move_to_end(key)
+    return station_indexes[key]
+
+def DataRequest(plotable, proj_settings, time):
+    # Each level of upper-air data is its own dataset; surface observations are the same for every plotable at a given time
+    time = time.FormatTimes(plotable["time_format"])
+    if plotable["name"] == "upper_air_station_observations":
+        return (plotable["name"], plotable["options"]["level"][0], time.timelist[0]), (plotable, time)
+    return (plotable["name"], time.timelist[0]), (plotable, time)
+
+def DataFingerprint(plotable, proj_settings, time):
+    # Archived observations never change; of the recent ones, only Valpo's current files say when they've changed
+    time = time.FormatTimes(plotable["time_format"])
+    valid_time = time.timelist[0]
+    if amgp.CacheTTL(valid_time) == None:
+        return f"archive {valid_time:%Y%m%d%H%M}"
+    if (plotable["name"] == "surface_station_observations") and (valid_time.year >= 2019) and (amgp.SourceOnline(valpo_current) != False):
+        # Valpo's fingerprint says nothing about observations that were last drawn from Iowa State instead
+        cache, key = FallbackMarker(valid_time)
+        if cache.Get(key) != None:
+            return None
+        return amgp.SourceFingerprint(f'{valpo_current}/{valid_time:%Y%m%d%H}_sao.wmo')
+    return None
+
+def FallbackMarker(valid_time):
+    '''
+    The cache entry marking an hour whose observations came from Iowa State rather than Valpo, kept for as long as the observations themselves are cached.
+    '''
+    cache = amgp.DataCache("Raw")
+    return cache, cache.Key(Info()["uid"], "iastate_fallback", valid_time)
+
+# The only columns of the Valpo archive that Data() goes on to use
+archive_columns = ["station_id", "latitude", "longitude", "elevation", "date_time", "wind_direction", "wind_speed", "eastward_wind", "northward_wind", "air_temperature", "dew_point_temperature", "air_pressure_at_sea_level", "cloud_coverage", "present_weather"]
+
+# The most recently used days of the archive, already parsed and sorted by time
+archive_days = OrderedDict()
+# Frames may be prefetched from several threads at once, and only one should parse any given day
+archive_lock = threading.Lock()
+
+def ArchiveDay(day):
+    '''
+    The observations of one day of the Valpo surface archive, sorted by time. Each day is only downloaded and parsed once, however many of its hours are plotted.
+    '''
+    key = day.strftime("%Y%m%d")
+    with archive_lock:
+        if key not in archive_days.keys():
+            data = pd.read_csv(BytesIO(amgp.CachedDownload(f'{valpo_archive}/{day:%Y}/{day:%Y%m%d}_metar.csv', day)), usecols = lambda column: column in archive_columns, parse_dates=['date_time'], na_values=[-9999], low_memory=False)
+            # Reports without a time can never fall within a window; the rest are sorted stably, so that reports at the same time keep the order they're in within the file
+            archive_days[key] = data.dropna(subset = ["date_time"]).sort_values("date_time", kind = "stable")
+            if len(archive_days) > 2:
+                archive_days.popitem(last = False)
+        archive_days.move_to_end(key)
+        return archive_days[key]
+
+def ArchiveWindow(valid_time, margin):
+    '''
+    The observations within the margin of a time, inclusive, from the archive of that time's day, in the order they're in within the file.
+    '''
+    data = ArchiveDay(valid_time)
+    window = data.iloc[data["date_time"].searchsorted(valid_time - margin, "left"):data["date_time"].searchsorted(valid_time + margin, "right")]
+    # Back into file order, since the order of the reports decides which survive decluttering
+    return window.sort_index().copy()
+
+def SurfaceObservations(valid_time):
+    '''
+    Downloads and parses the surface observations of a time, from the Valpo archives, Valpo's current data, or the Iowa State Mesonet.
+    '''
+    if valid_time.year < 2019:
+        data = ArchiveWindow(valid_time, timedelta(minutes = 5))
+        data['wxsym'] = data.present_weather
+    else:
+        try:
+            # Straight on to Iowa State while Valpo is known to be offline, rather than waiting for it to time out again
+            if amgp.SourceOnline(valpo_current) == False:
+                raise ConnectionError(f"{valpo_current} is offline")
+            try:
+                data = amgp.CachedDownload(f'{valpo_current}/{valid_time:%Y%m%d%H}_sao.wmo', valid_time)
+            except OSError as e:
+                # Only an unreachable host marks the source as offline, not a missing file
+                if not isinstance(e, amgp.HTTPError):
+                    amgp.RecordSourceHealth(valpo_current, False)
+                raise
+            data = StringIO(data.decode('utf-8', 'backslashreplace'))
+            data = metar.parse_metar_file(data, year=valid_time.year, month=valid_time.month).sel(date_time = valid_time)
+            data = data[(data["date_time"] <= (valid_time + timedelta(minutes = 5))) & (data["date_time"] >= (valid_time - timedelta(minutes = 5)))]
+            cache, key = FallbackMarker(valid_time)
+            cache.Remove(key)
+        except:
+            data = pd.read_csv(BytesIO(amgp.CachedDownload(f'{iastate_mesonet}/cgi-bin/request/asos.py?data=all&tz=Etc/UTC&format=comma&latlon=yes&year1={valid_time.year}&month1={valid_time.month}&day1={valid_time.day}&hour1={valid_time.hour}&minute1={valid_time.minute}&year2={valid_time.year}&month2={valid_time.month}&day2={valid_time.day}&hour2={valid_time.hour}&minute2={valid_time.minute}', valid_time)), skiprows=5, na_values=['M'], low_memory=False).replace('T', 0.00001).groupby('station').tail(1)
+            data = metar.parse_metar_file(StringIO('\n'.join(val for val in data.metar)), year=valid_time.year, month=valid_time.month)
+            data['date_time'] = valid_time
+            cache, key = FallbackMarker(valid_time)
+            cache.Put(key, b"", amgp.CacheTTL(valid_time), iastate_mesonet)
+        data['wxsym'] = data.current_wx1_symbol
+    data['temp'] = (data.air_temperature.values * units.degC).to('degF')
+    data['dewp'] = (data.dew_point_temperature.values * units.degC).to('degF')
+    data['prss'] = data.air_pressure_at_sea_level.values * units.hPa
+    data['elev'] = data.elevation.values * units.m
+    data['lat'] = data.latitude
+    data['lon'] = data.longitude
+    data['wdir'] = data.wind_direction
+    data['wspd'] = data.wind_speed.values * units('kts')
+    data['uwnd'] = data.eastward_wind.values * units('kts')
+    data['vwnd'] = data.northward_wind.values * units('kts')
+    data['cloud_cover'] = data.cloud_coverage
+    data['station'] = data.station_id
+    data['dt'] = data.date_time
+
+    return data
+
+# The columns of the normalised surface observations that are kept in the local store, which are all Plot() uses
+store_columns = ["station", "lat", "lon", "temp", "dewp", "prss", "uwnd", "vwnd", "cloud_cover", "wxsym", "dt"]
+
+def SurfaceStorePath(valid_time):
+    return f"{amgp.StoreRoot()}{amgp.PathSep()}OBS{amgp.PathSep()}surface{amgp.PathSep()}{valid_time:%Y%m%d}{amgp.PathSep()}{valid_time:%H}.parquet"
+
+def StoredSurface(valid_time):
+    '''
+    Reads the surface observations of an hour from the local store, returning None if they haven't been stored.
+    '''
+    if (valid_time.minute != 0) or (valid_time.second != 0) or (not os.path.isfile(SurfaceStorePath(valid_time))):
+        return None
+    try:
+        return pd.read_parquet(SurfaceStorePath(valid_time))
+    except Exception as e:
+        print(f"(AMGP_OBS) <store> {SurfaceStorePath(valid_time)} could not be read, it will be downloaded again: {e}")
+        return None
+
+def StoreSurface(valid_time, data):
+    '''
+    Writes the normalised surface observations of an hour to the local store, partitioned by date and hour.
+    Only archived hours are stored, since more recent observations may still be coming in.
+    '''
+    if (valid_time.minute != 0) or (valid_time.second != 0) or (amgp.CacheTTL(valid_time) != None):
+        return
+    path = SurfaceStorePath(valid_time)
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    # Written under a temporary name first, so that no other process can read a half-written file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        data[store_columns].to_parquet(tmp, index = False)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"(AMGP_OBS) <store> The observations of {valid_time:%Y-%m-%d %H}Z could not be stored: {e}")
+        if os.path.isfile(tmp):
+            os.remove(tmp)
+
+def Archive(start, end):
+    '''
+    Fills the local store with the surface observations of every hour from start to end, inclusive. Run through "AMGP.py --archive AMGP_OBS".
+    '''
+    valid_time = start.replace(minute = 0, second = 0, microsecond = 0)
+    while valid_time <= end:
+        if amgp.CacheTTL(valid_time) != None:
+            print(f"(AMGP_OBS) <archive> {valid_time:%Y-%m-%d %H}Z is too recent to be archived, skipping")
+        elif os.path.isfile(SurfaceStorePath(valid_time)):
+            print(f"(AMGP_OBS) <archive> {valid_time:%Y-%m-%d %H}Z is already stored")
         else:
             try:
-                data = StringIO(urlopen(f'http://bergeron.valpo.edu/current_surface_data/{time.timelist[0]:%Y%m%d%H}_sao.wmo').read().decode('utf-8', 'backslashreplace'))
-                data = metar.parse_metar_file(data, year=time.timelist[0].year, month=time.timelist[0].month).sel(date_time = time.timelist[0])
-                data = data[(data["date_time"] <= (time.timelist[0] + timedelta(minutes = 5))) & (data["date_time"] >= (time.timelist[0] - timedelta(minutes = 5)))]
-            except:
-                data = pd.read_csv(f'http://mesonet.agron.iastate.edu/cgi-bin/request/asos.py?data=all&tz=Etc/UTC&format=comma&latlon=yes&year1={time.timelist[0].year}&month1={time.timelist[0].month}&day1={time.timelist[0].day}&hour1={time.timelist[0].hour}&minute1={time.timelist[0].minute}&year2={time.timelist[0].year}&month2={time.timelist[0].month}&day2={time.timelist[0].day}&hour2={time.timelist[0].hour}&minute2={time.timelist[0].minute}', skiprows=5, na_values=['M'], low_memory=False).replace('T', 0.00001).groupby('station').tail(1)
-                data = metar.parse_metar_file(StringIO('\n'.join(val for val in data.metar)), year=time.timelist[0].year, month=time.timelist[0].month)
-                data['date_time'] = time.timelist[0]
-            data['wxsym'] = data.current_wx1_symbol
-        data['temp'] = (data.air_temperature.values * units.degC).to('degF')
-        data['dewp'] = (data.dew_point_temperature.values * units.degC).to('degF')
-        data['prss'] = data.air_pressure_at_sea_level.values * units.hPa
-        data['elev'] = data.elevation.values * units.m
-        data['lat'] = data.latitude
-        data['lon'] = data.longitude
-        data['wdir'] = data.wind_direction
-        data['wspd'] = data.wind_speed.values * units('kts')
-        data['uwnd'] = data.eastward_wind.values * units('kts')
-        data['vwnd'] = data.northward_wind.values * units('kts')
-        data['cloud_cover'] = data.cloud_coverage
-        data['station'] = data.station_id
-        data['dt'] = data.date_time
+                data = SurfaceObservations(valid_time)
+                StoreSurface(valid_time, data)
+                print(f"(AMGP_OBS) <archive> {valid_time:%Y-%m-%d %H}Z stored with {len(data)} reports")
+            except Exception as e:
+                print(f"(AMGP_OBS) <archive> {valid_time:%Y-%m-%d %H}Z could not be archived: {e}")
+        valid_time += timedelta(hours = 1)
+
+def Data(plotable, time):
+
+    if plotable["name"] == "surface_station_observations":
+        # Hours already in the local store are a single columnar read, with nothing to download or parse
+        data = StoredSurface(time.timelist[0])
+        if data is not None:
+            return data, ccrs.PlateCarree()
+
+    # The parsed, unit-converted data is cached as well as the raw downloads, since re-rendering the same hour
+    # with a different area, projection, or set of components doesn't need anything to be parsed again
+    parsed_cache = amgp.DataCache("Parsed")
+    parsed_key = parsed_cache.Key(Info()["uid"], plotable["name"], plotable["options"].get("level"), time.timelist[0])
+    data = parsed_cache.GetObject(parsed_key)
+    if data is not None:
+        return data, ccrs.PlateCarree()
+
+    if plotable["name"] == "surface_station_observations":
+        data = SurfaceObservations(time.timelist[0])
+        StoreSurface(time.timelist[0], data)
     
     elif plotable["name"] == "upper_air_station_observations":
-        data = add_station_lat_lon(IAStateUpperAir.request_all_data(time.timelist[0])).dropna(subset=['latitude', 'longitude'])
+        # Every level comes back from a single request, so the raw soundings are cached separately from each parsed level
+        raw_cache = amgp.DataCache("Raw")
+        raw_key = raw_cache.Key("IAStateUpperAir", time.timelist[0])
+        data = raw_cache.GetObject(raw_key)
+        if data is None:
+            data = IAStateUpperAir.request_all_data(time.timelist[0])
+            raw_cache.PutObject(raw_key, data, amgp.CacheTTL(time.timelist[0]), "IAStateUpperAir")
+        data = add_station_lat_lon(data).dropna(subset=['latitude', 'longitude'])
 
         # It looks like the IAState site thinks the data it gets is in m/s, converts to "knots"
         #     to get values that are way to high, and passes it on. This undoes that calculation.
@@ -229,6 +484,8 @@ def Data(plotable, time):
         data['vwnd'] = data.v_wind.values * units('kts')
         data['dt'] = time.timelist[0]
 
+    parsed_cache.PutObject(parsed_key, data, amgp.CacheTTL(time.timelist[0]), plotable["name"])
+
     data_proj = ccrs.PlateCarree()  
 
     return data, data_proj
\ No newline at end of file
@@ -0,0 +1,83 @@
+###############################################################
+#                                                             #
+#        The Automated Map Generation Program ( AMGP )        #
+#              © 2022-2025 Samuel Nelson Bailey               #
+#           Distributed under the GPL-3.0 License             #
+#                  Created on Mar 09, 2022                    #
+#                                                             #
+#                 Benchmark: timeplan.py                      #
+#                     Author: Sam Bailey                      #
+#                                                             #
+###############################################################
+"""
+Times the time handling of a run over a long range, comparing the per-frame Time objects AMGP_MAP.Run() used to
+build with the single amgp.TimePlan it builds now, and checking that both give every frame the same times.
+
+Run from the root of the repository:
+
+    python benchmarks/timeplan.py [frames]
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "AMGP"))
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesCore import AMGP_UTIL as amgp
+#-----------------  Definitions -------------------#
+
+# Two plotables with different time formats, as a surface and an upper-air layer would be
+plotables = [
+    {"source_module":"00000000", "name":"hourly", "time_format":"1h"},
+    {"source_module":"00000000", "name":"twice_daily", "time_format":"12h"}
+]
+
+def Timestring(frames : int):
+    start = datetime(2024, 1, 1)
+    end = start + timedelta(hours = frames - 1)
+    return f"{start:%Y%m%d-%H:%M:%S} to {end:%Y%m%d-%H:%M:%S} interval 01:00:00"
+
+def PerFrame(runtime : datetime, mode : str, timestring : str, frames : int):
+    '''
+    The times of every frame as Run() used to find them, rebuilding the whole range for each plotable, the title, and the file name.
+    '''
+    results = []
+    for figure_num in range(1, frames + 1):
+        plot_times = [amgp.Time(runtime, mode, timestring = timestring).AddFormatting(plotables).Index(figure_num - 1).timelist[0] for _ in plotables]
+        title_time = amgp.Time(runtime, mode, timestring = timestring).AddFormatting(plotables).FormatTimes(plotables[0]["time_format"]).Index(figure_num - 1).timelist[0]
+        plot_time = amgp.Time(runtime, mode, timestring = timestring).AddFormatting(plotables).Index(figure_num - 1).timelist[0]
+        results.append((plot_times, title_time, plot_time))
+    return results
+
+def Planned(runtime : datetime, mode : str, timestring : str, frames : int):
+    '''
+    The times of every frame as Run() finds them now, from one amgp.TimePlan.
+    '''
+    plan = amgp.TimePlan(runtime, mode, timestring, plotables)
+    results = []
+    for figure_num in range(1, frames + 1):
+        plot_times = [plan.Time(figure_num - 1).timelist[0] for _ in plotables]
+        title_time = plan.Formatted(plotables[0]["time_format"], figure_num - 1)
+        plot_time = plan.timelist[figure_num - 1]
+        results.append((plot_times, title_time, plot_time))
+    return results
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    runtime = datetime.now(timezone.utc)
+    timestring = Timestring(frames)
+
+    for mode in ["sync", "nearest", "async"]:
+        start = time.perf_counter()
+        before = PerFrame(runtime, mode, timestring, frames)
+        per_frame = time.perf_counter() - start
+
+        start = time.perf_counter()
+        after = Planned(runtime, mode, timestring, frames)
+        planned = time.perf_counter() - start
+
+        print(f"{mode:>8}: {frames} frames, per-frame Time objects {per_frame:.3f} s, TimePlan {planned:.4f} s ({per_frame / planned:.0f}x), identical: {before == after}")
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# AMGP imports its modules relative to the AMGP directory, the same as when AMGP.py is run from it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "AMGP"))
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
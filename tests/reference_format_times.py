@@ -0,0 +1,168 @@
+"""
+Time.FormatTimes() as it was written before it was vectorised, kept so that the tests can hold the
+vectorised version to exactly the same results.
+"""
+
+from datetime import timedelta
+
+import math
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesCore.AMGP_UTIL import ThrowError
+#-----------------  Definitions -------------------#
+
+def ReferenceFormatTimes(self, formatter : str):
+    """
+    The AMGP Time object's most important function, and formats the datetime objects within self.timelist to conform to the parameters required
+    by the data to be retrieved. Requires AddFormatting() to be run on the Time object first.
+
+    Parameters
+    ----------
+    self : amgp.Time
+        This is a function for an AMGP Time object
+    
+    formatter : string
+        The string formatter designating what kind of repition is used by the given factor
+        If time_mode is raw or sync, formatter won't change the effect of the function
+    """
+
+    if self.formats == []:
+        ThrowError("AMGP_UTIL", "Time.FormatTimes()", 1, "The FormatTimes() function cannot be run on a Time object prior to the AddFormatting() function being run on said Time object.", self.runtime, True, False, True)
+        return self
+
+    for i in range(0, len(self.timelist)):
+        self.timelist[i] = self.timelist[i].replace(microsecond = 0)
+
+    if self.time_mode != "raw":
+        for i in range(0, len(self.timelist)):
+            if self.time_mode == "sync":
+                if "24h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = 0, minute = 0, second = 0)
+                elif "12h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 12, minute = 0, second = 0)
+                elif "8h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 8, minute = 0, second = 0)
+                elif "6h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 6, minute = 0, second = 0)
+                elif "4h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 4, minute = 0, second = 0)
+                elif "3h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 3, minute = 0, second = 0)
+                elif "2h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 2, minute = 0, second = 0)
+                elif "1h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(minute = 0, second = 0)
+                elif "45m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) % 60, second = 0)
+                elif "40m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) % 60, second = 0)
+                elif "30m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) % 60, second = 0)
+                elif "20m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) % 60, second = 0)
+                elif "15m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) % 60, second = 0)
+                elif "10m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) % 60, second = 0)
+                elif "5m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) % 60, second = 0)
+                elif "1m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(second = 0)
+            
+            elif self.time_mode == "nearest":
+                if "1m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(second = 0)
+                elif "5m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) % 60, second = 0)
+                elif "10m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) % 60, second = 0)
+                elif "15m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) % 60, second = 0)
+                elif "20m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) % 60, second = 0)
+                elif "30m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) % 60, second = 0)
+                elif "40m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) % 60, second = 0)
+                elif "45m" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) % 60, second = 0)
+                elif "1h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(minute = 0, second = 0)
+                elif "2h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 2, minute = 0, second = 0)
+                elif "3h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 3, minute = 0, second = 0)
+                elif "4h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 4, minute = 0, second = 0)
+                elif "6h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 6, minute = 0, second = 0)
+                elif "8h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 8, minute = 0, second = 0)
+                elif "12h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 12, minute = 0, second = 0)
+                if "24h" in self.formats:
+                    self.timelist[i] = self.timelist[i].replace(hour = 0, minute = 0, second = 0)
+
+            elif self.time_mode == "async":
+                if formatter == "24h":
+                    self.timelist[i] = self.timelist[i].replace(hour = 0, minute = 0, second = 0)
+                elif formatter == "12h":
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 12, minute = 0, second = 0)
+                elif formatter == "8h":
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 8, minute = 0, second = 0)
+                elif formatter == "6h":
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 6, minute = 0, second = 0)
+                elif formatter == "4h":
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 4, minute = 0, second = 0)
+                elif formatter == "3h":
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 3, minute = 0, second = 0)
+                elif formatter == "2h":
+                    self.timelist[i] = self.timelist[i].replace(hour = self.timelist[i].hour - self.timelist[i].hour % 2, minute = 0, second = 0)
+                elif formatter == "1h":
+                    self.timelist[i] = self.timelist[i].replace(minute = 0, second = 0)
+                elif formatter == "45m":
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 45)) % 60, second = 0)
+                elif formatter == "40m":
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 40)) % 60, second = 0)
+                elif formatter == "30m":
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 30)) % 60, second = 0)
+                elif formatter == "20m":
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 20)) % 60, second = 0)
+                elif formatter == "15m":
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 15)) % 60, second = 0)
+                elif formatter == "10m":
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 10)) % 60, second = 0)
+                elif formatter == "5m":
+                    self.timelist[i] = self.timelist[i].replace(hour = math.floor((((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) / 60), minute = (((self.timelist[i].hour * 60) + self.timelist[i].minute) - (((self.timelist[i].hour * 60) + self.timelist[i].minute) % 5)) % 60, second = 0)
+                elif formatter == "1m":
+                    self.timelist[i] = self.timelist[i].replace(second = 0)
+
+            if formatter == "day1":
+                if ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 20*60 + 0:
+                    self.timelist[i] = self.timelist[i].replace(hour = 20, minute = 0, second = 0)
+                elif ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 16*60 + 30:
+                    self.timelist[i] = self.timelist[i].replace(hour = 16, minute = 30, second = 0)
+                elif ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 13*60 + 0:
+                    self.timelist[i] = self.timelist[i].replace(hour = 13, minute = 0, second = 0)
+                elif ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 6*60 + 0:
+                    self.timelist[i] = self.timelist[i].replace(hour = 6, minute = 0, second = 0)
+                elif ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 1*60 + 0:
+                    self.timelist[i] = self.timelist[i].replace(hour = 1, minute = 0, second = 0)
+                else:
+                    self.timelist[i] = self.timelist[i].replace(hour = 20, minute = 0, second = 0) - timedelta(days=1)
+            elif formatter == "day2":
+                if ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 17*60 + 30:
+                    self.timelist[i] = self.timelist[i].replace(hour = 17, minute = 30, second = 0)
+                elif ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 8*60 + 0:
+                    self.timelist[i] = self.timelist[i].replace(hour = 8, minute = 0, second = 0)
+                else:
+                    self.timelist[i] = self.timelist[i].replace(hour = 17, minute = 30, second = 0) - timedelta(days=1)
+            elif formatter == "day3":
+                if ((self.timelist[i].hour * 60) + self.timelist[i].minute) >= 7*60 + 30:
+                    self.timelist[i] = self.timelist[i].replace(hour = 7, minute = 30, second = 0)
+                else:
+                    self.timelist[i] = self.timelist[i].replace(hour = 7, minute = 30, second = 0) - timedelta(days=1)
+            elif (formatter == "day4") or (formatter == "day5") or (formatter == "day6") or (formatter == "day7") or (formatter == "day8"):
+                self.timelist[i] = self.timelist[i].replace(hour = 0, minute = 0, second = 0)
+
+    return self
@@ -0,0 +1,107 @@
+"""
+Checks that AnimationWriter's GIFs and APNGs read back with Pillow as the frames that went into them,
+including frames of a different size to the first and frames too large for a single PNG data chunk.
+"""
+
+import struct
+
+import numpy as np
+import pytest
+from PIL import Image
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesCore import AMGP_UTIL as amgp
+#-----------------  Definitions -------------------#
+
+red, blue, white = (200, 30, 30, 255), (30, 30, 200, 255), (255, 255, 255, 255)
+
+def Frames(tmp_path):
+    '''
+    A solid frame, a smaller one to be fitted to it, noise too large to compress into one chunk, and a frame given by its path.
+    '''
+    noise = Image.fromarray(np.random.default_rng(0).integers(0, 256, (300, 400, 4), dtype = np.uint8), "RGBA")
+    noise.putalpha(255)
+    Image.new("RGBA", (400, 300), red).save(tmp_path / "saved.png")
+    return [Image.new("RGBA", (400, 300), red), Image.new("RGBA", (100, 50), blue), noise, str(tmp_path / "saved.png")]
+
+def Pixels(image):
+    return np.asarray(image.convert("RGBA"))
+
+def WriteAnimation(path, frames, frame_duration = 120):
+    writer = amgp.AnimationWriter(str(path), frame_duration)
+    for frame in frames:
+        writer.Add(frame)
+    return writer.Close()
+
+def CheckFitted(pixels):
+    # The smaller frame sits centered on white
+    assert tuple(pixels[150, 200]) == blue
+    assert tuple(pixels[125, 150]) == blue
+    assert tuple(pixels[124, 150]) == white
+    assert tuple(pixels[0, 0]) == white
+
+def test_apng(tmp_path):
+    frames = Frames(tmp_path)
+    path = WriteAnimation(tmp_path / "animation.apng", frames)
+    assert path == str(tmp_path / "animation.apng")
+
+    with Image.open(path) as animation:
+        assert animation.format == "PNG"
+        assert animation.n_frames == 4
+        assert animation.info["loop"] == 0
+        for num in range(4):
+            animation.seek(num)
+            assert animation.size == (400, 300)
+            assert animation.info["duration"] == 120
+            pixels = Pixels(animation)
+            if num == 1:
+                CheckFitted(pixels)
+            else:
+                # Lossless, so every pixel comes back as it went in
+                assert (pixels == Pixels(Image.open(frames[num]) if isinstance(frames[num], str) else frames[num])).all()
+
+def test_apng_chunks(tmp_path):
+    with open(WriteAnimation(tmp_path / "animation.apng", Frames(tmp_path)), "rb") as A:
+        contents = A.read()
+    assert contents.startswith(b"\x89PNG\r\n\x1a\n")
+    chunks = amgp.PNGChunks(contents)
+    names = [name for name, _ in chunks]
+    assert names[:2] == [b"IHDR", b"acTL"]
+    assert names[-1] == b"IEND"
+    assert struct.unpack(">II", dict(chunks)[b"acTL"]) == (4, 0)
+    # Only the first frame is held in IDAT chunks, the rest in fdAT chunks, and the noise needs several of either
+    assert names.count(b"fcTL") == 4
+    assert names.count(b"IDAT") == 1
+    assert names.count(b"fdAT") > 3
+    # Frame control and frame data chunks share one sequence, counting up from 0
+    sequence = [struct.unpack(">I", data[:4])[0] for name, data in chunks if name in [b"fcTL", b"fdAT"]]
+    assert sequence == list(range(len(sequence)))
+
+def test_png_chunks():
+    chunks = amgp.PNGChunks(b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 3) + b"abCDxyz" + b"\x00" * 4 + struct.pack(">I", 0) + b"IEND" + b"\x00" * 4)
+    assert chunks == [(b"abCD", b"xyz"), (b"IEND", b"")]
+
+def test_gif(tmp_path):
+    path = WriteAnimation(tmp_path / "animation.gif", Frames(tmp_path))
+
+    with Image.open(path) as animation:
+        assert animation.format == "GIF"
+        assert animation.n_frames == 4
+        assert animation.info["loop"] == 0
+        for num in range(4):
+            animation.seek(num)
+            assert animation.size == (400, 300)
+            assert animation.info["duration"] == 120
+            pixels = Pixels(animation)
+            if num == 1:
+                CheckFitted(pixels)
+            elif num != 2:
+                assert (pixels == red).all()
+
+def test_empty_and_unknown(tmp_path):
+    assert amgp.AnimationWriter(str(tmp_path / "animation.gif")).Close() == None
+    assert not (tmp_path / "animation.gif").exists()
+    with pytest.raises(ValueError):
+        amgp.AnimationWriter(str(tmp_path / "animation.avi"))
+    # Too short a duration for viewers to honor is lengthened
+    assert amgp.AnimationWriter(str(tmp_path / "animation.apng"), 1).frame_duration == 10
@@ -0,0 +1,95 @@
+"""
+Checks that ArchiveWindow() picks the same reports from a day of the Valpo surface archive, in the same order,
+as the boolean mask over the whole file that it replaced, and that ArchiveDay() keeps only two days parsed.
+"""
+
+from datetime import datetime, timedelta
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesOfficial import AMGP_OBS
+#-----------------  Definitions -------------------#
+
+margin = timedelta(minutes = 5)
+
+def ArchiveFile(day : datetime):
+    '''
+    A day of the archive as Valpo writes it: unsorted, with reports sharing a time, a report without one, an
+    unused column, missing values written as -9999, and reports from either side of midnight.
+    '''
+    rng = np.random.default_rng(int(day.strftime("%Y%m%d")))
+    times = [day + timedelta(minutes = int(m)) for m in rng.integers(-30, 24 * 60 + 30, 400)]
+    # Exactly on and just past every edge of the windows tested below
+    for valid in [day, day + timedelta(hours = 12), day + timedelta(hours = 23, minutes = 58)]:
+        times += [valid + offset for offset in [-margin, margin, -margin - timedelta(seconds = 1), margin + timedelta(seconds = 1)]] * 2
+    rows = []
+    for num, time in enumerate(times):
+        rows.append({
+            "station_id":f"K{num % 97:03d}",
+            "latitude":30 + num % 20,
+            "longitude":-120 + num % 50,
+            "elevation":-9999 if num % 13 == 0 else num % 300,
+            "date_time":"" if num == 7 else f"{time:%Y-%m-%d %H:%M:%S}",
+            "wind_direction":num % 360,
+            "wind_speed":num % 30,
+            "eastward_wind":0.5,
+            "northward_wind":-0.5,
+            "air_temperature":-9999 if num % 11 == 0 else num % 35,
+            "dew_point_temperature":num % 20,
+            "air_pressure_at_sea_level":1000 + num % 40,
+            "cloud_coverage":num % 9,
+            "present_weather":"RA" if num % 5 == 0 else "",
+            "report":f"METAR {num}"
+        })
+    return pd.DataFrame(rows).to_csv(index = False).encode("utf-8")
+
+def OldWindow(contents : bytes, valid_time : datetime):
+    data = pd.read_csv(BytesIO(contents), parse_dates=['date_time'], na_values=[-9999], low_memory=False)
+    return data[(data["date_time"] <= (valid_time + margin)) & (data["date_time"] >= (valid_time - margin))]
+
+@pytest.fixture
+def archive(monkeypatch):
+    downloads = []
+    def CachedDownload(url, valid_time):
+        downloads.append(url.split("/")[-1])
+        return ArchiveFile(datetime.strptime(url.split("/")[-1][:8], "%Y%m%d"))
+    monkeypatch.setattr(AMGP_OBS.amgp, "CachedDownload", CachedDownload)
+    monkeypatch.setattr(AMGP_OBS, "archive_days", OrderedDict())
+    return downloads
+
+@pytest.mark.parametrize("valid_time", [
+    datetime(2015, 6, 1, 12),
+    # Windows reaching back into, or on into, the day either side of the file's
+    datetime(2015, 6, 1, 0),
+    datetime(2015, 6, 1, 23, 58),
+    datetime(2015, 6, 1, 7, 13)
+])
+def test_matches_mask(archive, valid_time):
+    window = AMGP_OBS.ArchiveWindow(valid_time, margin)
+    expected = OldWindow(ArchiveFile(datetime(2015, 6, 1)), valid_time)
+    pd.testing.assert_frame_equal(window, expected[window.columns])
+    assert len(window) > 0
+    assert "report" not in window.columns
+
+def test_inclusive_edges(archive):
+    valid_time = datetime(2015, 6, 1, 12)
+    times = AMGP_OBS.ArchiveWindow(valid_time, margin)["date_time"]
+    assert (times == valid_time - margin).sum() == 2
+    assert (times == valid_time + margin).sum() == 2
+    assert times.between(valid_time - margin, valid_time + margin).all()
+
+def test_keeps_two_days(archive):
+    first, second, third = datetime(2015, 6, 1, 12), datetime(2015, 6, 2, 12), datetime(2015, 6, 3, 12)
+    for valid_time in [first, first + timedelta(hours = 1), second, first, third]:
+        AMGP_OBS.ArchiveWindow(valid_time, margin)
+    # The first day was used again after the second, so the third pushed the second out
+    assert archive == ["20150601_metar.csv", "20150602_metar.csv", "20150603_metar.csv"]
+    assert list(AMGP_OBS.archive_days.keys()) == ["20150601", "20150603"]
+    AMGP_OBS.ArchiveWindow(second, margin)
+    assert archive[-1] == "20150602_metar.csv"
+    assert list(AMGP_OBS.archive_days.keys()) == ["20150603", "20150602"]
@@ -0,0 +1,88 @@
+"""
+Checks that AreaRegistry resolves built-in, user-defined, and MetPy areas in that order of precedence, with zoom suffixes,
+that it picks up edits to the user's definitions, and that unknown areas raise a ValueError.
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesCore import AMGP_UTIL as amgp
+#-----------------  Definitions -------------------#
+
+builtin_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "AMGP", "Resources", "amgp_area_definitions.json")
+
+projection = {
+    "projection":{"selection":["Lambert Conformal"]},
+    "central_longitude":{"selection":"-95"},
+    "central_latitude":{"selection":"35"},
+    "standard_parallel_1":{"selection":""},
+    "standard_parallel_2":{"selection":""},
+    "satellite_height":{"selection":""},
+    "area":{"selection":"usc"}
+}
+
+@pytest.fixture
+def user_areas(tmp_path, monkeypatch):
+    '''
+    A registry of the built-in areas and a temporary file of the user's, standing in for the one every module uses.
+    '''
+    user_path = tmp_path / "user_area_definitions.json"
+    user_path.write_text(json.dumps({"Home":"-90, -80, 40, 44", "usc":"0, 1, 0, 1"}))
+    registry = amgp.AreaRegistry()
+    registry.files = [builtin_path, str(user_path)]
+    monkeypatch.setattr(amgp, "area_registry", registry)
+    return user_path
+
+def test_builtin_user_and_metpy_areas(user_areas):
+    assert amgp.AreaExtent("mw") == (-94.5, -78.5, 35.5, 47)
+    assert amgp.AreaExtent("home") == (-90, -80, 40, 44)
+    # Built-in areas take precedence over the user's of the same name
+    assert amgp.AreaExtent("usc") == (-120, -74, 25, 50)
+    assert amgp.AreaExtent("ne") == (-107.5, -91.5, 36.25, 47.25)
+    assert amgp.CustomAreas("HOME") == (-90, -80, 40, 44)
+    assert amgp.CustomAreas("ne") == None
+    assert amgp.AreaExtent("") == None
+
+def test_zoom(user_areas):
+    assert amgp.AreaExtent("Home+") == (-87.5, -82.5, 41, 43)
+    assert amgp.AreaExtent("home-") == (-95, -75, 38, 46)
+    assert amgp.AreaExtent("home++") == (-86.25, -83.75, 41.5, 42.5)
+    assert amgp.AreaExtent("home+-") == amgp.AreaExtent("home")
+
+def test_unknown_areas(user_areas):
+    with pytest.raises(ValueError):
+        amgp.AreaExtent("nowhere")
+    with pytest.raises(ValueError):
+        amgp.AreaExtent("nowhere+")
+    with pytest.raises(ValueError):
+        amgp.DomainBounds(dict(projection, area = {"selection":"nowhere"}))
+
+def test_user_edits(user_areas):
+    assert amgp.AreaExtent("home") == (-90, -80, 40, 44)
+    assert amgp.AreaExtent("home+") == (-87.5, -82.5, 41, 43)
+    user_areas.write_text(json.dumps({"home":"-100, -90, 30, 34", "away":"10, 20, 30, 40"}))
+    # The files are checked for changes at most once a second
+    time.sleep(1.1)
+    assert amgp.AreaExtent("home") == (-100, -90, 30, 34)
+    assert amgp.AreaExtent("home+") == (-97.5, -92.5, 31, 33)
+    assert amgp.AreaExtent("away") == (10, 20, 30, 40)
+
+def test_missing_user_file(tmp_path, monkeypatch):
+    registry = amgp.AreaRegistry()
+    registry.files = [builtin_path, str(tmp_path / "user_area_definitions.json")]
+    monkeypatch.setattr(amgp, "area_registry", registry)
+    assert amgp.AreaExtent("mw") == (-94.5, -78.5, 35.5, 47)
+    # An empty file of the user's own definitions is started for them
+    assert json.loads((tmp_path / "user_area_definitions.json").read_text()) == {}
+
+def test_domain_bounds(user_areas):
+    west, east, south, north = amgp.AreaExtent("usc")
+    bounds = amgp.DomainBounds(projection)
+    # A conic projection shows more than the extent beyond its corners, never less
+    assert (bounds[0] <= west) and (bounds[1] >= east) and (bounds[2] <= south) and (bounds[3] >= north)
+    zoomed = amgp.DomainBounds(dict(projection, area = {"selection":"usc+"}))
+    assert (zoomed[0] > bounds[0]) and (zoomed[1] < bounds[1]) and (zoomed[2] > bounds[2]) and (zoomed[3] < bounds[3])
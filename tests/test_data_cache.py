@@ -0,0 +1,129 @@
+"""
+Checks the on-disk DataCache and CacheTTL: expiry, least-recently-used eviction past the size limit,
+entry keys, and the --cache-info and --clear-cache command line options, all within a temporary cache root.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import hashlib
+import os
+import runpy
+import sys
+
+import pytest
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesCore import AMGP_UTIL as amgp
+#-----------------  Definitions -------------------#
+
+amgp_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "AMGP")
+
+class Clock(datetime):
+    '''
+    datetime, but with a now() that only moves when a test moves it.
+    '''
+    current = datetime(2024, 1, 10, 12, tzinfo = timezone.utc)
+
+    @classmethod
+    def now(cls, tz = None):
+        return cls.current if tz == None else cls.current.astimezone(tz)
+
+@pytest.fixture
+def cache_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(amgp, "CacheRoot", lambda: str(tmp_path))
+    monkeypatch.setattr(amgp, "datetime", Clock)
+    monkeypatch.setattr(Clock, "current", Clock.current)
+    return tmp_path
+
+def Touch(cache, key, timestamp):
+    os.utime(os.path.join(cache.directory, f"{key}.bin"), (timestamp, timestamp))
+
+def test_ttl():
+    now = datetime.now(timezone.utc)
+    assert amgp.CacheTTL(now - timedelta(hours = 1)) == timedelta(minutes = 10)
+    assert amgp.CacheTTL(now - timedelta(days = 3)) == None
+    # Naive times are taken as UTC
+    assert amgp.CacheTTL((now - timedelta(days = 3)).replace(tzinfo = None)) == None
+    assert amgp.CacheTTL((now - timedelta(hours = 1)).replace(tzinfo = None)) == timedelta(minutes = 10)
+
+def test_expiry(cache_root):
+    cache = amgp.DataCache("Raw")
+    cache.Put("recent", b"recent", timedelta(minutes = 10), "source")
+    cache.Put("archive", b"archive", None, "source")
+
+    Clock.current += timedelta(minutes = 9)
+    assert cache.Get("recent") == b"recent"
+
+    Clock.current += timedelta(minutes = 2)
+    assert cache.Get("recent") == None
+    # Expired entries are removed as they're found
+    assert sorted(os.listdir(cache.directory)) == ["archive.bin", "archive.json"]
+
+    Clock.current += timedelta(days = 3650)
+    assert cache.Get("archive") == b"archive"
+
+def test_objects(cache_root):
+    cache = amgp.DataCache("Parsed")
+    cache.PutObject("parsed", {"rows":[1, 2, 3]})
+    assert cache.GetObject("parsed") == {"rows":[1, 2, 3]}
+    assert cache.GetObject("missing") == None
+    # A payload that can't be unpickled is dropped rather than returned
+    cache.Put("broken", b"not a pickle")
+    assert cache.GetObject("broken") == None
+    assert cache.Get("broken") == None
+
+def test_eviction_order(cache_root):
+    # Room for two 1000 byte entries, but not three
+    cache = amgp.DataCache("Raw", max_megabytes = 2500 / (1024 * 1024))
+    cache.Put("a", b"a" * 1000)
+    cache.Put("b", b"b" * 1000)
+    Touch(cache, "a", 100)
+    Touch(cache, "b", 200)
+    cache.Put("c", b"c" * 1000)
+    assert [entry["key"] for entry in cache.Inspect()] == ["c", "b"]
+
+    # Reading an entry makes it the most recently used
+    Touch(cache, "b", 100)
+    Touch(cache, "c", 200)
+    assert cache.Get("b") == b"b" * 1000
+    cache.Put("d", b"d" * 1000)
+    assert sorted([entry["key"] for entry in cache.Inspect()]) == ["b", "d"]
+    assert sum([entry["size"] for entry in cache.Inspect()]) <= cache.max_bytes
+
+def test_keys(cache_root):
+    cache = amgp.DataCache("Raw")
+    valid_time = datetime(2024, 1, 1, 12, tzinfo = timezone.utc)
+    key = cache.Key("https://example.com/data.csv", valid_time)
+    assert key == hashlib.sha256(f"https://example.com/data.csv|{valid_time}".encode("utf-8")).hexdigest()
+    assert key == amgp.DataCache("Parsed").Key("https://example.com/data.csv", valid_time)
+    assert key != cache.Key("https://example.com/data.csv", valid_time + timedelta(hours = 1))
+    assert key != cache.Key(valid_time, "https://example.com/data.csv")
+
+def RunAMGP(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["AMGP.py", *args])
+    monkeypatch.chdir(amgp_dir)
+    runpy.run_path("AMGP.py", run_name = "__main__")
+
+def test_command_line(cache_root, monkeypatch, capsys):
+    raw = amgp.DataCache("Raw")
+    raw.Put(raw.Key("https://example.com/a"), b"a" * 2048, None, "https://example.com/a")
+    raw.Put(raw.Key("https://example.com/b"), b"b" * 1024, timedelta(minutes = 10), "https://example.com/b")
+    parsed = amgp.DataCache("Parsed")
+    parsed.Put(parsed.Key("https://example.com/a"), b"a", None, "parsed a")
+
+    RunAMGP(monkeypatch, "--cache-info")
+    output = capsys.readouterr().out
+    assert "(AMGP) <cache> Raw: 2 entries" in output
+    assert "(AMGP) <cache> Parsed: 1 entries" in output
+    assert "never expires  https://example.com/a" in output
+    assert f"expires {Clock.current + timedelta(minutes = 10):%Y-%m-%d %H:%M:%SZ}  https://example.com/b" in output
+    assert "2.0 KB" in output
+
+    RunAMGP(monkeypatch, "--clear-cache", "Parsed")
+    assert "(AMGP) <cache> Parsed cleared" in capsys.readouterr().out
+    assert len(parsed.Inspect()) == 0
+    assert len(raw.Inspect()) == 2
+
+    RunAMGP(monkeypatch, "--clear-cache")
+    assert "(AMGP) <cache> Raw cleared" in capsys.readouterr().out
+    assert len(raw.Inspect()) == 0
@@ -0,0 +1,51 @@
+"""
+Property-based checks that the vectorised Time.FormatTimes() floors timelists exactly as the
+element-by-element version it replaced did, for every mode and format.
+"""
+
+from datetime import datetime, timedelta, timezone
+from copy import deepcopy
+
+from hypothesis import given, settings, strategies as st
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesCore import AMGP_UTIL as amgp
+from reference_format_times import ReferenceFormatTimes
+#-----------------  Definitions -------------------#
+
+all_formats = list(amgp.time_steps.keys()) + list(amgp.day_anchors.keys())
+
+zones = st.sampled_from([None, timezone.utc, timezone(timedelta(hours = -5)), timezone(timedelta(hours = 5, minutes = 30))])
+
+@st.composite
+def Times(draw):
+    zone = draw(zones)
+    timelist = draw(st.lists(st.datetimes(min_value = datetime(1900, 1, 2), max_value = datetime(2100, 12, 31)), min_size = 1, max_size = 50))
+    formats = draw(st.lists(st.sampled_from(all_formats), min_size = 1, max_size = 4, unique = True))
+    formatter = draw(st.sampled_from(formats + list(amgp.day_anchors.keys())))
+    mode = draw(st.sampled_from(["sync", "nearest", "async", "raw"]))
+
+    time = amgp.Time(datetime(2025, 1, 1, tzinfo = timezone.utc), mode, starttime = timelist[0])
+    time.timelist = [t.replace(tzinfo = zone) for t in timelist]
+    time.entries = len(time.timelist)
+    time.AddFormatting([{"source_module":"00000000", "name":f"factor_{i}", "time_format":format} for i, format in enumerate(formats)])
+    return time, formatter
+
+@settings(max_examples = 2000, deadline = None)
+@given(Times())
+def test_matches_reference(case):
+    time, formatter = case
+    expected = ReferenceFormatTimes(deepcopy(time), formatter).timelist
+    result = deepcopy(time).FormatTimes(formatter).timelist
+    assert result == expected
+    assert [t.tzinfo for t in result] == [t.tzinfo for t in expected]
+
+@given(st.sampled_from(list(amgp.day_anchors.keys())), st.datetimes(min_value = datetime(1900, 1, 2), max_value = datetime(2100, 12, 31)))
+def test_day_anchor_boundaries(formatter, day):
+    # Every anchor, and the minute before it, either side of the first anchor of the day
+    time = amgp.Time(datetime(2025, 1, 1, tzinfo = timezone.utc), "async", starttime = day)
+    time.AddFormatting([{"source_module":"00000000", "name":"factor", "time_format":formatter}])
+    midnight = day.replace(hour = 0, minute = 0, second = 0, microsecond = 0)
+    time.timelist = [midnight + timedelta(minutes = anchor + offset) for anchor in amgp.day_anchors[formatter] for offset in [-1, 0]]
+    time.entries = len(time.timelist)
+    assert deepcopy(time).FormatTimes(formatter).timelist == ReferenceFormatTimes(deepcopy(time), formatter).timelist
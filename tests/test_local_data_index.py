@@ -0,0 +1,114 @@
+"""
+Checks that LocalDataIndex finds tagged files by tag and valid time, and that Update() only lists the directories
+that changed since the last update while still picking up every file added, removed, or renamed.
+"""
+
+from datetime import datetime, timedelta, timezone
+from itertools import count
+
+import os
+import shutil
+
+import pytest
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesCore import AMGP_UTIL as amgp
+#-----------------  Definitions -------------------#
+
+# A different modification time for every directory settled, so that each still differs from the last one indexed
+settled = count(1_600_000_000_000_000_000)
+
+def Settle(*directories):
+    # Directories modified within the last couple of seconds are always listed again, so the tests move them into the past
+    for directory in directories:
+        mtime = next(settled)
+        os.utime(directory, ns = (mtime, mtime))
+
+@pytest.fixture
+def local_data(tmp_path):
+    root = tmp_path / "data"
+    (root / "sub").mkdir(parents = True)
+    (root / "HRRR%hrrr+20240102").mkdir()
+    (root / "GFS%gfs+2024010100.nc").write_bytes(b"")
+    (root / "GFS%gfs+2024010112.nc").write_bytes(b"")
+    (root / "untagged.txt").write_bytes(b"")
+    (root / "sub" / "RAP%rap+20240101_06.grb2").write_bytes(b"")
+    (root / "sub" / "NOTES%notes.txt").write_bytes(b"")
+    # Every file directly within a tagged directory takes on its tags, whatever it's called
+    (root / "HRRR%hrrr+20240102" / "f00.grb2").write_bytes(b"")
+    (root / "HRRR%hrrr+20240102" / "f01.grb2").write_bytes(b"")
+    Settle(root, root / "sub", root / "HRRR%hrrr+20240102")
+    return root, amgp.LocalDataIndex(str(tmp_path / "index" / "local_data.sqlite"))
+
+def Names(root, files):
+    return [os.path.relpath(path, root) for path, _ in files]
+
+def test_find(local_data):
+    root, index = local_data
+    assert index.Update([str(root)]) == 3
+    assert Names(root, index.Find()) == [
+        "GFS%gfs+2024010100.nc",
+        "GFS%gfs+2024010112.nc",
+        os.path.join("HRRR%hrrr+20240102", "f00.grb2"),
+        os.path.join("HRRR%hrrr+20240102", "f01.grb2"),
+        os.path.join("sub", "NOTES%notes.txt"),
+        os.path.join("sub", "RAP%rap+20240101_06.grb2")
+    ]
+    assert index.Find(["gfs"])[0][1] == ["gfs", "2024010100"]
+    assert Names(root, index.Find(["hrrr", "20240102"])) == [os.path.join("HRRR%hrrr+20240102", "f00.grb2"), os.path.join("HRRR%hrrr+20240102", "f01.grb2")]
+    assert index.Find(["gfs", "rap"]) == []
+    assert index.Find(["GFS"]) == []
+
+def test_find_by_time(local_data):
+    root, index = local_data
+    index.Update([str(root)])
+    # Inclusive of both ends, and leaving out files without a valid time
+    assert Names(root, index.Find(start = datetime(2024, 1, 1, 6), end = datetime(2024, 1, 1, 12))) == ["GFS%gfs+2024010112.nc", os.path.join("sub", "RAP%rap+20240101_06.grb2")]
+    assert Names(root, index.Find(start = datetime(2024, 1, 1, 12))) == ["GFS%gfs+2024010112.nc", os.path.join("HRRR%hrrr+20240102", "f00.grb2"), os.path.join("HRRR%hrrr+20240102", "f01.grb2")]
+    assert Names(root, index.Find(["gfs"], end = datetime(2024, 1, 1, 11, 59))) == ["GFS%gfs+2024010100.nc"]
+    # Times with a zone are compared in UTC
+    assert Names(root, index.Find(["gfs"], start = datetime(2024, 1, 1, 7, tzinfo = timezone(timedelta(hours = -5))))) == ["GFS%gfs+2024010112.nc"]
+
+def test_reindex(local_data, tmp_path):
+    root, index = local_data
+    assert index.Update([str(root)]) == 3
+    assert index.Update([str(root)]) == 0
+
+    # A file added to one directory only lists that directory again
+    (root / "sub" / "RAP%rap+20240101_07.grb2").write_bytes(b"")
+    Settle(root / "sub")
+    assert index.Update([str(root)]) == 1
+    assert len(index.Find(["rap"])) == 2
+
+    # Renamed and removed files are dropped
+    os.rename(root / "GFS%gfs+2024010112.nc", root / "GFS%gfs+2024010118.nc")
+    os.remove(root / "HRRR%hrrr+20240102" / "f01.grb2")
+    Settle(root, root / "HRRR%hrrr+20240102")
+    assert index.Update([str(root)]) == 2
+    assert Names(root, index.Find(["gfs"])) == ["GFS%gfs+2024010100.nc", "GFS%gfs+2024010118.nc"]
+    assert len(index.Find(["hrrr"])) == 1
+    assert len(index.Find()) == 6
+
+    # So is everything within a directory that's gone, or a root that's no longer listed
+    shutil.rmtree(root / "sub")
+    Settle(root)
+    assert index.Update([str(root)]) == 1
+    assert index.Find(["rap"]) == []
+    assert index.Update([]) == 0
+    assert index.Find() == []
+
+    # A new index over the same database picks up where the last left off
+    assert index.Update([str(root)]) == 2
+    assert amgp.LocalDataIndex(index.path).Update([str(root)]) == 0
+
+def test_recent_directories_are_listed_again(local_data):
+    root, index = local_data
+    index.Update([str(root)])
+    (root / "sub" / "RAP%rap+20240101_07.grb2").write_bytes(b"")
+    mtime = os.stat(root / "sub").st_mtime_ns
+    assert index.Update([str(root)]) == 1
+    # Added within the same tick of the directory's clock, so its modification time alone doesn't show the change
+    (root / "sub" / "RAP%rap+20240101_08.grb2").write_bytes(b"")
+    os.utime(root / "sub", ns = (mtime, mtime))
+    assert index.Update([str(root)]) == 1
+    assert len(index.Find(["rap"])) == 3
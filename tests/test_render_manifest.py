@@ -0,0 +1,138 @@
+"""
+Checks that Run() skips exactly the frames whose hash is already recorded in their directory's render manifest,
+and draws again any frame whose data, style, or settings changed, or whose image is gone.
+"""
+
+from datetime import datetime, timezone
+
+import json
+import os
+
+import pytest
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesCore import AMGP_UTIL as amgp
+from ModulesCore import AMGP_MAP as amgpmap
+#-----------------  Definitions -------------------#
+
+class FakeModule(object):
+    '''
+    A data module whose fingerprint of each valid time is whatever the test sets it to.
+    '''
+    def __init__(self):
+        self.fingerprints = {}
+
+    def Info(self):
+        return {"name":"AMGP_FAKE", "uid":"00999000"}
+
+    def DataFingerprint(self, plotable, proj_settings, time):
+        return self.fingerprints.get(time.timelist[0], "unchanged")
+
+class FakeStyle(object):
+    def StyleInfo(self):
+        return {"name":"fake-style", "axes":1}
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    module = FakeModule()
+    packed_data = {
+        "version":"test",
+        "data_modules":{"AMGP_FAKE":module},
+        "styles":{"fake-style":FakeStyle()},
+        "runtime":datetime(2024, 1, 2, tzinfo = timezone.utc),
+        "key":None
+    }
+    preset = {
+        "plotables":{0:[{"source_module":"00999000", "name":"fake", "options":{}, "time_format":"1h"}]},
+        "map_settings":{0:{"time":{"selection":"20240101-00:00:00 to 20240101-02:00:00 interval 01:00:00"}, "time mode":{"selection":["sync"]}, "image dpi":{"selection":["80"]}, "append date to title":{"selection":["Yes"]}}},
+        "projections":{0:{"projection":{"selection":["Lambert Conformal"]}, "area":{"selection":"usc"}}},
+        "style":{"name":"fake-style", "axes":1},
+        "save":"fake/{HH}.png"
+    }
+    drawn = []
+
+    def RenderFrame(packed_data, time_plans, plotables, map_settings, proj_settings, style_info, save_loc, figure_num, in_memory = False):
+        drawn.append(figure_num)
+        full_path = f"{tmp_path}{amgp.PathSep()}{time_plans[0].timelist[figure_num - 1]:%H}.png"
+        with open(full_path, "wb") as F:
+            F.write(b"frame")
+        return full_path
+
+    monkeypatch.setattr(amgpmap, "RenderFrame", RenderFrame)
+    monkeypatch.setattr(amgpmap, "FrameDirectory", lambda *args: str(tmp_path))
+
+    def Run(**changes):
+        drawn.clear()
+        settings = dict(preset, **changes)
+        paths = amgpmap.Run(packed_data, settings["plotables"], settings["map_settings"], settings["projections"], settings["style"], settings["save"], overrides = {"all_paths":True, "rerender":changes.get("rerender", False)})
+        return list(drawn), [os.path.basename(path) for path in paths]
+
+    Run.module = module
+    Run.preset = preset
+    return Run
+
+def test_unchanged_frames_are_skipped(run, tmp_path):
+    assert run() == ([1, 2, 3], ["00.png", "01.png", "02.png"])
+    with open(tmp_path / "render_manifest.json") as M:
+        assert sorted(json.load(M).keys()) == ["00.png", "01.png", "02.png"]
+    # The existing images stand in for the skipped frames, in frame order
+    assert run() == ([], ["00.png", "01.png", "02.png"])
+    assert run(rerender = True)[0] == [1, 2, 3]
+
+def test_changed_data_is_drawn(run):
+    run()
+    run.module.fingerprints[datetime(2024, 1, 1, 1)] = "changed"
+    assert run()[0] == [2]
+    assert run()[0] == []
+
+def test_data_without_fingerprint_is_always_drawn(run):
+    run()
+    run.module.fingerprints[datetime(2024, 1, 1, 2)] = None
+    assert run()[0] == [3]
+    assert run()[0] == [3]
+
+def test_missing_image_is_drawn(run, tmp_path):
+    run()
+    os.remove(tmp_path / "00.png")
+    assert run()[0] == [1]
+    assert run()[0] == []
+
+def test_changed_style_and_settings_are_drawn(run):
+    run()
+    assert run(style = dict(run.preset["style"], colors = "dark"))[0] == [1, 2, 3]
+
+    map_settings = {0:dict(run.preset["map_settings"][0], **{"image dpi":{"selection":["150"]}})}
+    assert run(map_settings = map_settings)[0] == [1, 2, 3]
+    assert run(map_settings = map_settings)[0] == []
+
+    # Rendering in parallel doesn't change how a frame looks, so it alone doesn't draw anything again
+    map_settings = {0:dict(map_settings[0], **{"parallel rendering":{"selection":["No"]}})}
+    assert run(map_settings = map_settings)[0] == []
+
+def test_frame_hash(run):
+    packed_data = {"version":"test", "data_modules":{"AMGP_FAKE":run.module}, "key":None}
+    plotables, map_settings, projections = run.preset["plotables"], run.preset["map_settings"], run.preset["projections"]
+    time_plans = [amgp.TimePlan(datetime(2024, 1, 2, tzinfo = timezone.utc), "sync", map_settings[0]["time"]["selection"], plotables[0])]
+    frame_hash = amgpmap.FrameHash(packed_data, time_plans, plotables, map_settings, projections, run.preset["style"], run.preset["save"], 1)
+    assert frame_hash == amgpmap.FrameHash(packed_data, time_plans, plotables, map_settings, projections, run.preset["style"], run.preset["save"], 1)
+    assert frame_hash != amgpmap.FrameHash(packed_data, time_plans, plotables, map_settings, projections, run.preset["style"], run.preset["save"], 2)
+    assert frame_hash != amgpmap.FrameHash(packed_data, time_plans, plotables, map_settings, projections, run.preset["style"], "other/{HH}.png", 1)
+    # Watermarked frames differ from the same frames without one
+    assert frame_hash != amgpmap.FrameHash(dict(packed_data, key = "key"), time_plans, plotables, map_settings, projections, run.preset["style"], run.preset["save"], 1)
+    # A plotable from a module that can't be found can't be fingerprinted
+    assert amgpmap.FrameHash(dict(packed_data, data_modules = {}), time_plans, plotables, map_settings, projections, run.preset["style"], run.preset["save"], 1) == None
+
+def test_manifest(tmp_path):
+    manifest = amgpmap.RenderManifest(str(tmp_path))
+    image = tmp_path / "frame.png"
+    image.write_bytes(b"frame")
+    manifest.Record("a", str(image), datetime(2024, 1, 1))
+    assert manifest.Find("a") == str(image)
+    assert manifest.Find("b") == None
+    # Images saved elsewhere aren't recorded here
+    manifest.Record("b", str(tmp_path / "elsewhere" / "frame.png"), datetime(2024, 1, 1))
+    assert manifest.Find("b") == None
+    # Read back by a later run, until the image is gone
+    assert amgpmap.RenderManifest(str(tmp_path)).Find("a") == str(image)
+    os.remove(image)
+    assert amgpmap.RenderManifest(str(tmp_path)).Find("a") == None
@@ -0,0 +1,58 @@
+"""
+Checks that decluttering through a StationIndex keeps exactly the reports metpy's reduce_point_density
+kept for the same frame, including as frames bring in stations the index hasn't seen yet.
+"""
+
+import cartopy.crs as ccrs
+import numpy as np
+from metpy.calc import reduce_point_density
+
+from hypothesis import given, settings, strategies as st
+
+#----------------- AMGP IMPORTS -------------------#
+from ModulesOfficial import AMGP_OBS
+#-----------------  Definitions -------------------#
+
+map_proj = ccrs.LambertConformal(central_longitude = -95, central_latitude = 35)
+data_proj = ccrs.PlateCarree()
+min_dist = 150000
+
+# Coarse enough that reports often share a location or fall within the distance of each other, and
+# reaching the south pole, which the map projection can't place
+coordinates = st.tuples(st.integers(-130, -60).map(float), st.integers(-180, 120).map(lambda lat: lat / 2))
+reports = st.lists(st.one_of(coordinates, st.just((np.nan, 40.0)), st.just((-100.0, np.nan))), max_size = 60)
+
+def Reference(lons, lats):
+    return reduce_point_density(map_proj.transform_points(data_proj, np.array(lons), np.array(lats)), min_dist)
+
+def Unzip(frame):
+    return [lon for lon, _ in frame], [lat for _, lat in frame]
+
+@settings(max_examples = 300, deadline = None)
+@given(st.lists(reports, min_size = 1, max_size = 5))
+def test_matches_reduce_point_density(frames):
+    # One index across every frame, so later frames extend it with stations earlier ones didn't have
+    index = AMGP_OBS.StationIndex(map_proj, data_proj, min_dist)
+    for frame in frames:
+        lons, lats = Unzip(frame)
+        assert (index.Reduce(lons, lats) == Reference(lons, lats)).all()
+
+def test_duplicates_and_missing_coordinates():
+    lons = [-100.0, -100.0, np.nan, -100.5, -90.0, -100.0, -90.0, -90.0]
+    lats = [40.0, 40.0, 40.0, 40.0, 40.0, np.nan, 40.0, -90.0]
+    index = AMGP_OBS.StationIndex(map_proj, data_proj, min_dist)
+    keep = index.Reduce(lons, lats)
+    assert keep.tolist() == [True, False, False, False, True, False, False, False]
+    assert (keep == Reference(lons, lats)).all()
+
+def test_extend_between_frames():
+    index = AMGP_OBS.StationIndex(map_proj, data_proj, min_dist)
+    first = ([-100.0, -95.0], [40.0, 40.0])
+    # A new station placed before one already indexed, within the distance of it
+    second = ([-100.2, -100.0, -80.0], [40.0, 40.0, 35.0])
+    assert (index.Reduce(*first) == Reference(*first)).all()
+    assert (index.Reduce(*second) == Reference(*second)).all()
+    assert index.Reduce(*second).tolist() == [True, False, True]
+    assert len(index.locations) == 4
+    # The first frame again, now answered from an index that holds the second's stations too
+    assert (index.Reduce(*first) == Reference(*first)).all()